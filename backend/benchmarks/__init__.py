@@ -0,0 +1 @@
+"""Benchmarks for the soil card pipeline. Run from backend/ with python -m benchmarks.<name>."""
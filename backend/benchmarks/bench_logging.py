@@ -0,0 +1,163 @@
+"""Per-request overhead of the request log: none vs legacy vs queued.
+
+Usage (from backend/):
+    python -m benchmarks.bench_logging [--requests 5000] [--repeat 5]
+
+A minimal FastAPI app with one JSON endpoint is called straight through
+ASGI with the headers a mobile client sends. Variants:
+
+- off: no request logging middleware
+- legacy: the previous middleware - three ``log()`` calls per request
+  (request line, all headers, response), each opening debug.log,
+  appending a line, closing it and printing the line
+- queued: services.app_logging.RequestLogMiddleware, one JSON record
+  per request handed to the background writer
+- queued 10%: the same with LOG_REQUEST_SAMPLE_RATE=0.1
+- queued + headers: queued with LOG_REQUEST_HEADERS on
+
+Log files go to a temporary directory and console output to /dev/null.
+The table shows requests/s and the added microseconds per request against
+"off", plus the records that reached the file for each queued run.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+
+from services.app_logging import RequestLogMiddleware, configure_logging, get_logger, logging_stats, shutdown_logging
+
+HEADERS = [
+    (b"host", b"rishven-soiltrack.hf.space"),
+    (b"user-agent", b"okhttp/4.9.2"),
+    (b"accept", b"application/json"),
+    (b"accept-encoding", b"gzip"),
+    (b"x-forwarded-for", b"106.51.23.4"),
+    (b"x-forwarded-proto", b"https"),
+    (b"x-request-id", b"5b0a2c7e-1f4d-4c8e-9a7b-3e2d1c0b9a8f"),
+]
+
+
+def legacy_middleware(log_path: Path):
+    def log(msg):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        line = f"[{timestamp}] {msg}\n"
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(line)
+        print(line, flush=True)
+
+    async def log_requests(request: Request, call_next):
+        log(f">>> REQUEST: {request.method} {request.url}")
+        log(f"    Headers: {dict(request.headers)}")
+        response = await call_next(request)
+        log(f"<<< RESPONSE: {response.status_code}")
+        return response
+
+    return log_requests
+
+
+def build_app(legacy_log: Path = None, **queued_options) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/crops/rice")
+    async def crop():
+        return {"id": "rice", "name": "Rice", "name_kn": "ಭತ್ತ", "season": "Kharif"}
+
+    if legacy_log is not None:
+        app.middleware("http")(legacy_middleware(legacy_log))
+    elif queued_options:
+        app.add_middleware(RequestLogMiddleware, logger=get_logger("http"), **queued_options)
+    return app
+
+
+async def call(app) -> None:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "https", "path": "/crops/rice", "raw_path": b"/crops/rice", "query_string": b"",
+        "root_path": "", "headers": HEADERS, "client": ("106.51.23.4", 50000),
+        "server": ("rishven-soiltrack.hf.space", 443),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def seconds_for(app, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        await call(app)
+    return time.perf_counter() - start
+
+
+def line_count(path: Path) -> int:
+    if not path.exists():
+        return 0
+    with open(path, "rb") as f:
+        return sum(1 for _ in f)
+
+
+async def run(args, tmp: Path, devnull) -> list:
+    """Rows of (variant, median seconds per request, records written, records dropped)."""
+    variants = {"off": (build_app(), None)}
+    variants["legacy"] = (build_app(legacy_log=tmp / "legacy.log"), None)
+    queued = {
+        "queued": dict(sample_rate=1.0),
+        "queued 10%": dict(sample_rate=0.1),
+        "queued + headers": dict(sample_rate=1.0, log_headers=True),
+    }
+    for name, options in queued.items():
+        variants[name] = (build_app(**options), tmp / f"{name}.log")
+
+    runs = {name: [] for name in variants}
+    dropped = {name: 0 for name in variants}
+    for _ in range(args.repeat):
+        for name, (app, log_file) in variants.items():
+            if log_file is not None:
+                configure_logging(level="INFO", log_file=str(log_file), console=True, console_stream=devnull)
+            runs[name].append(await seconds_for(app, args.requests))
+            if log_file is not None:
+                # Stopping the writer flushes everything still queued
+                dropped[name] += logging_stats()["dropped"]
+                shutdown_logging()
+
+    return [
+        (name, statistics.median(seconds) / args.requests,
+         line_count(log_file) if log_file else None, dropped[name] if log_file else None)
+        for name, ((_, log_file), seconds) in zip(variants, zip(variants.values(), runs.values()))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            rows = asyncio.run(run(args, Path(tmp), devnull))
+
+    print(f"{args.requests} requests x {args.repeat} rounds per variant\n")
+    print(f"{'variant':17s} {'req/s':>8s} {'us/request':>11s} {'written':>9s} {'dropped':>8s}")
+    base = rows[0][1]
+    for name, per_request, written, dropped in rows:
+        extra = "-" if name == "off" else f"{(per_request - base) * 1e6:+.1f}"
+        written = "-" if written is None else written
+        dropped = "-" if dropped is None else dropped
+        print(f"{name:17s} {1 / per_request:8.0f} {extra:>11s} {written!s:>9s} {dropped!s:>8s}")
+
+
+if __name__ == "__main__":
+    main()
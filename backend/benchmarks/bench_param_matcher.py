@@ -0,0 +1,232 @@
+"""Per-row cost of AnalysisService's row matching: old loops, compiled, single regex.
+
+Usage (from backend/):
+    python -m benchmarks.bench_param_matcher [--ocr-dir path/to/texts] [--rows 20000] [--repeat 5]
+
+The corpus is synthetic card rows (label, value and status in the layouts and
+OCR misreads seen on GKVK cards, plus header/footer noise). ``--ocr-dir``
+adds the rows of every ``.txt`` file in it, e.g. OCR outputs saved from real
+cards. Every matcher is first checked to give the same (param, value,
+status) per row as the old loops; timings are the median of ``--repeat``
+runs.
+
+"single regex" is one combined pattern scanned once per row (zero-width
+lookaheads, so it is exact). CPython's backtracking engine tries every
+alternative at every position, so it loses to a few compiled searches with
+early exit - which is why AnalysisService uses the latter.
+"""
+
+import argparse
+import random
+import re
+import statistics
+import time
+from pathlib import Path
+
+from services.analysis_service import VALUE_PATTERNS, AnalysisService
+
+LABELS = {
+    "ph": ["ರಸಸಾರ (pH)", "pH", "ಪಿ.ಹೆಚ್", "(pH)"],
+    "ec": ["ವಿದ್ಯುತ್ ವಾಹಕತೆ (EC)", "E.C", "(E.C)", "ಇಸಿ"],
+    "organic_carbon": ["ಸಾವಯವ ಇಂಗಾಲ (OC)", "Organic Carbon", "(OC)", "ಇಂಗಾಲ C)"],
+    "nitrogen": ["ಲಭ್ಯ ಸಾರಜನಕ (N)", "N", "TN", "Nitrogen"],
+    "phosphorus": ["ಲಭ್ಯ ರಂಜಕ (P2O5)", "P205", "(P2o5)", "Phosphorus"],
+    "potassium": ["ಲಭ್ಯ ಪೊಟ್ಯಾಶ್ (K2O)", "K20", "ಪೊಟ್ಯಾಷ್", "Potassium"],
+    "sulphur": ["ಲಭ್ಯ ಗಂಧಕ (S)", "S", "Sulphur"],
+    "zinc": ["ಲಭ್ಯ ಸತು (Zn)", "(ZR)", "Zinc"],
+    "boron": ["ಲಭ್ಯ ಬೋರಾನ್ (B)", "B", "Boron"],
+    "iron": ["ಲಭ್ಯ ಕಬ್ಬಿಣ (Fe)", "Fe", "Iron"],
+    "manganese": ["ಲಭ್ಯ ಮ್ಯಾಂಗನೀಸ್ (Mn)", "Mn", "Manganese"],
+    "copper": ["ಲಭ್ಯ ತಾಮ್ರ (Cu)", "Cu", "Copper"],
+}
+
+NOISE_ROWS = [
+    "ಮಣ್ಣು ಆರೋಗ್ಯ ಚೀಟಿ",
+    "Soil Health Card",
+    "ಕೃಷಿ ವಿಶ್ವವಿದ್ಯಾನಿಲಯ, ಜಿಕೆವಿಕೆ, ಬೆಂಗಳೂರು",
+    "ರೈತರ ಹೆಸರು: ರಾಮಣ್ಣ",
+    "ಸರ್ವೆ ನಂ. 123/4  ಗ್ರಾಮ: ಹೆಬ್ಬಾಳ",
+    "ಮಾದರಿ ಸಂಖ್ಯೆ 2024-0571",
+    "ದಿನಾಂಕ 12/07/2024",
+    "ಕ್ರ.ಸಂ  ನಿಯತಾಂಕ  ಫಲಿತಾಂಶ  ಸ್ಥಿತಿ",
+    "",
+]
+
+
+def legacy_scan(analysis: AnalysisService, text: str):
+    """The matching AnalysisService did before its patterns were precompiled."""
+    param = None
+    for name, patterns in analysis.PARAM_PATTERNS.items():
+        if any(re.search(pattern, text, re.IGNORECASE) for pattern in patterns):
+            param = name
+            break
+    if param is None:
+        return None
+
+    value = None
+    for pattern in [
+        r'(\d+\.?\d*\s*[-–]\s*\d+\.?\d*)',
+        r'([><]\s*\d+\.?\d*)',
+        r'(\d+\.?\d+)',
+        r'(\d+)',
+    ]:
+        m = re.search(pattern, text)
+        if m:
+            value = m.group(1).replace(' ', '')
+            break
+
+    status = ("ಪತ್ತೆಯಾಗಿಲ್ಲ", "#6B7280", "Not Found")
+    for status_kn, (color, status_en) in analysis.STATUS_MAP.items():
+        if status_kn in text:
+            status = (status_kn, color, status_en)
+            break
+    return param, value, status
+
+
+def compiled_scan(analysis: AnalysisService, text: str):
+    """AnalysisService's compiled searches per row.
+
+    The value is searched over the whole row, like the other matchers;
+    analyze_soil_card starts it after the label (AnalysisService._label_end).
+    """
+    param = analysis._find_param(text)
+    if param is None:
+        return None
+    return param, analysis._extract_value(text), analysis._find_status(text)
+
+
+class SingleRegexMatcher:
+    """Parameter, value and status from one finditer over the row.
+
+    Each match is zero-width; at every position where some pattern starts,
+    one lookahead per family reports the first parameter / status / value
+    shape matching there. The lowest group seen per family over the row is
+    what trying each pattern in order would find.
+    """
+
+    def __init__(self, analysis: AnalysisService):
+        families = [
+            ["|".join(patterns) for patterns in analysis.PARAM_PATTERNS.values()],
+            [re.escape(status_kn) for status_kn in analysis.STATUS_MAP],
+            VALUE_PATTERNS,
+        ]
+        any_start = "|".join(alt for family in families for alt in family)
+        lookaheads = "".join("(?=(?:" + "|".join(f"({alt})" for alt in family) + ")?)" for family in families)
+        self.regex = re.compile(f"(?=(?:{any_start})){lookaheads}", re.IGNORECASE)
+        self.params = list(analysis.PARAM_PATTERNS)
+        self.statuses = analysis._STATUSES
+
+    def scan(self, text: str):
+        n_params, n_statuses = len(self.params), len(self.statuses)
+        param = status = tier = value = None
+        for m in self.regex.finditer(text):
+            groups = m.groups()
+            for i in range(n_params if param is None else param):
+                if groups[i] is not None:
+                    param = i
+                    break
+            for i in range(n_statuses if status is None else status):
+                if groups[n_params + i] is not None:
+                    status = i
+                    break
+            # The first hit of the best shape is the leftmost, as with re.search
+            for i in range(len(VALUE_PATTERNS) if tier is None else tier):
+                hit = groups[n_params + n_statuses + i]
+                if hit is not None:
+                    tier, value = i, hit.replace(' ', '')
+                    break
+        if param is None:
+            return None
+        found_status = self.statuses[status] if status is not None else ("ಪತ್ತೆಯಾಗಿಲ್ಲ", "#6B7280", "Not Found")
+        return self.params[param], value, found_status
+
+
+def random_value(rng: random.Random) -> str:
+    shape = rng.random()
+    if shape < 0.2:
+        low = round(rng.uniform(0, 300), rng.choice([0, 1, 2]))
+        return f"{low}{rng.choice(['-', ' - ', '–'])}{round(low + rng.uniform(0.5, 50), 1)}"
+    if shape < 0.35:
+        return f"{rng.choice('<>')}{rng.choice(['', ' '])}{round(rng.uniform(0, 5), 1)}"
+    if shape < 0.75:
+        return f"{rng.uniform(0, 10):.2f}"
+    return str(rng.randint(1, 500))
+
+
+def synthetic_rows(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    statuses = list(AnalysisService.STATUS_MAP) + ["ಕೊರತೆ", ""]
+    rows = []
+    for _ in range(count):
+        if rng.random() < 0.25:
+            rows.append(rng.choice(NOISE_ROWS))
+            continue
+        param = rng.choice(list(LABELS))
+        parts = [
+            rng.choice(["", f"{rng.randint(1, 12)}."]),
+            rng.choice(LABELS[param]),
+            rng.choice(["", AnalysisService.UNITS[param]]),
+            random_value(rng) if rng.random() < 0.9 else "",
+            rng.choice(statuses),
+        ]
+        if rng.random() < 0.3:
+            parts[3], parts[4] = parts[4], parts[3]
+        rows.append(" ".join(p for p in parts if p))
+    return rows
+
+
+def load_ocr_rows(ocr_dir: Path):
+    rows = []
+    for path in sorted(ocr_dir.glob("*.txt")):
+        rows.extend(path.read_text(encoding="utf-8").split("\n"))
+    return rows
+
+
+def time_per_row(fn, rows, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for row in rows:
+            fn(row)
+        runs.append(time.perf_counter() - start)
+    return statistics.median(runs) / len(rows) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ocr-dir", type=Path, help="directory of saved OCR outputs (.txt)")
+    parser.add_argument("--rows", type=int, default=20000, help="synthetic rows")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    analysis = AnalysisService()
+    rows = synthetic_rows(args.rows)
+    if args.ocr_dir:
+        rows += load_ocr_rows(args.ocr_dir)
+
+    single = SingleRegexMatcher(analysis)
+    matchers = {
+        "pattern loops (old)": lambda row: legacy_scan(analysis, row),
+        "compiled (current)": lambda row: compiled_scan(analysis, row),
+        "single regex": single.scan,
+    }
+
+    expected = [legacy_scan(analysis, row) for row in rows]
+    for name, matcher in matchers.items():
+        mismatches = [(row, want) for row, want in zip(rows, expected) if matcher(row) != want]
+        for row, want in mismatches[:5]:
+            print(f"MISMATCH {name} {row!r}: {matcher(row)} != {want}")
+        if mismatches:
+            raise SystemExit(f"{name}: {len(mismatches)}/{len(rows)} rows differ from the old matcher")
+    print(f"{len(rows)} rows, every matcher agrees with the old one\n")
+
+    print(f"{'matcher':24s} {'us/row':>8s} {'speed-up':>9s}")
+    baseline = None
+    for name, matcher in matchers.items():
+        us = time_per_row(matcher, rows, args.repeat)
+        baseline = baseline or us
+        print(f"{name:24s} {us:8.2f} {baseline / us:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
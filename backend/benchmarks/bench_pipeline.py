@@ -0,0 +1,376 @@
+"""Card-to-recommendation benchmark: per-stage and end-to-end latency with accuracy.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pipeline [--cards 24] [--corpus DIR] [--repeat 3]
+        [--ocr replay|easyocr] [--replay-ms 0] [--concurrency 4] [--gooey-delay 0.05]
+        [--json results.json] [--compare baseline.json] [--write-corpus DIR]
+
+The corpus is synthetic cards from benchmarks/card_corpus.py (the same
+seed always gives the same cards) or a directory of anonymized cards with
+their expected fields (``--corpus``). ``--write-corpus`` saves the
+synthetic corpus for inspection or reuse.
+
+Stages, timed one call at a time over every card ``--repeat`` times:
+
+- ocr: OCRService.extract_text on the image bytes (result cache off), with
+  the mean decode/readtext/group_rows split from the stage histograms
+- parse: AnalysisService.analyze_soil_card on the OCR text
+- classify: AnalysisService.get_nutrient_status, as /analyze-direct does
+- recommend: RecommendationService.recommend (recommendation cache off)
+
+End to end: POST /analyze-direct, then GET /recommendation/{crop_id} with
+the returned image_id, through the ASGI app (main.app with its lifespan,
+OCR pool and middleware), ``--concurrency`` cards at a time. Gooey AI is
+always the local stub (benchmarks/gooey_stub.py, ``--gooey-delay`` per call).
+
+``--ocr replay`` (the default, and the only choice without EasyOCR) swaps
+the reader for card_corpus.ReplayReader: decode, preprocessing, row grouping
+and everything after run for real; recognition is replayed, plus
+``--replay-ms`` per call. Replay needs OCR_POOL_KIND=thread and no worker
+farm. ``--ocr easyocr`` runs the real models; the synthetic images only
+carry English labels, so expect lower accuracy there than on real cards.
+
+Accuracy: fields = expected SoilData fields parsed within 0.01; cards =
+cards with every field right; status = parameters whose rating matches the
+threshold rating of the expected value.
+
+Latencies are nearest-rank percentiles in ms; ops/s is per single caller
+for the stages and completed cards per second end to end. ``--json``
+writes everything plus run metadata (git commit, settings) so runs can be
+compared across commits with ``--compare``.
+"""
+
+import os
+
+# Before the app's config is imported: measure OCR and Gooey AI calls rather
+# than the caches in front of them, and keep the log off the console
+for _key, _value in {
+    "OCR_CACHE_MAX_BYTES": "0",
+    "REC_CACHE_MAX_ENTRIES": "0",
+    "GOOEY_AI_API_KEY": "benchmark",
+    "LOG_CONSOLE": "false",
+    "LOG_FILE": "",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import math
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+import config
+from benchmarks.card_corpus import install_replay_reader, load_corpus, synthetic_corpus, write_corpus
+from benchmarks.gooey_stub import start_stub
+from services import metrics
+from services.card_pipeline import get_services
+from services.recommendation_service import RecommendationService
+
+STAGES = ("ocr", "parse", "classify", "recommend")
+OCR_SUBSTAGES = ("decode", "readtext", "group_rows")
+
+
+def summarize(samples: list, wall_seconds: float = None) -> dict:
+    """Nearest-rank p50/p95/p99 (ms) and throughput of a list of seconds."""
+    if not samples:
+        return {"n": 0}
+    ordered = sorted(samples)
+
+    def rank(q):
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))] * 1000
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": round(rank(50), 3),
+        "p95_ms": round(rank(95), 3),
+        "p99_ms": round(rank(99), 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "ops_per_s": round(len(ordered) / (wall_seconds or sum(ordered)), 2),
+    }
+
+
+class Accuracy:
+    """Field, card and status agreement with the expected SoilData."""
+
+    def __init__(self):
+        self.fields = self.fields_ok = 0
+        self.cards = self.cards_ok = 0
+        self.statuses = self.statuses_ok = 0
+        self.misses = {}
+
+    def add(self, card, parsed: dict, shown_status: dict) -> None:
+        card_ok = True
+        for param, expected in card.expected.items():
+            if expected is None:
+                continue
+            value = parsed.get(param)
+            ok = value is not None and abs(value - expected) <= 0.01
+            self.fields += 1
+            self.fields_ok += ok
+            if not ok:
+                card_ok = False
+                self.misses[param] = self.misses.get(param, 0) + 1
+            self.statuses += 1
+            self.statuses_ok += shown_status.get(param) == card.expected_status(param)
+        self.cards += 1
+        self.cards_ok += card_ok
+
+    def result(self) -> dict:
+        def share(ok, total):
+            return round(ok / total, 4) if total else None
+
+        return {
+            "fields": share(self.fields_ok, self.fields),
+            "cards": share(self.cards_ok, self.cards),
+            "status": share(self.statuses_ok, self.statuses),
+            "missed_fields": dict(sorted(self.misses.items(), key=lambda item: -item[1])),
+        }
+
+
+def substage_totals() -> dict:
+    totals = {}
+    for stage in OCR_SUBSTAGES:
+        snapshot = metrics.STAGE_SECONDS.snapshot(stage=stage)
+        totals[stage] = (snapshot["sum"], snapshot["count"]) if snapshot else (0.0, 0)
+    return totals
+
+
+async def run_stages(cards: list, repeat: int, recommendation_service: RecommendationService) -> dict:
+    ocr, analysis = get_services()
+    crops = list(recommendation_service.CROPS)
+    timings = {stage: [] for stage in STAGES}
+    accuracy = Accuracy()
+    sources = {}
+    before = substage_totals()
+
+    for round_index in range(repeat):
+        for i, card in enumerate(cards):
+            t0 = time.perf_counter()
+            text = ocr.extract_text(card.image)
+            t1 = time.perf_counter()
+            soil_data, raw_values, status_info = analysis.analyze_soil_card(text)
+            t2 = time.perf_counter()
+            nutrient_status = analysis.get_nutrient_status(soil_data, raw_values, status_info)
+            t3 = time.perf_counter()
+            _, source = await recommendation_service.recommend(crops[i % len(crops)], soil_data, nutrient_status)
+            t4 = time.perf_counter()
+
+            for stage, seconds in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+                timings[stage].append(seconds)
+            sources[source] = sources.get(source, 0) + 1
+            if round_index == 0:
+                shown = {param: status.status_kn for param, status in zip(analysis.PARAM_ORDER, nutrient_status)}
+                accuracy.add(card, soil_data.model_dump(), shown)
+
+    after = substage_totals()
+    substages = {}
+    for stage in OCR_SUBSTAGES:
+        seconds, count = after[stage][0] - before[stage][0], after[stage][1] - before[stage][1]
+        if count:
+            substages[stage] = round(seconds / count * 1000, 3)
+    return {
+        "stages": {stage: summarize(samples) for stage, samples in timings.items()},
+        "ocr_substage_mean_ms": substages,
+        "recommendation_sources": sources,
+        "accuracy": accuracy.result(),
+    }
+
+
+async def wait_for_ocr(main, timeout: float = 900.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not main.ocr_ready:
+        if main.ocr_load_error:
+            raise RuntimeError(f"OCR models failed to load: {main.ocr_load_error}")
+        if time.monotonic() > deadline:
+            raise RuntimeError("OCR models did not load in time")
+        await asyncio.sleep(0.05)
+
+
+async def run_end_to_end(main, cards: list, repeat: int, concurrency: int) -> dict:
+    app = main.app
+    crops = list(main.recommendation_service.CROPS)
+    analyze, recommend, total = [], [], []
+    errors = {}
+    accuracy = Accuracy()
+
+    async with app.router.lifespan_context(app):
+        await wait_for_ocr(main)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            slots = asyncio.Semaphore(concurrency)
+
+            async def one(round_index: int, i: int, card) -> None:
+                async with slots:
+                    t0 = time.perf_counter()
+                    response = await client.post(
+                        "/analyze-direct", files={"file": (f"{card.name}.jpg", card.image, "image/jpeg")}
+                    )
+                    t1 = time.perf_counter()
+                    if response.status_code != 200:
+                        errors[f"analyze {response.status_code}"] = errors.get(f"analyze {response.status_code}", 0) + 1
+                        return
+                    body = response.json()
+                    response = await client.get(
+                        f"/recommendation/{crops[i % len(crops)]}", params={"image_id": body["image_id"]}
+                    )
+                    t2 = time.perf_counter()
+                    if response.status_code != 200:
+                        errors[f"recommend {response.status_code}"] = errors.get(f"recommend {response.status_code}", 0) + 1
+                        return
+                analyze.append(t1 - t0)
+                recommend.append(t2 - t1)
+                total.append(t2 - t0)
+                if round_index == 0:
+                    shown = {
+                        param: status["status_kn"]
+                        for param, status in zip(main.analysis_service.PARAM_ORDER, body["nutrient_status"])
+                    }
+                    accuracy.add(card, body["soil_data"], shown)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(
+                one(round_index, i, card) for round_index in range(repeat) for i, card in enumerate(cards)
+            ))
+            wall = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "analyze_direct": summarize(analyze, wall),
+        "recommendation": summarize(recommend, wall),
+        "card": summarize(total, wall),
+        "errors": errors,
+        "accuracy": accuracy.result(),
+    }
+
+
+def git_commit() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def print_results(results: dict) -> None:
+    meta = results["meta"]
+    print(f"{meta['cards']} cards x {meta['repeat']} rounds, OCR {meta['ocr']}, commit {meta['git']['commit']}\n")
+    print(f"{'stage':24s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'ops/s':>9s}")
+    rows = [(stage, summary) for stage, summary in results["stages"].items()]
+    e2e = results["end_to_end"]
+    rows += [(f"e2e {name} (c={e2e['concurrency']})", e2e[name]) for name in ("analyze_direct", "recommendation", "card")]
+    for name, summary in rows:
+        if summary["n"]:
+            print(f"{name:24s} {summary['p50_ms']:9.2f} {summary['p95_ms']:9.2f} {summary['p99_ms']:9.2f} {summary['ops_per_s']:9.1f}")
+    split = ", ".join(f"{stage} {ms:.2f}" for stage, ms in results["ocr_substage_mean_ms"].items())
+    print(f"\nOCR split (mean ms): {split or '-'}")
+    if e2e["errors"]:
+        print(f"End-to-end errors: {e2e['errors']}")
+
+    print(f"\n{'accuracy':24s} {'fields':>9s} {'cards':>9s} {'status':>9s}")
+    for name, accuracy in (("stages", results["accuracy"]), ("end to end", e2e["accuracy"])):
+        print(f"{name:24s} " + " ".join(
+            f"{accuracy[key]:9.1%}" if accuracy[key] is not None else f"{'-':>9s}" for key in ("fields", "cards", "status")
+        ))
+    if results["accuracy"]["missed_fields"]:
+        print(f"Missed fields: {results['accuracy']['missed_fields']}")
+
+
+def print_comparison(results: dict, baseline: dict) -> None:
+    print(f"\nAgainst {baseline['meta']['git']['commit']} ({baseline['meta']['timestamp']}):")
+    print(f"{'stage':24s} {'p50 ms':>19s} {'p95 ms':>19s}")
+    pairs = [(stage, results["stages"][stage], baseline["stages"].get(stage)) for stage in results["stages"]]
+    pairs.append(("e2e card", results["end_to_end"]["card"], baseline["end_to_end"].get("card")))
+    for name, now, before in pairs:
+        if not before or not before.get("n") or not now["n"]:
+            continue
+        cells = []
+        for key in ("p50_ms", "p95_ms"):
+            change = (now[key] - before[key]) / before[key] if before[key] else 0.0
+            cells.append(f"{before[key]:8.2f} -> {now[key]:8.2f} ({change:+.0%})")
+        print(f"{name:24s} " + " ".join(cells))
+    for key in ("fields", "cards", "status"):
+        now, before = results["accuracy"][key], baseline["accuracy"].get(key)
+        if now is not None and before is not None:
+            print(f"accuracy {key:15s} {before:8.1%} -> {now:8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=24, help="synthetic cards to generate")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--corpus", type=Path, help="directory of cards instead of the synthetic corpus")
+    parser.add_argument("--write-corpus", type=Path, help="save the synthetic corpus here")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--ocr", choices=("replay", "easyocr"), default="replay")
+    parser.add_argument("--replay-ms", type=float, default=0.0, help="simulated recognition time per readtext call")
+    parser.add_argument("--concurrency", type=int, default=4, help="cards in flight end to end")
+    parser.add_argument("--gooey-delay", type=float, default=0.05, help="stub answer delay in seconds")
+    parser.add_argument("--json", type=Path, help="write results here")
+    parser.add_argument("--compare", type=Path, help="earlier --json output to compare against")
+    args = parser.parse_args()
+
+    cards = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.cards, args.seed)
+    if args.write_corpus:
+        write_corpus(cards, args.write_corpus)
+    if args.ocr == "replay":
+        if not all(card.detections for card in cards):
+            parser.error("--ocr replay needs <name>.detections.json for every card")
+        try:
+            install_replay_reader(cards, latency=args.replay_ms / 1000)
+        except RuntimeError as e:
+            parser.error(str(e))
+    elif importlib.util.find_spec("easyocr") is None:
+        parser.error("--ocr easyocr needs the easyocr package")
+
+    stub = start_stub(delay=args.gooey_delay)
+    try:
+        import main as app_main
+
+        app_main.recommendation_service.gooey_ai.base_url = stub.url
+        get_services()[0].load()
+        stage_results = asyncio.run(run_stages(cards, args.repeat, app_main.recommendation_service))
+        end_to_end = asyncio.run(run_end_to_end(app_main, cards, args.repeat, args.concurrency))
+    finally:
+        stub.shutdown()
+        stub.server_close()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git": git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "cards": len(cards),
+            "corpus": str(args.corpus) if args.corpus else f"synthetic seed={args.seed}",
+            "repeat": args.repeat,
+            "ocr": args.ocr if args.ocr == "easyocr" else f"replay +{args.replay_ms:g} ms",
+            "gooey_delay": args.gooey_delay,
+            "settings": {
+                key: getattr(config, key)
+                for key in ("OCR_PREPROCESS", "OCR_MAX_LONG_EDGE", "OCR_GRAYSCALE", "OCR_DESKEW", "OCR_MODE",
+                            "OCR_POOL_KIND", "OCR_POOL_WORKERS", "OCR_FARM_WORKERS", "FAST_JSON_RESPONSES")
+            },
+        },
+        **stage_results,
+        "end_to_end": end_to_end,
+    }
+    print_results(results)
+    if args.compare:
+        print_comparison(results, json.loads(args.compare.read_text(encoding="utf-8")))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Latency/accuracy trade-off of the OCR preprocessing settings.
+
+Usage (from backend/):
+    python -m benchmarks.bench_preprocess --cards path/to/cards [--repeat 3] [--no-ocr]
+
+``--cards`` is a directory of card photos (.jpg/.jpeg/.png). A card may have
+a sibling ``<name>.json`` with the expected SoilData fields, e.g.
+``{"ph": 5.25, "nitrogen": 210}``; accuracy is the share of those fields the
+parser recovers. Without EasyOCR installed (or with --no-ocr) only the
+preprocessing cost and output size are measured.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+from services.image_preprocess import ImagePreprocessor
+
+CONFIGS = {
+    "legacy (PIL, full res)": None,
+    "cv2 decode, full res": dict(max_long_edge=0),
+    "long edge 2560": dict(max_long_edge=2560),
+    "long edge 1600": dict(max_long_edge=1600),
+    "long edge 1600 + gray": dict(max_long_edge=1600, grayscale=True),
+    "long edge 1600 + deskew": dict(max_long_edge=1600, deskew=True),
+    "long edge 1280": dict(max_long_edge=1280),
+}
+
+
+def load_cards(cards_dir: Path):
+    cards = []
+    for path in sorted(cards_dir.iterdir()):
+        if path.suffix.lower() not in (".jpg", ".jpeg", ".png"):
+            continue
+        expected_path = path.with_suffix(".json")
+        expected = json.loads(expected_path.read_text(encoding="utf-8")) if expected_path.exists() else None
+        cards.append((path.name, path.read_bytes(), expected))
+    return cards
+
+
+def legacy_decode(image_bytes: bytes):
+    import io
+    import numpy as np
+    from PIL import Image
+    return np.array(Image.open(io.BytesIO(image_bytes))), 1.0
+
+
+def field_accuracy(soil_data, expected: dict, tolerance: float = 0.01):
+    matched = 0
+    for field, value in expected.items():
+        got = getattr(soil_data, field, None)
+        if got is not None and abs(got - value) <= tolerance * max(1.0, abs(value)):
+            matched += 1
+    return matched, len(expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=Path, required=True)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-ocr", action="store_true")
+    args = parser.parse_args()
+
+    cards = load_cards(args.cards)
+    if not cards:
+        raise SystemExit(f"No card images found in {args.cards}")
+
+    reader = None
+    if not args.no_ocr:
+        try:
+            import easyocr
+            reader = easyocr.Reader(["en", "kn"], gpu=False)
+        except ImportError:
+            print("EasyOCR not installed - measuring preprocessing only\n")
+
+    from services.analysis_service import AnalysisService
+    analysis = AnalysisService()
+    if reader is not None:
+        from services.ocr_service import OCRService
+
+    print(f"{len(cards)} cards, {args.repeat} repeats\n")
+    print(f"{'config':28s} {'prep ms':>9s} {'ocr ms':>9s} {'megapixels':>11s} {'accuracy':>9s}")
+
+    for name, options in CONFIGS.items():
+        pre = ImagePreprocessor(**options) if options is not None else None
+        prep_times, ocr_times, pixels = [], [], []
+        matched = total = 0
+
+        for _, image_bytes, expected in cards:
+            for i in range(args.repeat):
+                start = time.perf_counter()
+                image, scale = pre.process(image_bytes) if pre else legacy_decode(image_bytes)
+                prep_times.append((time.perf_counter() - start) * 1000)
+                if i == 0:
+                    pixels.append(image.shape[0] * image.shape[1] / 1e6)
+
+                if reader is None:
+                    continue
+                start = time.perf_counter()
+                result = reader.readtext(image, paragraph=False)
+                ocr_times.append((time.perf_counter() - start) * 1000)
+
+                if i == 0 and expected:
+                    if scale != 1.0:
+                        result = [([[x / scale, y / scale] for x, y in box], text, conf) for box, text, conf in result]
+                    text = OCRService.apply_corrections("\n".join(OCRService.group_rows(result)))
+                    soil_data, _, _ = analysis.analyze_soil_card(text)
+                    m, t = field_accuracy(soil_data, expected)
+                    matched += m
+                    total += t
+
+        ocr_ms = f"{statistics.median(ocr_times):9.1f}" if ocr_times else f"{'-':>9s}"
+        accuracy = f"{matched / total:9.1%}" if total else f"{'-':>9s}"
+        print(f"{name:28s} {statistics.median(prep_times):9.1f} {ocr_ms} {statistics.mean(pixels):11.2f} {accuracy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Rule-based recommendations per second: per-call construction vs templates.
+
+Usage (from backend/):
+    python -m benchmarks.bench_recommendations [--cards 2000] [--repeat 5]
+
+Every card has all 12 nutrients deficient (red), each at a random value
+below its target, plus an acidic pH - the most expensive card for
+``RecommendationService._customize_recommendations``.
+
+"per-call (old)" is the previous structure rebuilt on the same texts: the
+nutrient name is mapped with a linear scan, and every deficient nutrient
+builds the whole map of validated ``Recommendation`` objects (one per
+parameter) before picking its own. "templates (current)" is what the
+service does now. Both are first checked to give identical recommendations.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from models import NutrientStatus, Recommendation, SoilData
+from services.analysis_service import AnalysisService
+from services.recommendation_service import RecommendationService
+from services.recommendation_templates import Either, PH_TEMPLATES
+
+RED = "#EF4444"
+
+NUTRIENT_MAP = {param.replace("_", " ").title(): param for param in AnalysisService.PARAM_ORDER}
+
+
+def eager_fields(template, context: dict) -> dict:
+    """Every field formatted on the spot, as the old f-strings did."""
+    fields = {}
+    for name, pattern in template.fields.items():
+        if isinstance(pattern, Either):
+            pattern = pattern.when_set if context.get(pattern.key) else pattern.otherwise
+        fields[name] = pattern.format_map(context)
+    return fields
+
+
+def legacy_customize(service: RecommendationService, soil_data: SoilData, nutrient_status):
+    recommendations = []
+    for nutrient in nutrient_status:
+        param = None
+        for key, val in NUTRIENT_MAP.items():
+            if key.lower() == nutrient.nutrient.lower():
+                param = val
+                break
+        if param is None or nutrient.color != RED:
+            continue
+        value = getattr(soil_data, param)
+        targets = {p: service.thresholds.target(p) for p in service.thresholds.params}
+        target = targets.get(param)
+        fertilizer_name = amount = method = timing = None
+        if target and value < target:
+            fertilizer_name, amount, method, timing = service._calculate_fertilizer_amount(param, value, target)
+        recommendations_map = {}
+        for name, template in service.deficiency_templates.items():
+            if fertilizer_name and amount and name in service.calculated_templates:
+                template = service.calculated_templates[name]
+            # The old f-strings used each entry's own target with this value
+            context = dict(
+                value=value, deficiency=None if targets.get(name) is None else targets[name] - value,
+                fertilizer_name=fertilizer_name, amount=amount, method=method, timing=timing,
+            )
+            recommendations_map[name] = Recommendation(**eager_fields(template, context))
+        rec = recommendations_map.get(param)
+        if rec:
+            recommendations.append(rec)
+    if soil_data.ph < service.thresholds.get("ph", "lime_below"):
+        recommendations.append(Recommendation(**eager_fields(PH_TEMPLATES["acidic"], {"ph": soil_data.ph})))
+    return recommendations
+
+
+def deficient_cards(count: int, service: RecommendationService, seed: int = 11):
+    rng = random.Random(seed)
+    analysis = AnalysisService()
+    cards = []
+    for _ in range(count):
+        values = {}
+        for param in analysis.PARAM_ORDER:
+            target = service.thresholds.target(param) or 1.0
+            values[param] = round(rng.uniform(0.05, 0.95) * target, 2)
+        values["ph"] = round(rng.uniform(4.0, 5.4), 1)
+        soil_data = SoilData(**values)
+        nutrient_status = [
+            NutrientStatus(
+                nutrient=param.replace("_", " ").title(),
+                nutrient_kn=analysis.NUTRIENT_KN[param],
+                value=values[param],
+                unit=analysis.UNITS[param],
+                status="Low",
+                status_kn="ಕಡಿಮೆ",
+                color=RED,
+            )
+            for param in analysis.PARAM_ORDER
+        ]
+        cards.append((soil_data, nutrient_status))
+    return cards
+
+
+def cards_per_second(fn, cards, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for soil_data, nutrient_status in cards:
+            fn(soil_data, nutrient_status)
+        runs.append(time.perf_counter() - start)
+    return len(cards) / statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    service = RecommendationService()
+    cards = deficient_cards(args.cards, service)
+    variants = {
+        "per-call (old)": lambda soil, status: legacy_customize(service, soil, status),
+        "templates (current)": lambda soil, status: service._customize_recommendations([], soil, status),
+    }
+
+    recs_per_card = None
+    for soil_data, nutrient_status in cards:
+        want = [rec.model_dump() for rec in legacy_customize(service, soil_data, nutrient_status)]
+        got = [rec.model_dump() for rec in service._customize_recommendations([], soil_data, nutrient_status)]
+        if got != want:
+            raise SystemExit(f"templates differ from per-call construction for {soil_data}")
+        recs_per_card = len(got)
+    print(f"{len(cards)} cards, {recs_per_card} recommendations each, both variants agree\n")
+
+    print(f"{'variant':22s} {'cards/s':>9s} {'recs/s':>10s} {'speed-up':>9s}")
+    baseline = None
+    for name, fn in variants.items():
+        rate = cards_per_second(fn, cards, args.repeat)
+        baseline = baseline or rate
+        print(f"{name:22s} {rate:9.0f} {rate * recs_per_card:10.0f} {rate / baseline:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Response serialization: FastAPI's default path vs FastJSONResponse.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization [--requests 2000] [--repeat 5]
+
+Two prebuilt payloads are served by a minimal FastAPI app and called
+straight through ASGI, so the figures cover only routing and
+serialization:
+
+- analysis: an AnalysisResponse for a full card (OCR text + 12 nutrients)
+- recommendation: a RecommendationResponse with the rule-based
+  recommendations for a deficient card (long bilingual strings)
+
+Variants, all through the same app:
+
+- jsonable_encoder: JSONResponse(jsonable_encoder(model)) - FastAPI's
+  encoder, used for routes without a response_model (and by older FastAPI
+  versions for every route)
+- response_model: the model is returned and FastAPI validates and
+  serializes it against response_model
+- fast: FastJSONResponse(model), no compression
+- fast+gzip / fast+br: the same with Accept-Encoding set
+
+Every body is first checked to decode to the same JSON. Rounds of the
+variants are interleaved and the median per variant is reported.
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import statistics
+import time
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from models import AnalysisResponse, RecommendationResponse
+from services.analysis_service import AnalysisService
+from services.fast_json import FastJSONResponse, dumps, supported_encodings
+from services.recommendation_service import RecommendationService
+
+CARD_TEXT = """ಮಣ್ಣು ಆರೋಗ್ಯ ಚೀಟಿ - ಗಾಂಧಿ ಕೃಷಿ ವಿಜ್ಞಾನ ಕೇಂದ್ರ
+1 ರಸಸಾರ (pH) 5.2 ಆಮ್ಲೀಯ
+2 ವಿದ್ಯುತ್ ವಾಹಕತೆ (EC) 0.3 ಲವಣ ರಹಿತ
+3 ಸಾವಯವ ಇಂಗಾಲ (OC) 0.42 ಕಡಿಮೆ
+4 ಲಭ್ಯ ಸಾರಜನಕ (N) 180 ಕಡಿಮೆ
+5 ಲಭ್ಯ ರಂಜಕ (P2O5) 22 ಕಡಿಮೆ
+6 ಲಭ್ಯ ಪೊಟ್ಯಾಶ್ (K2O) 140 ಕಡಿಮೆ
+7 ಲಭ್ಯ ಗಂಧಕ (S) 8 ಕಡಿಮೆ
+8 ಲಭ್ಯ ಸತು (Zn) 0.3 ಕಡಿಮೆ
+9 ಲಭ್ಯ ಬೋರಾನ್ (B) 0.2 ಕಡಿಮೆ
+10 ಲಭ್ಯ ಕಬ್ಬಿಣ (Fe) 2.1 ಕಡಿಮೆ
+11 ಲಭ್ಯ ಮ್ಯಾಂಗನೀಸ್ (Mn) 0.5 ಕಡಿಮೆ
+12 ಲಭ್ಯ ತಾಮ್ರ (Cu) 0.1 ಕಡಿಮೆ"""
+
+
+def build_payloads():
+    analysis = AnalysisService()
+    soil_data, raw_values, status_info = analysis.analyze_soil_card(CARD_TEXT)
+    nutrient_status = analysis.get_nutrient_status(soil_data, raw_values, status_info)
+    analysis_response = AnalysisResponse(
+        success=True,
+        image_id="00000000-0000-0000-0000-000000000000",
+        extracted_text=CARD_TEXT,
+        soil_data=soil_data,
+        nutrient_status=nutrient_status,
+        message="Analysis completed",
+        message_kn="ವಿಶ್ಲೇಷಣೆ ಪೂರ್ಣಗೊಂಡಿದೆ",
+    )
+    for status in nutrient_status:
+        status.color = "#EF4444"
+    recommendations = RecommendationService().get_rule_based_recommendations("rice", soil_data, nutrient_status)
+    recommendation_response = RecommendationResponse(
+        success=True, crop_id="rice", recommendations=recommendations, source="rules"
+    )
+    return {"analysis": (AnalysisResponse, analysis_response), "recommendation": (RecommendationResponse, recommendation_response)}
+
+
+def endpoints(payload):
+    async def encoder():
+        return JSONResponse(jsonable_encoder(payload))
+
+    async def default():
+        return payload
+
+    async def fast():
+        return FastJSONResponse(payload)
+
+    return encoder, default, fast
+
+
+def build_app(payloads) -> FastAPI:
+    app = FastAPI()
+    for name, (model, payload) in payloads.items():
+        encoder, default, fast = endpoints(payload)
+        app.add_api_route(f"/encoder/{name}", encoder)
+        app.add_api_route(f"/default/{name}", default, response_model=model)
+        app.add_api_route(f"/fast/{name}", fast, response_model=model)
+    return app
+
+
+def variants(name: str) -> dict:
+    """Variant -> (path, Accept-Encoding)."""
+    found = {
+        "jsonable_encoder": (f"/encoder/{name}", ""),
+        "response_model": (f"/default/{name}", ""),
+        "fast": (f"/fast/{name}", ""),
+    }
+    for encoding in reversed(supported_encodings()):
+        found[f"fast+{encoding}"] = (f"/fast/{name}", encoding)
+    return found
+
+
+async def call(app, path: str, accept_encoding: str = ""):
+    """(headers, body) of one GET straight through the ASGI app."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else [],
+        "client": ("127.0.0.1", 1), "server": ("testserver", 80),
+    }
+    headers, body = {}, []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            headers.update((k.decode(), v.decode()) for k, v in message["headers"])
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return headers, b"".join(body)
+
+
+def decode(headers: dict, body: bytes):
+    encoding = headers.get("content-encoding")
+    if encoding == "gzip":
+        body = gzip.decompress(body)
+    elif encoding == "br":
+        import brotli
+        body = brotli.decompress(body)
+    return json.loads(body)
+
+
+async def timed(app, path: str, accept_encoding: str, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        await call(app, path, accept_encoding)
+    return time.perf_counter() - start
+
+
+async def run(args):
+    payloads = build_payloads()
+    app = build_app(payloads)
+
+    print(f"{'payload':15s} {'variant':17s} {'wire bytes':>10s} {'req/s':>8s} {'vs encoder':>10s}")
+    for name in payloads:
+        cases = variants(name)
+        wire = {}
+        expected = json.loads(dumps(payloads[name][1]))
+        for variant, (path, accept_encoding) in cases.items():
+            headers, body = await call(app, path, accept_encoding)
+            if decode(headers, body) != expected:
+                raise SystemExit(f"{name}/{variant}: body differs from the model's JSON")
+            wire[variant] = len(body)
+
+        runs = {variant: [] for variant in cases}
+        for _ in range(args.repeat):
+            for variant, (path, accept_encoding) in cases.items():
+                runs[variant].append(await timed(app, path, accept_encoding, args.requests))
+        baseline = None
+        for variant, seconds in runs.items():
+            rate = args.requests / statistics.median(seconds)
+            baseline = baseline or rate
+            print(f"{name:15s} {variant:17s} {wire[variant]:10d} {rate:8.0f} {rate / baseline:9.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""Card corpus for the pipeline benchmark and load tests: images plus expected SoilData.
+
+Synthetic cards are generated from a seed, so a corpus is the same on every
+run and machine. Each card is a JPEG of the GKVK table layout (header rows,
+then parameter | unit | value | status for the 12 parameters), the
+``SoilData`` values it should parse to, and the detections an OCR pass
+would return for it - Kannada labels and status words included, which the
+rendered image can't carry without a Kannada font.
+
+Some cards get OCR noise seen on real cards (``NOISE_KINDS``): value
+misreads that OCR_CORRECTIONS should repair, label misreads, a value cell
+that wasn't detected, or a value a few pixels off its row. The expected
+fields are always what is printed on the card, so accuracy below 100% is
+the pipeline's, not the corpus's.
+
+``ReplayReader`` stands in for the EasyOCR reader and answers ``readtext``
+with a card's stored detections, so decode, row grouping, parsing and
+everything after it run for real without the OCR models. Real anonymized
+cards can be used from a directory (``load_corpus``): ``<name>.jpg`` plus
+``<name>.json`` with the expected fields (the bench_preprocess format) and,
+for replay, ``<name>.detections.json``.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+import config
+from services import ocr_service
+from services.analysis_service import AnalysisService
+from services.thresholds import get_threshold_table
+
+# (unit, low, high, decimals) of generated values; the ranges cross the
+# rating bands in data/nutrient_thresholds.json
+VALUE_RANGES = {
+    "ph": ("", 4.5, 9.0, 1),
+    "ec": ("dS/m", 0.05, 2.5, 2),
+    "organic_carbon": ("%", 0.2, 1.2, 2),
+    "nitrogen": ("kg/ha", 90, 450, 0),
+    "phosphorus": ("kg/ha", 8, 90, 0),
+    "potassium": ("kg/ha", 80, 450, 0),
+    "sulphur": ("ppm", 3, 30, 1),
+    "zinc": ("ppm", 0.2, 2.0, 2),
+    "boron": ("ppm", 0.1, 1.0, 2),
+    "iron": ("ppm", 1.5, 10, 1),
+    "manganese": ("ppm", 0.5, 8, 1),
+    "copper": ("ppm", 0.1, 1.5, 2),
+}
+
+# English labels drawn on the image (see services/card_template.ROW_LABELS)
+IMAGE_LABELS = {
+    "ph": "pH", "ec": "EC", "organic_carbon": "Organic Carbon (OC)", "nitrogen": "Nitrogen (N)",
+    "phosphorus": "Phosphorus (P2O5)", "potassium": "Potassium (K2O)", "sulphur": "Sulphur (S)",
+    "zinc": "Zinc (Zn)", "boron": "Boron (B)", "iron": "Iron (Fe)", "manganese": "Manganese (Mn)",
+    "copper": "Copper (Cu)",
+}
+
+HEADER_ROWS = [
+    "ಮಣ್ಣು ಆರೋಗ್ಯ ಚೀಟಿ",
+    "Soil Health Card",
+    "ಕೃಷಿ ವಿಶ್ವವಿದ್ಯಾನಿಲಯ, ಜಿಕೆವಿಕೆ, ಬೆಂಗಳೂರು",
+]
+TABLE_HEADER = ["ನಿಯತಾಂಕ", "ಘಟಕ", "ಫಲಿತಾಂಶ", "ಸ್ಥಿತಿ"]
+
+# Printed values and the misreads OCR_CORRECTIONS maps back to them
+VALUE_MISREADS = {"0.5-1.0": "05-1.0", ">0.6": "5y0.6", ">0.2": "?0.2", ">1.0": ">1:0", ">4.5": "?4.5"}
+LABEL_MISREADS = {"(P2O5)": "(P205)", "(K2O)": "(K20)", "(Zn)": "(ZR)"}
+NOISE_KINDS = ("value_misread", "label_misread", "missing_value", "row_jitter")
+
+
+def _key(image: np.ndarray) -> str:
+    """Identity of a decoded/preprocessed image, cheap enough to compute per call."""
+    sample = np.ascontiguousarray(image[::16, ::16])
+    return hashlib.blake2b(str(image.shape).encode() + sample.tobytes(), digest_size=16).hexdigest()
+
+
+def _printed_value(rng: random.Random, param: str) -> str:
+    unit, low, high, decimals = VALUE_RANGES[param]
+    shape = rng.random()
+    if param == "ph" and shape < 0.1:
+        start = round(rng.uniform(low, high - 0.5), 1)
+        return f"{start:.1f}-{start + 0.5:.1f}"
+    if param in ("zinc", "boron", "copper") and shape < 0.15:
+        return rng.choice([">0.6", ">0.2", ">1.0", "0.5-1.0"])
+    if param == "ph" and shape < 0.12:
+        return ">4.5"
+    value = rng.uniform(low, high)
+    return f"{value:.{decimals}f}" if decimals else str(int(round(value)))
+
+
+class Card:
+    """One corpus card: image bytes, expected fields and replay detections."""
+
+    def __init__(self, name: str, image: bytes, expected: Dict[str, Optional[float]], detections: Optional[list] = None, noise: str = ""):
+        self.name = name
+        self.image = image
+        self.expected = expected
+        self.detections = detections
+        self.noise = noise
+
+    def expected_status(self, param: str) -> Optional[str]:
+        """Kannada rating the card should show for ``param``."""
+        value = self.expected.get(param)
+        return get_threshold_table().classify(param, value)[0] if value is not None else None
+
+
+def make_card(index: int, seed: int = 2024, width: int = 2000, noise_rate: float = 0.3) -> Card:
+    """Render synthetic card ``index`` of the corpus for ``seed``."""
+    rng = random.Random(f"{seed}-{index}")
+    analysis = AnalysisService()
+    table = get_threshold_table()
+    height = int(width * 1.414)
+    noise = rng.choice(NOISE_KINDS) if rng.random() < noise_rate else ""
+
+    image = np.full((height, width, 3), 248, dtype=np.uint8)
+    detections = []
+    expected = {}
+    margin = width // 16
+    columns = [margin, int(width * 0.45), int(width * 0.6), int(width * 0.77), width - margin]
+    top = int(height * 0.2)
+    row_height = int(height * 0.045)
+    font_scale = width / 1400
+    thickness = max(1, width // 800)
+
+    def put(text_on_image: str, detected_text: str, x: int, y: int, y_offset: int = 0):
+        """Draw text with its baseline at y and add the matching detection."""
+        (w, h), _ = cv2.getTextSize(text_on_image, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+        cv2.putText(image, text_on_image, (x, y), cv2.FONT_HERSHEY_SIMPLEX, font_scale, (20, 20, 20), thickness, cv2.LINE_AA)
+        if detected_text:
+            y0, y1 = y - h + y_offset, y + y_offset + 4
+            box = [[x, y0], [x + w, y0], [x + w, y1], [x, y1]]
+            detections.append((box, detected_text, round(rng.uniform(0.55, 0.99), 3)))
+
+    header = HEADER_ROWS + [f"ರೈತರ ಹೆಸರು: ರೈತ {index:04d}", f"ಮಾದರಿ ಸಂಖ್ಯೆ 2024-{index:04d}"]
+    drawn = ["GKVK", "Soil Health Card", "UAS Bangalore", f"Farmer {index:04d}", f"Sample 2024-{index:04d}"]
+    for i, (text, text_on_image) in enumerate(zip(header, drawn)):
+        put(text_on_image, text, margin, int(height * 0.04) + i * row_height)
+
+    jitter_row = rng.randrange(12) if noise == "row_jitter" else None
+    misread_row = rng.randrange(12)
+    if noise == "label_misread":
+        misread_row = analysis.PARAM_ORDER.index(rng.choice(["phosphorus", "potassium", "zinc"]))
+    for row, param in enumerate([None] + analysis.PARAM_ORDER):
+        y_top = top + row * row_height
+        cv2.line(image, (columns[0], y_top), (columns[-1], y_top), (40, 40, 40), thickness + 1)
+        baseline = y_top + int(row_height * 0.7)
+        if param is None:
+            for column, text in enumerate(TABLE_HEADER):
+                put(["Parameter", "Unit", "Value", "Status"][column], text, columns[column] + 10, baseline)
+            continue
+
+        unit = VALUE_RANGES[param][0]
+        printed = _printed_value(rng, param)
+        expected[param] = round(analysis._parse_value(printed), 2)
+        status_kn, _, status_en = table.classify(param, expected[param])
+
+        label = analysis.NUTRIENT_KN[param]
+        value_text = printed
+        offset = 0
+        if row - 1 == misread_row and noise == "label_misread":
+            for right, wrong in LABEL_MISREADS.items():
+                label = label.replace(right, wrong)
+        if noise == "value_misread" and printed in VALUE_MISREADS:
+            value_text = VALUE_MISREADS[printed]
+        if row - 1 == misread_row and noise == "missing_value":
+            value_text = ""
+        if row - 1 == jitter_row:
+            # Close to the 20 px row grouping tolerance in OCRService.group_rows
+            offset = rng.choice([-1, 1]) * int(row_height * 0.12)
+
+        put(IMAGE_LABELS[param], label, columns[0] + 10, baseline)
+        put(unit, unit, columns[1] + 10, baseline)
+        put(printed, value_text, columns[2] + 10, baseline, offset)
+        put(status_en, status_kn, columns[3] + 10, baseline)
+
+    y_bottom = top + 13 * row_height
+    cv2.line(image, (columns[0], y_bottom), (columns[-1], y_bottom), (40, 40, 40), thickness + 1)
+    for x in columns:
+        cv2.line(image, (x, top), (x, y_bottom), (40, 40, 40), thickness + 1)
+
+    # Paper texture and a slightly soft focus, so the JPEG (and its decode
+    # cost) is closer to a phone photo than a flat white page
+    grain = np.random.default_rng(rng.randrange(2**32)).normal(0, 6, image.shape)
+    image = cv2.GaussianBlur(np.clip(image + grain, 0, 255).astype(np.uint8), (3, 3), 0)
+    ok, encoded = cv2.imencode(".jpg", cv2.cvtColor(image, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 88])
+    if not ok:
+        raise RuntimeError("JPEG encoding failed")
+    return Card(f"synthetic-{index:04d}", encoded.tobytes(), expected, detections, noise)
+
+
+def synthetic_corpus(count: int, seed: int = 2024, width: int = 2000, noise_rate: float = 0.3) -> List[Card]:
+    return [make_card(i, seed, width, noise_rate) for i in range(count)]
+
+
+def write_corpus(cards: List[Card], directory: Path) -> None:
+    """Save cards as <name>.jpg, <name>.json (expected) and <name>.detections.json."""
+    directory.mkdir(parents=True, exist_ok=True)
+    for card in cards:
+        (directory / f"{card.name}.jpg").write_bytes(card.image)
+        (directory / f"{card.name}.json").write_text(json.dumps(card.expected, indent=1), encoding="utf-8")
+        if card.detections is not None:
+            (directory / f"{card.name}.detections.json").write_text(
+                json.dumps({"noise": card.noise, "detections": card.detections}, ensure_ascii=False), encoding="utf-8"
+            )
+
+
+def load_corpus(directory: Path) -> List[Card]:
+    """Cards from a directory of images with sibling expected/detections files."""
+    cards = []
+    for path in sorted(directory.iterdir()):
+        if path.suffix.lower() not in (".jpg", ".jpeg", ".png"):
+            continue
+        expected_path = path.with_suffix(".json")
+        detections_path = path.with_name(f"{path.stem}.detections.json")
+        expected = json.loads(expected_path.read_text(encoding="utf-8")) if expected_path.exists() else {}
+        detections, noise = None, ""
+        if detections_path.exists():
+            stored = json.loads(detections_path.read_text(encoding="utf-8"))
+            # (box, text, confidence) tuples, as EasyOCR returns them
+            detections = [tuple(detection) for detection in stored["detections"]]
+            noise = stored.get("noise", "")
+        cards.append(Card(path.stem, path.read_bytes(), expected, detections, noise))
+    return cards
+
+
+class ReplayReader:
+    """EasyOCR stand-in returning each card's stored detections.
+
+    Images are recognised by the array ``readtext`` receives, so the cards
+    are run through the same decode/preprocess step as the OCR service when
+    the reader is built. ``latency`` seconds are slept per call (releasing
+    the GIL, as EasyOCR's torch kernels mostly do) to model recognition
+    time in load tests. Unknown images get no detections.
+    """
+
+    def __init__(self, cards: List[Card], prepare, latency: float = 0.0):
+        """``prepare(image_bytes) -> (array, scale)`` is the OCR service's decode step."""
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._detections = {}
+        for card in cards:
+            if card.detections is None:
+                continue
+            image, scale = prepare(card.image)
+            # readtext results are in processed-image coordinates
+            self._detections[_key(image)] = [
+                ([[x * scale, y * scale] for x, y in box], text, confidence)
+                for box, text, confidence in card.detections
+            ]
+
+    def readtext(self, image, **kwargs) -> list:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if not isinstance(image, np.ndarray):
+            return []
+        return list(self._detections.get(_key(image), []))
+
+
+def install_replay_reader(cards: List[Card], latency: float = 0.0) -> ReplayReader:
+    """Make the OCR service recognise ``cards`` through a ReplayReader.
+
+    Raises:
+        RuntimeError: the OCR settings need the real reader - template mode
+            calls ``recognize``, and process-pool or farm workers would not
+            see the replacement
+    """
+    if config.OCR_MODE != "full" or config.OCR_POOL_KIND != "thread" or config.OCR_FARM_WORKERS > 0:
+        raise RuntimeError("Replayed OCR needs OCR_MODE=full, OCR_POOL_KIND=thread and OCR_FARM_WORKERS=0")
+    if ocr_service.preprocessor is not None:
+        prepare = ocr_service.preprocessor.process
+    else:
+        def prepare(image_bytes):
+            return ocr_service.decode_image(image_bytes), 1.0
+    ocr_service.reader = ReplayReader(cards, prepare, latency)
+    return ocr_service.reader
@@ -0,0 +1,217 @@
+"""Local stand-in for the Gooey AI video-bots API.
+
+Answers ``POST /video-bots`` with a fixed FarmerCHAT-style response, and
+``POST /video-bots/stream`` with the same answer as server-sent events of
+small text deltas, so the Gooey AI client can be exercised offline. It
+counts TCP connections and peak concurrent requests, which is what the
+connection-pooling tests look at. For load tests it can add random extra
+latency (``--jitter``) and fail a share of requests (``--error-rate``).
+
+Usage (from backend/):
+    python -m benchmarks.gooey_stub [--port 8765] [--delay 0.5] [--jitter 0.5] [--error-rate 0.05]
+
+then run the API with GOOEY_AI_BASE_URL=http://127.0.0.1:8765 and any
+non-empty GOOEY_AI_API_KEY.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_RECOMMENDATIONS = {
+    "recommendations": [
+        {
+            "title": "Apply Zinc Sulphate",
+            "title_kn": "ಜಿಂಕ್ ಸಲ್ಫೇಟ್ ಹಾಕಿ",
+            "description": "Soil zinc is low; apply as basal dose before sowing.",
+            "description_kn": "ಮಣ್ಣಿನಲ್ಲಿ ಸತು ಕಡಿಮೆ ಇದೆ; ಬಿತ್ತನೆಗೆ ಮೊದಲು ಮೂಲ ಗೊಬ್ಬರವಾಗಿ ಹಾಕಿ.",
+            "fertilizer": "Zinc Sulphate",
+            "fertilizer_kn": "ಜಿಂಕ್ ಸಲ್ಫೇಟ್",
+            "dosage": "25 kg/ha",
+            "dosage_kn": "25 ಕೆಜಿ/ಹೆಕ್ಟೇರ್",
+        },
+        {
+            "title": "Split Nitrogen",
+            "title_kn": "ಸಾರಜನಕ ವಿಭಜನೆ",
+            "description": "Apply urea in two splits: at sowing and 30 DAS.",
+            "description_kn": "ಯೂರಿಯಾವನ್ನು ಎರಡು ಭಾಗಗಳಲ್ಲಿ ಹಾಕಿ: ಬಿತ್ತನೆ ಮತ್ತು 30 ದಿನಗಳ ನಂತರ.",
+            "fertilizer": "Urea",
+            "fertilizer_kn": "ಯೂರಿಯಾ",
+            "dosage": "100 kg/ha",
+            "dosage_kn": "100 ಕೆಜಿ/ಹೆಕ್ಟೇರ್",
+        },
+    ]
+}
+
+
+class GooeyStubServer(ThreadingHTTPServer):
+    """Threaded stub server with connection and concurrency counters."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        delay: float = 0.0,
+        fail_next: int = 0,
+        fail_status: int = 503,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = None,
+    ):
+        super().__init__(address, _StubHandler)
+        self.delay = delay
+        # Up to ``jitter`` extra seconds per answer, uniformly drawn
+        self.jitter = jitter
+        # The next ``fail_next`` requests, and then an ``error_rate`` share of
+        # all requests, get ``fail_status`` with Retry-After: 0
+        self.fail_next = fail_next
+        self.fail_status = fail_status
+        self.error_rate = error_rate
+        self.failed = 0
+        self._random = random.Random(seed)
+        self.connections = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so pooled clients can reuse the connection
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", "0"))
+        self.rfile.read(length)
+        if self.path.split("?")[0] not in ("/video-bots", "/video-bots/stream"):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        with server._lock:
+            server.requests += 1
+            fail = server.fail_next > 0
+            if fail:
+                server.fail_next -= 1
+            elif server.error_rate:
+                fail = server._random.random() < server.error_rate
+            if fail:
+                server.failed += 1
+            delay = server.delay + (server._random.uniform(0, server.jitter) if server.jitter else 0.0)
+        if fail:
+            self.send_response(server.fail_status)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        with server._lock:
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        try:
+            if self.path.startswith("/video-bots/stream"):
+                self._stream_answer(delay)
+                return
+            if delay:
+                time.sleep(delay)
+            body = json.dumps(
+                {"output": {"output_text": [json.dumps(STUB_RECOMMENDATIONS, ensure_ascii=False)]}},
+                ensure_ascii=False,
+            ).encode("utf-8")
+        finally:
+            with server._lock:
+                server.in_flight -= 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_answer(self, delay: float, chunk_chars: int = 40):
+        """Send the answer as SSE deltas over a chunked response, spread over ``delay``."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        text = "Here are the recommendations:\n" + json.dumps(STUB_RECOMMENDATIONS, ensure_ascii=False, indent=2)
+        pause = delay / max(1, len(text) // chunk_chars)
+        for start in range(0, len(text), chunk_chars):
+            event = json.dumps({"output_text": text[start:start + chunk_chars]}, ensure_ascii=False)
+            self._write_chunk(f"data: {event}\n\n".encode("utf-8"))
+            if pause:
+                time.sleep(pause)
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(
+    port: int = 0,
+    delay: float = 0.0,
+    fail_next: int = 0,
+    fail_status: int = 503,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    seed: int = None,
+) -> GooeyStubServer:
+    """Start the stub on a background thread (port 0 picks a free port)."""
+    server = GooeyStubServer(
+        ("127.0.0.1", port),
+        delay=delay,
+        fail_next=fail_next,
+        fail_status=fail_status,
+        jitter=jitter,
+        error_rate=error_rate,
+        seed=seed,
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many extra seconds per answer")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with --fail-status")
+    parser.add_argument("--fail-status", type=int, default=503)
+    args = parser.parse_args()
+
+    server = GooeyStubServer(
+        ("127.0.0.1", args.port),
+        delay=args.delay,
+        fail_status=args.fail_status,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+    )
+    print(f"Gooey AI stub listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"{server.requests} requests ({server.failed} failed) over {server.connections} connections")
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
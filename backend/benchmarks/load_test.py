@@ -0,0 +1,561 @@
+"""Load-test scenarios against the API, for sizing OCR workers and pools.
+
+Usage (from backend/):
+    python -m benchmarks.load_test [--mode closed|open] [--levels 1,2,4,8] [--duration 20]
+        [--mix analyze=2,recommend=2,crops=1] [--images clean=3,noisy=1,small=1,large=1]
+        [--replay-ms 400] [--gooey-delay 2] [--gooey-jitter 1] [--gooey-error-rate 0.05]
+        [--uvicorn-workers 2 | --url http://127.0.0.1:8000] [--json results.json]
+
+A scenario is a series of steps at rising load. In closed mode each level is
+a number of users sending requests back to back; in open mode it is an
+arrival rate (requests/s, Poisson) that keeps coming however slow the
+answers get, which is what shows queues building up. Every request picks an
+endpoint by ``--mix``:
+
+- analyze: POST /analyze-direct with a synthetic card picked by ``--images``
+  from clean, noisy (misreads, missing values), small (1200 px wide) and
+  large (3600 px wide) cards
+- recommend: GET /recommendation/{crop_id} for a random crop and a card
+  analyzed earlier in the run
+- crops: GET /crops
+
+Targets: by default the app runs in this process (ASGI transport, sharing
+the event loop with the load generator). ``--uvicorn-workers N`` starts a
+local uvicorn with N worker processes on the same app; both replay
+recognition (card_corpus.ReplayReader) with ``--replay-ms`` per readtext
+call standing in for EasyOCR, and send Gooey AI calls to the local stub
+with the ``--gooey-*`` latency and errors. ``--url`` targets a server you
+started yourself; run it with GOOEY_AI_BASE_URL set to the stub URL printed
+at start. App settings (OCR_POOL_WORKERS, OCR_POOL_MAX_QUEUE,
+GOOEY_AI_MAX_CONCURRENCY, ...) come from the environment as usual, so
+sizing is one run per candidate setting. The OCR and recommendation caches
+are off unless set, since every farmer's card is different.
+
+Before the steps each endpoint is called alone ``--calibrate`` times for
+its unloaded latency. Per step the report gives goodput (2xx answers/s),
+latency percentiles per endpoint, queueing delay (p50 above the unloaded
+p50), the OCR pool queue depth sampled from /metrics (one worker's view
+under uvicorn), recommendation sources and error rates by status - 503 is
+a full OCR pool, 504 an OCR timeout. The saturation throughput is the best
+goodput of a step within ``--max-error-rate`` that, in open mode, also kept
+up with the offered rate.
+"""
+
+import os
+
+# Before the app's config is imported, as in bench_pipeline
+for _key, _value in {
+    "OCR_CACHE_MAX_BYTES": "0",
+    "REC_CACHE_MAX_ENTRIES": "0",
+    "GOOEY_AI_API_KEY": "benchmark",
+    "LOG_CONSOLE": "false",
+    "LOG_FILE": "",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+import config
+from benchmarks.bench_pipeline import git_commit, summarize, wait_for_ocr
+from benchmarks.card_corpus import install_replay_reader, make_card
+from benchmarks.gooey_stub import start_stub
+from services.recommendation_service import RecommendationService
+
+ENDPOINTS = ("analyze", "recommend", "crops")
+
+# make_card arguments of each image kind
+IMAGE_KINDS = {
+    "clean": {"noise_rate": 0.0},
+    "noisy": {"noise_rate": 1.0},
+    "small": {"width": 1200},
+    "large": {"width": 3600},
+}
+
+# Environment variable carrying the corpus settings to uvicorn workers
+CORPUS_ENV = "LOAD_TEST_CORPUS"
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def parse_weights(text: str, choices) -> dict:
+    """``"analyze=2,crops=1"`` -> {"analyze": 2.0, "crops": 1.0}."""
+    weights = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in choices:
+            raise ValueError(f"unknown {name!r}, expected one of {', '.join(choices)}")
+        weights[name] = float(weight) if weight else 1.0
+    if not any(weight > 0 for weight in weights.values()):
+        raise ValueError(f"no positive weight in {text!r}")
+    return weights
+
+
+def build_corpus(kinds, cards_per_kind: int, seed: int) -> dict:
+    """Synthetic cards of each image kind, named ``<kind>-card-NNNN``."""
+    corpus = {}
+    for offset, kind in enumerate(kinds):
+        cards = []
+        for index in range(cards_per_kind):
+            card = make_card(index, seed=seed * 10 + offset, **IMAGE_KINDS[kind])
+            card.name = f"{kind}-{card.name}"
+            cards.append(card)
+        corpus[kind] = cards
+    return corpus
+
+
+def replay_app():
+    """uvicorn factory for --uvicorn-workers: main.app with replayed OCR."""
+    settings = json.loads(os.environ[CORPUS_ENV])
+    corpus = build_corpus(settings["kinds"], settings["cards_per_kind"], settings["seed"])
+    install_replay_reader([card for cards in corpus.values() for card in cards], settings["replay_ms"] / 1000)
+
+    import main
+    return main.app
+
+
+class Scenario:
+    """What to send: endpoint and image mixes, plus cards analyzed so far."""
+
+    def __init__(self, mix: dict, images: dict, corpus: dict, seed: int):
+        self.mix = mix
+        self.images = images
+        self.corpus = corpus
+        self.crops = list(RecommendationService.CROPS)
+        self.random = random.Random(seed)
+        # Recent image_ids; older sessions may have been evicted by the server
+        self.image_ids = deque(maxlen=200)
+
+    def pick(self, weights: dict) -> str:
+        names = list(weights)
+        return self.random.choices(names, [weights[name] for name in names])[0]
+
+    async def send(self, client: httpx.AsyncClient, endpoint: str = None) -> dict:
+        """Send one request; the record has its endpoint, status, latency and source."""
+        endpoint = endpoint or self.pick(self.mix)
+        if endpoint == "recommend" and not self.image_ids:
+            endpoint = "analyze"
+        record = {"endpoint": endpoint, "status": None, "seconds": 0.0, "source": None}
+        start = time.perf_counter()
+        try:
+            if endpoint == "analyze":
+                card = self.random.choice(self.corpus[self.pick(self.images)])
+                response = await client.post(
+                    "/analyze-direct", files={"file": (f"{card.name}.jpg", card.image, "image/jpeg")}
+                )
+            elif endpoint == "recommend":
+                response = await client.get(
+                    f"/recommendation/{self.random.choice(self.crops)}",
+                    params={"image_id": self.random.choice(self.image_ids)},
+                )
+            else:
+                response = await client.get("/crops")
+        except httpx.TimeoutException:
+            record["status"] = "timeout"
+        except httpx.HTTPError as e:
+            record["status"] = type(e).__name__
+        else:
+            record["status"] = response.status_code
+            if response.status_code == 200:
+                if endpoint == "analyze":
+                    self.image_ids.append(response.json()["image_id"])
+                elif endpoint == "recommend":
+                    record["source"] = response.json().get("source")
+        record["seconds"] = time.perf_counter() - start
+        return record
+
+
+async def sample_ocr_queue(client: httpx.AsyncClient, samples: list, interval: float = 0.5) -> None:
+    """Append (queued, running) OCR pool jobs from /metrics until cancelled or unavailable."""
+    while True:
+        try:
+            response = await client.get("/metrics")
+        except httpx.HTTPError:
+            return
+        if response.status_code != 200:
+            return
+        values = {}
+        for line in response.text.splitlines():
+            name, _, value = line.partition(" ")
+            if name in ("soiltrack_ocr_pool_queued", "soiltrack_ocr_pool_running"):
+                values[name] = float(value)
+        samples.append((values.get("soiltrack_ocr_pool_queued", 0.0), values.get("soiltrack_ocr_pool_running", 0.0)))
+        await asyncio.sleep(interval)
+
+
+async def run_step(client: httpx.AsyncClient, scenario: Scenario, mode: str, level: float,
+                   duration: float, max_in_flight: int, drain: float) -> dict:
+    records = []
+    queue_samples = []
+    dropped = unfinished = 0
+    sampler = asyncio.create_task(sample_ocr_queue(client, queue_samples))
+    start = time.perf_counter()
+    end = start + duration
+
+    if mode == "closed":
+        async def user():
+            while time.perf_counter() < end:
+                records.append(await scenario.send(client))
+
+        await asyncio.gather(*(user() for _ in range(int(level))))
+    else:
+        async def one():
+            records.append(await scenario.send(client))
+
+        tasks = set()
+        arrival = start
+        while True:
+            arrival += scenario.random.expovariate(level)
+            if arrival >= end:
+                break
+            await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+            if len(tasks) >= max_in_flight:
+                dropped += 1
+                continue
+            task = asyncio.create_task(one())
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            _, pending = await asyncio.wait(set(tasks), timeout=drain)
+            unfinished = len(pending)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    await asyncio.gather(sampler, return_exceptions=True)
+    return {
+        "level": level,
+        "records": records,
+        "elapsed": elapsed,
+        "dropped": dropped,
+        "unfinished": unfinished,
+        "queue_samples": queue_samples,
+    }
+
+
+def step_report(step: dict, mode: str, baseline: dict) -> dict:
+    records = step["records"]
+    sent = len(records) + step["unfinished"]
+    ok = [record for record in records if record["status"] == 200]
+    errors = {}
+    for record in records:
+        if record["status"] != 200:
+            key = f"{record['endpoint']} {record['status']}"
+            errors[key] = errors.get(key, 0) + 1
+    if step["unfinished"]:
+        errors["unfinished"] = step["unfinished"]
+
+    endpoints, queue_delay = {}, {}
+    for endpoint in ENDPOINTS:
+        samples = [record["seconds"] for record in ok if record["endpoint"] == endpoint]
+        if not samples:
+            continue
+        endpoints[endpoint] = summarize(samples, step["elapsed"])
+        if endpoint in baseline:
+            queue_delay[endpoint] = round(max(0.0, endpoints[endpoint]["p50_ms"] - baseline[endpoint]["p50_ms"]), 3)
+
+    sources = {}
+    for record in ok:
+        if record["source"]:
+            sources[record["source"]] = sources.get(record["source"], 0) + 1
+    queued = [sample[0] for sample in step["queue_samples"]]
+    return {
+        "level": step["level"],
+        "offered_per_s": step["level"] if mode == "open" else None,
+        "sent": sent,
+        "elapsed_s": round(step["elapsed"], 3),
+        "goodput_per_s": round(len(ok) / step["elapsed"], 2),
+        "error_rate": round((sent - len(ok)) / sent, 4) if sent else 0.0,
+        "errors": errors,
+        "client_dropped": step["dropped"],
+        "endpoints": endpoints,
+        "queue_delay_p50_ms": queue_delay,
+        "ocr_queue": {
+            "mean": round(sum(queued) / len(queued), 2),
+            "max": max(queued),
+        } if queued else None,
+        "recommendation_sources": sources,
+    }
+
+
+def saturation(steps: list, max_error_rate: float) -> dict:
+    """Best goodput of a healthy step, and the first step that was not."""
+    healthy, degraded = [], None
+    for step in steps:
+        reasons = []
+        if step["error_rate"] > max_error_rate:
+            reasons.append(f"error rate {step['error_rate']:.1%}")
+        if step["offered_per_s"] and step["goodput_per_s"] < 0.9 * step["offered_per_s"]:
+            reasons.append(f"goodput {step['goodput_per_s']:.1f}/s of {step['offered_per_s']:g}/s offered")
+        if reasons:
+            degraded = degraded or {"level": step["level"], "reasons": reasons}
+        else:
+            healthy.append(step)
+    best = max(healthy, key=lambda step: step["goodput_per_s"], default=None)
+    return {
+        "throughput_per_s": best["goodput_per_s"] if best else None,
+        "at_level": best["level"] if best else None,
+        "first_degraded": degraded,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(workers: int, stub_url: str, corpus_settings: dict, ready_timeout: float = 300.0):
+    """Start uvicorn on the replay app; returns (process, base URL) once it answers ready."""
+    port = free_port()
+    env = dict(os.environ, GOOEY_AI_BASE_URL=stub_url, **{CORPUS_ENV: json.dumps(corpus_settings)})
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.load_test:replay_app", "--factory",
+         "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + ready_timeout
+    ready_answers = 0
+    # Each worker loads its own models; wait until readiness is steady
+    while ready_answers < 2 * workers:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with {process.returncode}")
+        if time.monotonic() > deadline:
+            stop_uvicorn(process)
+            raise RuntimeError("uvicorn did not get ready in time")
+        try:
+            ready = httpx.get(f"{url}/health/ready", timeout=5).status_code == 200
+        except httpx.HTTPError:
+            ready = False
+        ready_answers = ready_answers + 1 if ready else 0
+        time.sleep(0.2)
+    return process, url
+
+
+def stop_uvicorn(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, args) -> dict:
+    calibration = {}
+    for endpoint in ENDPOINTS:
+        records = [await scenario.send(client, endpoint) for _ in range(args.calibrate)]
+        ok = [record["seconds"] for record in records if record["status"] == 200]
+        if ok:
+            calibration[endpoint] = summarize(ok)
+        else:
+            print(f"warning: {endpoint} failed unloaded: {[record['status'] for record in records]}", file=sys.stderr)
+
+    steps = []
+    for level in args.levels:
+        step = await run_step(client, scenario, args.mode, level, args.duration, args.max_in_flight, args.drain)
+        steps.append(step_report(step, args.mode, calibration))
+        print_step(steps[-1], args.mode, flush=True)
+    return {"unloaded": calibration, "steps": steps, "saturation": saturation(steps, args.max_error_rate)}
+
+
+async def run_in_process(scenario: Scenario, stub_url: str, args) -> dict:
+    import main as app_main
+
+    app_main.recommendation_service.gooey_ai.base_url = stub_url
+    app = app_main.app
+    async with app.router.lifespan_context(app):
+        await wait_for_ocr(app_main)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=args.timeout) as client:
+            return await run_scenario(client, scenario, args)
+
+
+async def run_against(url: str, scenario: Scenario, args) -> dict:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        return await run_scenario(client, scenario, args)
+
+
+STEP_HEADER = (
+    f"{'level':>7s} {'sent':>6s} {'ok/s':>7s} {'err':>6s} "
+    f"{'analyze p50/p95 ms':>19s} {'rec p50/p95 ms':>17s} {'crops p95':>9s} {'queue ms':>9s} {'ocr q':>9s}"
+)
+
+
+def print_step(step: dict, mode: str, flush: bool = False) -> None:
+    def pair(endpoint):
+        summary = step["endpoints"].get(endpoint)
+        return f"{summary['p50_ms']:.0f}/{summary['p95_ms']:.0f}" if summary else "-"
+
+    level = f"{step['level']:g}{'/s' if mode == 'open' else 'u'}"
+    crops = step["endpoints"].get("crops")
+    crops = f"{crops['p95_ms']:.1f}" if crops else "-"
+    queue = step["queue_delay_p50_ms"].get("analyze")
+    queue = f"{queue:.0f}" if queue is not None else "-"
+    ocr = step["ocr_queue"]
+    ocr = f"{ocr['mean']:.1f}/{ocr['max']:.0f}" if ocr else "-"
+    print(
+        f"{level:>7s} {step['sent']:6d} {step['goodput_per_s']:7.1f} {step['error_rate']:6.1%} "
+        f"{pair('analyze'):>19s} {pair('recommend'):>17s} {crops:>9s} {queue:>9s} {ocr:>9s}",
+        flush=flush,
+    )
+
+
+def print_summary(results: dict) -> None:
+    unloaded = results["unloaded"]
+    if unloaded:
+        print("\nUnloaded p50: " + ", ".join(f"{endpoint} {summary['p50_ms']:.1f} ms" for endpoint, summary in unloaded.items()))
+    for step in results["steps"]:
+        details = []
+        if step["errors"]:
+            details.append(f"errors {step['errors']}")
+        if step["client_dropped"]:
+            details.append(f"{step['client_dropped']} arrivals dropped at --max-in-flight")
+        if step["recommendation_sources"]:
+            details.append(f"sources {step['recommendation_sources']}")
+        if details:
+            print(f"  level {step['level']:g}: " + "; ".join(details))
+
+    result = results["saturation"]
+    if result["throughput_per_s"] is None:
+        print("\nSaturation: no step stayed within the error and goodput limits")
+    else:
+        print(f"\nSaturation: {result['throughput_per_s']:.1f} ok/s at level {result['at_level']:g}")
+    if result["first_degraded"]:
+        print(f"First degraded step: level {result['first_degraded']['level']:g} "
+              f"({', '.join(result['first_degraded']['reasons'])})")
+    settings = results["meta"]["settings"]
+    if "analyze" in unloaded:
+        per_worker = 1000 / unloaded["analyze"]["p50_ms"]
+        print(f"One OCR worker serves about {per_worker:.1f} cards/s unloaded; "
+              f"OCR_POOL_WORKERS={settings['OCR_POOL_WORKERS']}, OCR_POOL_MAX_QUEUE={settings['OCR_POOL_MAX_QUEUE']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--levels", default="1,2,4,8", help="users (closed) or requests/s (open) per step")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per step")
+    parser.add_argument("--mix", default="analyze=2,recommend=2,crops=1", help="endpoint weights")
+    parser.add_argument("--images", default="clean=3,noisy=1,small=1,large=1", help="image kind weights")
+    parser.add_argument("--cards-per-kind", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--replay-ms", type=float, default=400.0, help="simulated recognition time per readtext call")
+    parser.add_argument("--gooey-delay", type=float, default=2.0, help="stub answer delay in seconds")
+    parser.add_argument("--gooey-jitter", type=float, default=1.0, help="up to this many extra seconds per answer")
+    parser.add_argument("--gooey-error-rate", type=float, default=0.0, help="share of stub answers that fail")
+    parser.add_argument("--gooey-error-status", type=int, default=503)
+    parser.add_argument("--stub-port", type=int, default=0, help="stub port (0 picks a free one)")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--uvicorn-workers", type=int, help="start a local uvicorn with this many workers")
+    target.add_argument("--url", help="target a running server instead")
+    parser.add_argument("--calibrate", type=int, default=5, help="unloaded calls per endpoint")
+    parser.add_argument("--timeout", type=float, default=120.0, help="client timeout per request")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="open mode: arrivals beyond this are dropped")
+    parser.add_argument("--drain", type=float, default=60.0, help="open mode: seconds to wait for stragglers")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--json", type=Path, help="write results here")
+    args = parser.parse_args()
+
+    try:
+        args.levels = [float(level) for level in args.levels.split(",")]
+        mix = parse_weights(args.mix, ENDPOINTS)
+        images = parse_weights(args.images, IMAGE_KINDS)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.mode == "closed" and any(level != int(level) or level < 1 for level in args.levels):
+        parser.error("closed-mode levels are whole numbers of users")
+
+    kinds = [kind for kind, weight in images.items() if weight > 0]
+    corpus = build_corpus(kinds, args.cards_per_kind, args.seed)
+    corpus_settings = {"kinds": kinds, "cards_per_kind": args.cards_per_kind, "seed": args.seed, "replay_ms": args.replay_ms}
+    scenario = Scenario(mix, {kind: images[kind] for kind in kinds}, corpus, args.seed)
+    if args.url is None and args.uvicorn_workers is None:
+        try:
+            install_replay_reader([card for cards in corpus.values() for card in cards], args.replay_ms / 1000)
+        except RuntimeError as e:
+            parser.error(str(e))
+
+    stub = start_stub(
+        port=args.stub_port,
+        delay=args.gooey_delay,
+        fail_status=args.gooey_error_status,
+        jitter=args.gooey_jitter,
+        error_rate=args.gooey_error_rate,
+        seed=args.seed,
+    )
+    process = None
+    target_name = "in-process"
+    try:
+        if args.url:
+            target_name = args.url
+            print(f"Gooey AI stub on {stub.url} (run the server with GOOEY_AI_BASE_URL={stub.url})")
+        elif args.uvicorn_workers:
+            process, url = start_uvicorn(args.uvicorn_workers, stub.url, corpus_settings)
+            target_name = f"uvicorn x{args.uvicorn_workers}"
+        print(f"{args.mode} scenario against {target_name}, {args.duration:g}s per step\n")
+        print(STEP_HEADER)
+        if args.url or process:
+            results = asyncio.run(run_against(args.url or url, scenario, args))
+        else:
+            results = asyncio.run(run_in_process(scenario, stub.url, args))
+    finally:
+        if process:
+            stop_uvicorn(process)
+        stub.shutdown()
+        stub.server_close()
+
+    results["meta"] = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git": git_commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "target": target_name,
+        "mode": args.mode,
+        "levels": args.levels,
+        "duration_s": args.duration,
+        "mix": mix,
+        "images": images,
+        "corpus": corpus_settings,
+        "gooey_stub": {
+            "delay": args.gooey_delay,
+            "jitter": args.gooey_jitter,
+            "error_rate": args.gooey_error_rate,
+            "requests": stub.requests,
+            "failed": stub.failed,
+            "peak_in_flight": stub.peak_in_flight,
+        },
+        # This process's view; a --url server may run with other settings
+        "settings": {
+            key: getattr(config, key)
+            for key in ("OCR_POOL_KIND", "OCR_POOL_WORKERS", "OCR_POOL_MAX_QUEUE", "OCR_FARM_WORKERS",
+                        "OCR_MAX_LONG_EDGE", "GOOEY_AI_MAX_CONCURRENCY", "GOOEY_AI_MAX_CONNECTIONS",
+                        "GOOEY_AI_MAX_RETRIES", "REC_DEADLINE_SECONDS")
+        },
+    }
+    print_summary(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -65,6 +65,152 @@ if IS_HUGGINGFACE or not IS_PRODUCTION:
 # Supported languages for OCR
 OCR_LANGUAGES = ["en", "kan"]  # English and Kannada
 
+# Image preprocessing before OCR
+# Decode with cv2.imdecode, apply EXIF orientation and downscale large photos
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "true").lower() in ("1", "true", "yes")
+OCR_EXIF_ORIENTATION = os.getenv("OCR_EXIF_ORIENTATION", "true").lower() in ("1", "true", "yes")
+# Long edge (px) photos are shrunk to before detection; 0 keeps full resolution
+OCR_MAX_LONG_EDGE = int(os.getenv("OCR_MAX_LONG_EDGE", "2560"))
+# Off by default - the original colours help Kannada recognition
+OCR_GRAYSCALE = os.getenv("OCR_GRAYSCALE", "false").lower() in ("1", "true", "yes")
+OCR_DESKEW = os.getenv("OCR_DESKEW", "false").lower() in ("1", "true", "yes")
+
+# OCR mode: "full" runs detection over the whole photo, "template" finds the
+# GKVK card table grid and recognises only the value/status cells
+OCR_MODE = os.getenv("OCR_MODE", "full")
+# Table layout for template mode: header rows above the 12 parameter rows and
+# zero-based column indexes of the value and status cells
+OCR_TEMPLATE_HEADER_ROWS = int(os.getenv("OCR_TEMPLATE_HEADER_ROWS", "1"))
+OCR_TEMPLATE_VALUE_COLUMN = int(os.getenv("OCR_TEMPLATE_VALUE_COLUMN", "2"))
+OCR_TEMPLATE_STATUS_COLUMN = int(os.getenv("OCR_TEMPLATE_STATUS_COLUMN", "3"))
+
+# OCR worker pool
+# "thread" shares the one EasyOCR reader in this process, "process" gives
+# every worker its own reader (more memory, no GIL contention)
+OCR_POOL_KIND = os.getenv("OCR_POOL_KIND", "thread")
+OCR_POOL_WORKERS = int(os.getenv("OCR_POOL_WORKERS", "1"))
+# Jobs allowed to wait for a free worker before new ones get a 503
+OCR_POOL_MAX_QUEUE = int(os.getenv("OCR_POOL_MAX_QUEUE", "8"))
+OCR_TIMEOUT_SECONDS = float(os.getenv("OCR_TIMEOUT_SECONDS", "60"))
+OCR_RETRY_AFTER_SECONDS = int(os.getenv("OCR_RETRY_AFTER_SECONDS", "10"))
+# Models load in the background at startup; first run may also download them
+OCR_LOAD_TIMEOUT_SECONDS = float(os.getenv("OCR_LOAD_TIMEOUT_SECONDS", "900"))
+
+# Batch analysis (POST /analyze-batch)
+# Cards per readtext_batched call; 1 runs every card on its own
+OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", "4"))
+# Text crops per recognizer forward pass when cards are batched
+OCR_RECOGNIZER_BATCH_SIZE = int(os.getenv("OCR_RECOGNIZER_BATCH_SIZE", "8"))
+OCR_BATCH_MAX_IMAGES = int(os.getenv("OCR_BATCH_MAX_IMAGES", "500"))
+# Larger images (including zip members) are reported as failed, not decoded
+OCR_BATCH_MAX_IMAGE_BYTES = int(os.getenv("OCR_BATCH_MAX_IMAGE_BYTES", str(20 * 1024 * 1024)))
+
+# OCR worker farm
+# When > 0, OCR runs in this many long-lived processes, each holding its own
+# EasyOCR reader. Pair it with OCR_POOL_KIND=thread and at least as many
+# OCR_POOL_WORKERS so every farm process has a request to work on.
+OCR_FARM_WORKERS = int(os.getenv("OCR_FARM_WORKERS", "0"))
+# torch intra-op threads per farm process; 1 lets throughput scale with cores
+OCR_FARM_TORCH_THREADS = int(os.getenv("OCR_FARM_TORCH_THREADS", "1"))
+
+# OCR result cache, keyed by a hash of the image bytes and OCR configuration
+# In-memory budget for cached text; 0 disables the cache
+OCR_CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+# Persist entries to disk so they survive restarts and are shared between processes
+OCR_CACHE_PERSIST = os.getenv("OCR_CACHE_PERSIST", "false").lower() in ("1", "true", "yes")
+OCR_CACHE_DIR = UPLOAD_DIR / "ocr_cache"
+OCR_CACHE_DISK_MAX_BYTES = int(os.getenv("OCR_CACHE_DISK_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Nutrient rating bands, colours, Kannada labels and fertilizer targets
+# shared by AnalysisService and RecommendationService
+NUTRIENT_THRESHOLDS_PATH = Path(os.getenv("NUTRIENT_THRESHOLDS_PATH", str(BASE_DIR / "data" / "nutrient_thresholds.json")))
+
+# Bulk soil data endpoints (POST /soil/classify-bulk, /soil/recommend-bulk)
+# Rows rated per vectorized pass; memory use follows this, not the upload size
+SOIL_BULK_CHUNK_ROWS = int(os.getenv("SOIL_BULK_CHUNK_ROWS", "500"))
+# Uploads are spooled before streaming starts; larger bodies go to a temp file
+SOIL_BULK_SPOOL_BYTES = int(os.getenv("SOIL_BULK_SPOOL_BYTES", str(8 * 1024 * 1024)))
+# Larger uploads are refused with 413
+SOIL_BULK_MAX_BYTES = int(os.getenv("SOIL_BULK_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Logging (services/app_logging.py): records are queued and written by a
+# background thread, as JSON lines to LOG_FILE (rotated) and as text to stdout
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Empty disables the file
+LOG_FILE = os.getenv("LOG_FILE", str(BASE_DIR / "debug.log"))
+LOG_FILE_MAX_BYTES = int(os.getenv("LOG_FILE_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_FILE_BACKUPS = int(os.getenv("LOG_FILE_BACKUPS", "3"))
+LOG_CONSOLE = os.getenv("LOG_CONSOLE", "true").lower() in ("1", "true", "yes")
+# Records waiting for the writer; when full, new records are dropped (see /stats)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Share of requests the request middleware logs (5xx and errors always are)
+LOG_REQUEST_SAMPLE_RATE = float(os.getenv("LOG_REQUEST_SAMPLE_RATE", "1.0"))
+LOG_REQUEST_HEADERS = os.getenv("LOG_REQUEST_HEADERS", "false").lower() in ("1", "true", "yes")
+
+# Prometheus-style metrics (services/metrics.py) served at GET /metrics:
+# per-stage latency histograms, request durations, queue depths, cache hits
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Per-request profiling (services/profiling.py), off by default. Requests
+# sending "X-Profile-Token: <PROFILE_ADMIN_TOKEN>" are profiled, plus a
+# PROFILE_SAMPLE_RATE share of all requests; the same header guards the
+# /admin/profiles endpoints (disabled while the token is empty)
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", str(UPLOAD_DIR / "profiles")))
+# Oldest captures are deleted beyond this many
+PROFILE_MAX_ENTRIES = int(os.getenv("PROFILE_MAX_ENTRIES", "50"))
+
+# Fast JSON responses (opt-in): the analysis, recommendation, crop, job and
+# stats endpoints return their content serialized once (pydantic-core/orjson)
+# instead of FastAPI validating it again against response_model
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() in ("1", "true", "yes")
+# Fast responses of at least this many bytes are brotli/gzip compressed when
+# the client's Accept-Encoding allows it ("br" needs the brotli package); 0 = off
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+# On a 13 KB recommendation response: gzip 4 -> 3.1 KB in ~0.25 ms,
+# brotli 5 -> 2.8 KB in ~0.5 ms
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "4"))
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+
+# Analysis sessions (links /analyze-direct results to /recommendation calls)
+# "memory" is per process; "sqlite" shares sessions between uvicorn workers
+SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "memory")
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "1000"))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(16 * 1024 * 1024)))
+SESSION_DB_PATH = UPLOAD_DIR / "sessions.db"
+
+# FarmerCHAT recommendation cache, keyed by crop and a binned soil profile
+# (see services/recommendation_cache.py); 0 entries disables it
+REC_CACHE_MAX_ENTRIES = int(os.getenv("REC_CACHE_MAX_ENTRIES", "2000"))
+REC_CACHE_TTL_SECONDS = float(os.getenv("REC_CACHE_TTL_SECONDS", str(24 * 3600)))
+# After the TTL, entries are still served for this long while being refreshed
+REC_CACHE_STALE_SECONDS = float(os.getenv("REC_CACHE_STALE_SECONDS", str(7 * 24 * 3600)))
+REC_CACHE_PERSIST = os.getenv("REC_CACHE_PERSIST", "false").lower() in ("1", "true", "yes")
+REC_CACHE_DB_PATH = UPLOAD_DIR / "recommendations.db"
+# Default latency budget for /recommendation when the request has no
+# deadline parameter; past it the rule-based answer is returned. 0 = wait
+REC_DEADLINE_SECONDS = float(os.getenv("REC_DEADLINE_SECONDS", "0"))
+
+# Asynchronous analysis jobs (POST /jobs/analyze, GET /jobs/{id})
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Jobs waiting beyond this are rejected with 503 + Retry-After
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "100"))
+# Finished jobs (and their results) are kept this long for polling
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "86400"))
+JOB_CALLBACK_TIMEOUT_SECONDS = float(os.getenv("JOB_CALLBACK_TIMEOUT_SECONDS", "10"))
+# Comma-separated host names callbacks may go to. Empty: any host whose
+# addresses are all public (no loopback, private, link-local or reserved)
+JOB_CALLBACK_ALLOWED_HOSTS = [
+    host.strip().lower() for host in os.getenv("JOB_CALLBACK_ALLOWED_HOSTS", "").split(",") if host.strip()
+]
+# A claimed job belongs to its worker process for this long, renewed while
+# the process lives; a job whose lease ran out is taken over by another one
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_DB_PATH = UPLOAD_DIR / "jobs.db"
+JOB_IMAGE_DIR = UPLOAD_DIR / "jobs"
+
 # Gooey AI Configuration
 # Get your API key from https://gooey.ai
 # os.getenv() reads from:
@@ -73,11 +219,43 @@ OCR_LANGUAGES = ["en", "kan"]  # English and Kannada
 #   3. System-wide environment variables
 # This is equivalent to process.env in Node.js
 GOOEY_AI_API_KEY = os.getenv("GOOEY_AI_API_KEY", "")
-GOOEY_AI_BASE_URL = "https://api.gooey.ai/v2"
+GOOEY_AI_BASE_URL = os.getenv("GOOEY_AI_BASE_URL", "https://api.gooey.ai/v2")
 # This should be the example_id from your Gooey AI dashboard
 # Find it in the API endpoint URL: /v2/video-bots?example_id=YOUR_ID_HERE
 FARMERCHAT_MODEL = "ktdv7wi1h578"  # Update this with your example_id from the dashboard
 
+# Gooey AI HTTP client - one pooled client is kept for the app's lifetime so
+# recommendation calls reuse TCP/TLS connections
+GOOEY_AI_CONNECT_TIMEOUT = float(os.getenv("GOOEY_AI_CONNECT_TIMEOUT", "5"))
+# FarmerCHAT answers can take a while to generate
+GOOEY_AI_READ_TIMEOUT = float(os.getenv("GOOEY_AI_READ_TIMEOUT", "30"))
+GOOEY_AI_MAX_CONNECTIONS = int(os.getenv("GOOEY_AI_MAX_CONNECTIONS", "10"))
+GOOEY_AI_MAX_KEEPALIVE = int(os.getenv("GOOEY_AI_MAX_KEEPALIVE", "5"))
+GOOEY_AI_KEEPALIVE_EXPIRY = float(os.getenv("GOOEY_AI_KEEPALIVE_EXPIRY", "60"))
+# HTTP/2 multiplexes calls over one connection; needs the "h2" package
+GOOEY_AI_HTTP2 = os.getenv("GOOEY_AI_HTTP2", "true").lower() in ("1", "true", "yes")
+# Upstream calls allowed at once; further callers wait for a free slot
+GOOEY_AI_MAX_CONCURRENCY = int(os.getenv("GOOEY_AI_MAX_CONCURRENCY", "4"))
+# Streaming endpoint (relative to GOOEY_AI_BASE_URL) used by
+# /recommendation/{crop_id}/stream. It should answer with text/event-stream
+# events carrying the output text; if it can't be used, the normal endpoint is
+# called instead. Empty (the default) skips streaming: the video-bots API has
+# no such endpoint, so the stream route sends the regular call's answer
+GOOEY_AI_STREAM_PATH = os.getenv("GOOEY_AI_STREAM_PATH", "")
+# Retries for 429/5xx answers and connection failures, with jittered
+# exponential backoff (or the server's Retry-After, if not above the max)
+GOOEY_AI_MAX_RETRIES = int(os.getenv("GOOEY_AI_MAX_RETRIES", "2"))
+GOOEY_AI_RETRY_BASE_DELAY = float(os.getenv("GOOEY_AI_RETRY_BASE_DELAY", "0.5"))
+GOOEY_AI_RETRY_MAX_DELAY = float(os.getenv("GOOEY_AI_RETRY_MAX_DELAY", "8"))
+# Circuit breaker: over a rolling window, open when the error rate or the
+# share of slow calls crosses its threshold; probe again after OPEN_SECONDS
+GOOEY_AI_BREAKER_WINDOW_SECONDS = float(os.getenv("GOOEY_AI_BREAKER_WINDOW_SECONDS", "60"))
+GOOEY_AI_BREAKER_MIN_CALLS = int(os.getenv("GOOEY_AI_BREAKER_MIN_CALLS", "5"))
+GOOEY_AI_BREAKER_ERROR_RATE = float(os.getenv("GOOEY_AI_BREAKER_ERROR_RATE", "0.5"))
+GOOEY_AI_BREAKER_SLOW_CALL_SECONDS = float(os.getenv("GOOEY_AI_BREAKER_SLOW_CALL_SECONDS", "20"))
+GOOEY_AI_BREAKER_SLOW_RATE = float(os.getenv("GOOEY_AI_BREAKER_SLOW_RATE", "0.5"))
+GOOEY_AI_BREAKER_OPEN_SECONDS = float(os.getenv("GOOEY_AI_BREAKER_OPEN_SECONDS", "30"))
+
 # Verify API key is loaded from .env file (for debugging)
 # Note: In Python, os.getenv() is equivalent to process.env in Node.js
 if not GOOEY_AI_API_KEY:
@@ -1,31 +1,81 @@
 """FastAPI backend for GKVK Soil Analysis App."""
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+import time
+
+# Measured from here so the logged startup time includes our own imports
+STARTUP_T0 = time.perf_counter()
+
+from fastapi import FastAPI, UploadFile, File, Form, Query, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from contextlib import asynccontextmanager
+import asyncio
+import io
+import json
 import uuid
+import zipfile
 import shutil
 from pathlib import Path
-import traceback
-import sys
-from datetime import datetime
-from typing import Dict, Tuple
-
-from config import CORS_ORIGINS, UPLOAD_DIR
-
-# Debug log file
-DEBUG_LOG = Path(__file__).parent / "debug.log"
-
-def log(msg):
-    """Write to debug log file."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    line = f"[{timestamp}] {msg}\n"
-    with open(DEBUG_LOG, "a", encoding="utf-8") as f:
-        f.write(line)
-    print(line, flush=True)
-from services.ocr_service import OCRService
-from services.analysis_service import AnalysisService
+import logging
+from typing import List, Optional
+
+from config import (
+    CORS_ORIGINS,
+    UPLOAD_DIR,
+    OCR_POOL_KIND,
+    OCR_POOL_WORKERS,
+    OCR_POOL_MAX_QUEUE,
+    OCR_TIMEOUT_SECONDS,
+    OCR_RETRY_AFTER_SECONDS,
+    OCR_LOAD_TIMEOUT_SECONDS,
+    OCR_BATCH_SIZE,
+    OCR_BATCH_MAX_IMAGES,
+    OCR_BATCH_MAX_IMAGE_BYTES,
+    SESSION_STORE_BACKEND,
+    SESSION_TTL_SECONDS,
+    SESSION_MAX_ENTRIES,
+    SESSION_MAX_BYTES,
+    SESSION_DB_PATH,
+    JOB_WORKERS,
+    JOB_MAX_QUEUED,
+    JOB_RETENTION_SECONDS,
+    JOB_CALLBACK_TIMEOUT_SECONDS,
+    JOB_CALLBACK_ALLOWED_HOSTS,
+    JOB_LEASE_SECONDS,
+    JOB_DB_PATH,
+    JOB_IMAGE_DIR,
+    REC_DEADLINE_SECONDS,
+    SOIL_BULK_CHUNK_ROWS,
+    SOIL_BULK_SPOOL_BYTES,
+    SOIL_BULK_MAX_BYTES,
+    FAST_JSON_RESPONSES,
+    METRICS_ENABLED,
+    PROFILE_ADMIN_TOKEN,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_DIR,
+    PROFILE_MAX_ENTRIES,
+    LOG_REQUEST_SAMPLE_RATE,
+    LOG_REQUEST_HEADERS,
+)
+from services.app_logging import get_logger, RequestLogMiddleware, shutdown_logging, logging_stats
+
+# Records are queued and written to debug.log / stdout by a background
+# thread, so logging never does file I/O on the event loop
+logger = get_logger("main")
+
+def log(msg, level=logging.INFO):
+    """Log a message (see services/app_logging.py)."""
+    logger.log(level, msg)
+from services.card_pipeline import get_services, analyze_card, analyze_card_batch, load_models
 from services.recommendation_service import RecommendationService
+from services.worker_pool import WorkerPool, PoolSaturatedError, PoolTimeoutError
+from services.ocr_worker_farm import shutdown_worker_farm
+from services.session_store import create_session_store
+from services.job_queue import JobStore, JobRunner, QUEUED, RUNNING, DONE, check_callback_url
+from services.fast_json import FastJSONResponse
+from services import metrics
+from services.profiling import ProfileStore, ProfilingMiddleware, token_matches
+from services.soil_bulk import BodyTooLargeError, input_format, spool_body, check_rows_body, iter_file, iter_records, iter_groups, to_soil_data, csv_text
 from models import (
     HealthResponse,
     CropListResponse,
@@ -33,42 +83,109 @@ from models import (
     AnalysisRequest,
     AnalysisResponse,
     RecommendationResponse,
+    JobResponse,
+    JobStatusResponse,
     SoilData,
+    NutrientStatus,
+    BatchAnalysisItem,
+    BulkClassifyItem,
+    BulkRecommendItem,
 )
 
+# OCR readiness - models load in the background after the app starts serving
+ocr_ready = False
+ocr_load_error = None
+
+
+async def load_ocr_models():
+    """Load and warm up the OCR models on the pool workers.
+
+    With a process pool, readiness is best-effort: each worker process loads
+    its reader in the pool initializer, and these jobs only show that the
+    models load. The executor does not promise a job per process, and with
+    the spawn/forkserver start methods it starts processes on demand, so a
+    worker may still be loading (or not yet started) when /health/ready
+    turns ready - the first request it takes then waits for the load.
+    """
+    global ocr_ready, ocr_load_error
+    start = time.perf_counter()
+    try:
+        # One job per worker: under fork, every process starts with the first
+        # job and these finish once the initializers have run
+        await asyncio.gather(*(
+            ocr_pool.run(load_models, timeout=OCR_LOAD_TIMEOUT_SECONDS)
+            for _ in range(ocr_pool.max_workers)
+        ))
+    except Exception as e:
+        ocr_load_error = f"{type(e).__name__}: {e}"
+        log(f"OCR model loading failed: {ocr_load_error}", logging.ERROR)
+        return
+    ocr_ready = True
+    log(
+        f"OCR models ready in {time.perf_counter() - start:.1f}s "
+        f"({time.perf_counter() - STARTUP_T0:.1f}s after process start)"
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background model loading, job workers and the Gooey AI client; release them on shutdown."""
+    log(f"App accepting requests {time.perf_counter() - STARTUP_T0:.2f}s after process start")
+    load_task = asyncio.create_task(load_ocr_models())
+    job_runner.start()
+    recommendation_service.gooey_ai.open()
+    yield
+    await job_runner.stop()
+    await recommendation_service.gooey_ai.aclose()
+    load_task.cancel()
+    ocr_pool.shutdown()
+    shutdown_worker_farm()
+    shutdown_logging()
+
+
 app = FastAPI(
     title="GKVK Soil Analysis API",
     description="API for soil health card analysis and crop recommendations",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Global exception handler to catch ALL errors
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    print(f"\n{'='*60}", file=sys.stderr, flush=True)
-    print(f"UNHANDLED EXCEPTION on {request.method} {request.url}", file=sys.stderr, flush=True)
-    print(f"Error type: {type(exc).__name__}", file=sys.stderr, flush=True)
-    print(f"Error message: {str(exc)}", file=sys.stderr, flush=True)
-    traceback.print_exc(file=sys.stderr)
-    print(f"{'='*60}\n", file=sys.stderr, flush=True)
+    logger.error(
+        "Unhandled exception on %s %s: %s: %s", request.method, request.url, type(exc).__name__, exc,
+        exc_info=(type(exc), exc, exc.__traceback__),
+    )
     return JSONResponse(
         status_code=500,
         content={"detail": f"Internal server error: {str(exc)}"}
     )
 
-# Middleware to log all requests
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    log(f">>> REQUEST: {request.method} {request.url}")
-    log(f"    Headers: {dict(request.headers)}")
-    try:
-        response = await call_next(request)
-        log(f"<<< RESPONSE: {response.status_code}")
-        return response
-    except Exception as e:
-        log(f"!!! ERROR in middleware: {type(e).__name__}: {e}")
-        traceback.print_exc()
-        raise
+# Opt-in cProfile captures of the OCR, analysis and recommendation calls,
+# kept in a ring buffer under PROFILE_DIR (see /admin/profiles)
+profile_store = ProfileStore(PROFILE_DIR, PROFILE_MAX_ENTRIES)
+if PROFILE_ADMIN_TOKEN or PROFILE_SAMPLE_RATE > 0:
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=profile_store,
+        admin_token=PROFILE_ADMIN_TOKEN,
+        sample_rate=PROFILE_SAMPLE_RATE,
+        logger=get_logger("profiling"),
+    )
+
+# Request log: method, path, status and duration for a sample of requests
+# (every 5xx and error), with headers only if LOG_REQUEST_HEADERS is set
+app.add_middleware(
+    RequestLogMiddleware,
+    logger=get_logger("http"),
+    sample_rate=LOG_REQUEST_SAMPLE_RATE,
+    log_headers=LOG_REQUEST_HEADERS,
+)
+
+# Request durations by route template and requests in flight for /metrics
+if METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -80,21 +197,189 @@ app.add_middleware(
 )
 
 # Initialize services
-ocr_service = OCRService()
-analysis_service = AnalysisService()
+ocr_service, analysis_service = get_services()
 recommendation_service = RecommendationService()  # Now has __init__ but it's optional
 
-# In-memory cache to link /analyze-direct results with /recommendation calls
-# Maps image_id -> (soil_data, raw_values, status_info)
-ANALYSIS_CACHE: Dict[str, Tuple[SoilData, dict, dict]] = {}
+# OCR and card parsing run on this pool so a long EasyOCR pass never blocks
+# the event loop (and with it /health, /crops and /recommendation)
+ocr_pool = WorkerPool(
+    kind=OCR_POOL_KIND,
+    max_workers=OCR_POOL_WORKERS,
+    max_queue=OCR_POOL_MAX_QUEUE,
+    timeout=OCR_TIMEOUT_SECONDS,
+    retry_after=OCR_RETRY_AFTER_SECONDS,
+    # Every worker process loads its own reader before taking a job
+    initializer=load_models,
+)
+
+# Links /analyze-direct results with /recommendation calls
+# Maps image_id -> (soil_data, raw_values, status_info), bounded by TTL and size
+analysis_sessions = create_session_store(
+    SESSION_STORE_BACKEND,
+    ttl_seconds=SESSION_TTL_SECONDS,
+    max_entries=SESSION_MAX_ENTRIES,
+    max_bytes=SESSION_MAX_BYTES,
+    db_path=SESSION_DB_PATH,
+)
 
 log("=== SERVER STARTED ===")
 
 
+def ensure_ocr_ready():
+    """Raise 503 + Retry-After until the OCR models have loaded."""
+    if not ocr_ready:
+        raise HTTPException(
+            status_code=503,
+            detail="OCR models failed to load." if ocr_load_error else "OCR models are still loading. Please retry shortly.",
+            headers={"Retry-After": str(OCR_RETRY_AFTER_SECONDS)},
+        )
+
+
+async def run_card_analysis(image_input):
+    """Run OCR + card parsing on the worker pool.
+
+    Returns:
+        (ocr_text, soil_data, raw_values, status_info)
+    """
+    ensure_ocr_ready()
+    return await run_on_ocr_pool(analyze_card, image_input)
+
+
+async def run_on_ocr_pool(fn, *args, timeout: float = None):
+    """Run ``fn(*args)`` on the OCR pool, mapping pool errors to HTTP errors."""
+    try:
+        return await ocr_pool.run(fn, *args, timeout=timeout)
+    except PoolSaturatedError as e:
+        log(f"OCR pool saturated ({ocr_pool.pending} jobs), rejecting request", logging.WARNING)
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy analyzing other cards. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except PoolTimeoutError as e:
+        log(f"OCR job timed out: {e}", logging.WARNING)
+        raise HTTPException(status_code=504, detail="Analysis timed out. Please try again.")
+
+
+async def build_analysis_response(image_id: str, ocr_result, soil_data, raw_values, status_info) -> AnalysisResponse:
+    """Compute nutrient status and store the session so /recommendation can reuse it."""
+    # Get nutrient status using OCR-extracted status text
+    nutrient_status = analysis_service.get_nutrient_status(soil_data, raw_values, status_info)
+    log(f"Nutrient status count: {len(nutrient_status)}", logging.DEBUG)
+
+    await analysis_sessions.aput(image_id, soil_data, raw_values, status_info)
+
+    return AnalysisResponse(
+        success=True,
+        image_id=image_id,
+        extracted_text=ocr_result,
+        soil_data=soil_data,
+        nutrient_status=nutrient_status,
+        message="Analysis completed",
+        message_kn="ವಿಶ್ಲೇಷಣೆ ಪೂರ್ಣಗೊಂಡಿದೆ",
+    )
+
+
+def api_response(model):
+    """``model`` (or plain JSON content) as a FastJSONResponse when FAST_JSON_RESPONSES is on.
+
+    A Response is sent as-is, so FastAPI does not validate our own model
+    against response_model again; the route's response_model still
+    documents the schema.
+    """
+    if FAST_JSON_RESPONSES:
+        return FastJSONResponse(model)
+    return model
+
+
+async def run_analysis_job(job_id: str, image_bytes: bytes) -> dict:
+    """Job handler: analyze a queued card, waiting out model loading and busy periods."""
+    while True:
+        try:
+            ocr_result, soil_data, raw_values, status_info = await run_card_analysis(image_bytes)
+            break
+        except HTTPException as e:
+            if e.status_code != 503 or ocr_load_error:
+                raise RuntimeError(e.detail)
+            await asyncio.sleep(OCR_RETRY_AFTER_SECONDS)
+
+    # The job id doubles as the image_id for /recommendation
+    return (await build_analysis_response(job_id, ocr_result, soil_data, raw_values, status_info)).model_dump()
+
+
+# Background analysis jobs for clients that cannot hold a request open for
+# the whole OCR run; jobs survive restarts in a SQLite table
+job_runner = JobRunner(
+    JobStore(JOB_DB_PATH, JOB_IMAGE_DIR),
+    handler=run_analysis_job,
+    workers=JOB_WORKERS,
+    max_queued=JOB_MAX_QUEUED,
+    retention_seconds=JOB_RETENTION_SECONDS,
+    callback_timeout=JOB_CALLBACK_TIMEOUT_SECONDS,
+    callback_allowed_hosts=JOB_CALLBACK_ALLOWED_HOSTS,
+    lease_seconds=JOB_LEASE_SECONDS,
+)
+
+
+def cache_lookups(cache) -> dict:
+    """Cache lookups by result ("hit", "stale_hit", "miss") for the metrics callbacks."""
+    if cache is None:
+        return {}
+    cache_stats = cache.stats()
+    results = {"hits": "hit", "stale_hits": "stale_hit", "misses": "miss"}
+    return {result: cache_stats[key] for key, result in results.items() if key in cache_stats}
+
+
+def register_runtime_metrics():
+    """Expose counters the services already keep, read at scrape time."""
+    caches = {"ocr": ocr_service.cache, "recommendation": recommendation_service.cache}
+
+    def lookups():
+        return {
+            (name, result): count
+            for name, cache in caches.items()
+            for result, count in cache_lookups(cache).items()
+        }
+
+    def hit_ratio():
+        ratios = {}
+        for name, cache in caches.items():
+            counts = cache_lookups(cache)
+            total = sum(counts.values())
+            if total:
+                ratios[(name,)] = (total - counts["miss"]) / total
+        return ratios
+
+    for metric in (
+        metrics.Callback("soiltrack_ocr_pool_running", "OCR pool jobs running on a worker.",
+                         lambda: ocr_pool.pending - ocr_pool.queued),
+        metrics.Callback("soiltrack_ocr_pool_queued", "OCR pool jobs waiting for a free worker.",
+                         lambda: ocr_pool.queued),
+        metrics.Callback("soiltrack_ocr_pool_capacity", "OCR pool workers plus queue slots.",
+                         lambda: ocr_pool.max_workers + ocr_pool.max_queue),
+        metrics.Callback("soiltrack_jobs", "Background analysis jobs by state.",
+                         lambda: {(QUEUED,): job_runner.store.count(QUEUED), (RUNNING,): job_runner.store.count(RUNNING)},
+                         labelnames=["state"]),
+        metrics.Callback("soiltrack_gooey_ai_in_flight", "Gooey AI calls in progress.",
+                         lambda: recommendation_service.gooey_ai.stats()["in_flight"]),
+        metrics.Callback("soiltrack_cache_lookups_total", "Cache lookups by result (hit, stale_hit, miss).",
+                         lookups, kind="counter", labelnames=["cache", "result"]),
+        metrics.Callback("soiltrack_cache_hit_ratio", "Share of cache lookups served from the cache since start.",
+                         hit_ratio, labelnames=["cache"]),
+        metrics.Callback("soiltrack_log_records_dropped_total", "Log records dropped because the log queue was full.",
+                         lambda: logging_stats()["dropped"], kind="counter"),
+    ):
+        metrics.REGISTRY.unregister(metric.name)
+        metrics.REGISTRY.register(metric)
+
+
+register_runtime_metrics()
+
+
 @app.get("/", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint."""
-    log("Health check called")
+    log("Health check called", logging.DEBUG)
     return HealthResponse(
         status="healthy",
         message="GKVK Soil Analysis API is running",
@@ -108,11 +393,97 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/health/live")
+async def health_live():
+    """Liveness probe - the process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness probe - OCR models are loaded and warmed up (best-effort per process, see load_ocr_models)."""
+    if ocr_ready:
+        return {"status": "ready"}
+    return JSONResponse(
+        status_code=503,
+        content={"status": "failed" if ocr_load_error else "loading", "error": ocr_load_error},
+        headers={"Retry-After": str(OCR_RETRY_AFTER_SECONDS)},
+    )
+
+
+@app.get("/stats")
+async def stats():
+    """Runtime counters for the OCR worker pool and caches.
+
+    Counters are per process; with OCR_POOL_KIND=process the OCR cache
+    figures only cover work done in this process.
+    """
+    return api_response({
+        "ocr_pool": ocr_pool.stats(),
+        "ocr_cache": ocr_service.cache.stats() if ocr_service.cache else None,
+        "analysis_sessions": analysis_sessions.stats(),
+        "jobs": {
+            "queued": job_runner.store.count(QUEUED),
+            "running": job_runner.store.count(RUNNING),
+            "max_queued": job_runner.max_queued,
+        },
+        "gooey_ai": recommendation_service.gooey_ai.stats(),
+        "recommendation_cache": recommendation_service.cache.stats() if recommendation_service.cache else None,
+        "logging": logging_stats(),
+    })
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition of the metrics in services/metrics.py.
+
+    Like /stats these are per process; scrape every uvicorn worker.
+    """
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+def require_profile_admin(token: Optional[str]):
+    """404 while profiling admin is off (no token configured), 403 on a wrong token."""
+    if not PROFILE_ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token_matches(token, PROFILE_ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid profile token")
+
+
+@app.get("/admin/profiles", include_in_schema=False)
+async def list_profiles(x_profile_token: Optional[str] = Header(None)):
+    """Captured profiles, newest first: trigger, path, status, image hash and timings."""
+    require_profile_admin(x_profile_token)
+    return {"max_entries": profile_store.max_entries, "profiles": profile_store.list()}
+
+
+@app.get("/admin/profiles/{profile_id}", include_in_schema=False)
+async def download_profile(
+    profile_id: str,
+    format: str = Query("prof", pattern="^(prof|text)$"),
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|calls)$"),
+    x_profile_token: Optional[str] = Header(None),
+):
+    """The pstats file (open with pstats or snakeviz), or with format=text a report."""
+    require_profile_admin(x_profile_token)
+    if format == "text":
+        report = await asyncio.to_thread(profile_store.render_text, profile_id, sort)
+        if report is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return PlainTextResponse(report)
+    path = profile_store.profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
+
 @app.get("/crops", response_model=CropListResponse)
 async def get_crops():
     """Get list of available crops."""
     crops = recommendation_service.get_available_crops()
-    return CropListResponse(crops=crops)
+    return api_response(CropListResponse(crops=crops))
 
 
 @app.post("/upload", response_model=UploadResponse)
@@ -127,7 +498,7 @@ async def upload_image(file: UploadFile = File(...)):
     
     # Accept if content type matches OR if extension matches
     if file.content_type not in allowed_types and file_ext not in allowed_extensions:
-        log(f"Rejected file: content_type={file.content_type}, ext={file_ext}")
+        log(f"Rejected file: content_type={file.content_type}, ext={file_ext}", logging.WARNING)
         raise HTTPException(
             status_code=400,
             detail=f"Invalid file type. Got content_type={file.content_type}, ext={file_ext}. Only JPEG and PNG are allowed.",
@@ -136,7 +507,7 @@ async def upload_image(file: UploadFile = File(...)):
     # Read image into memory (no file saving)
     try:
         contents = await file.read()
-        log(f"Read {len(contents)} bytes from upload")
+        log(f"Read {len(contents)} bytes from upload", logging.DEBUG)
         
         if len(contents) == 0:
             raise HTTPException(status_code=400, detail="Empty file received")
@@ -144,11 +515,10 @@ async def upload_image(file: UploadFile = File(...)):
         # Generate unique ID for response (not used for storage)
         unique_id = str(uuid.uuid4())
         
-        log(f"Processing image in memory (no file storage)")
+        log("Processing image in memory (no file storage)", logging.DEBUG)
         
     except Exception as e:
-        log(f"Failed to read file: {e}")
-        traceback.print_exc()
+        logger.exception(f"Failed to read file: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to read file: {str(e)}")
 
     return UploadResponse(
@@ -171,27 +541,21 @@ async def analyze_image(request: AnalysisRequest):
         )
 
     try:
-        print(f"Analyzing image: {image_path}")
+        log(f"Analyzing image: {image_path}")
         
         # Read file and process
         with open(image_path, "rb") as f:
             image_bytes = f.read()
         
-        # Perform OCR directly from image bytes
-        ocr_result = ocr_service.extract_text(image_bytes)
-        print(f"OCR result: {len(ocr_result)} chars extracted")
-
-        # Analyze soil data - extract values AND status text from OCR
-        soil_data, raw_values, status_info = analysis_service.analyze_soil_card(ocr_result)
-        print(f"Soil data parsed successfully")
-        print(f"Raw values found: {len(raw_values)}")
-        print(f"Status info (from OCR): {len(status_info)} items")
+        # Perform OCR and parsing on the worker pool
+        ocr_result, soil_data, raw_values, status_info = await run_card_analysis(image_bytes)
+        log("Soil data parsed successfully", logging.DEBUG)
 
         # Get nutrient status using OCR-extracted status text
         nutrient_status = analysis_service.get_nutrient_status(soil_data, raw_values, status_info)
-        print(f"Nutrient status count: {len(nutrient_status)}")
+        log(f"Nutrient status count: {len(nutrient_status)}", logging.DEBUG)
 
-        return AnalysisResponse(
+        return api_response(AnalysisResponse(
             success=True,
             image_id=request.image_id,
             extracted_text=ocr_result,
@@ -199,10 +563,11 @@ async def analyze_image(request: AnalysisRequest):
             nutrient_status=nutrient_status,
             message="Analysis completed",
             message_kn="ವಿಶ್ಲೇಷಣೆ ಪೂರ್ಣಗೊಂಡಿದೆ",
-        )
+        ))
+    except HTTPException:
+        raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Analysis failed: {e}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
@@ -225,47 +590,344 @@ async def analyze_image_direct(file: UploadFile = File(...)):
     try:
         # Read image into memory
         image_bytes = await file.read()
-        log(f"Read {len(image_bytes)} bytes for direct analysis")
+        log(f"Read {len(image_bytes)} bytes for direct analysis", logging.DEBUG)
         
         if len(image_bytes) == 0:
             raise HTTPException(status_code=400, detail="Empty file received")
         
-        print(f"Analyzing image directly (size: {len(image_bytes)} bytes)")
+        log(f"Analyzing image directly (size: {len(image_bytes)} bytes)", logging.DEBUG)
         
-        # Perform OCR directly from image bytes (no file saving)
-        ocr_result = ocr_service.extract_text(image_bytes)
-        print(f"OCR result: {len(ocr_result)} chars extracted")
-
-        # Analyze soil data - extract values AND status text from OCR
-        soil_data, raw_values, status_info = analysis_service.analyze_soil_card(ocr_result)
-        print(f"Soil data parsed successfully")
-        print(f"Raw values found: {len(raw_values)}")
-        print(f"Status info (from OCR): {len(status_info)} items")
-
-        # Get nutrient status using OCR-extracted status text
-        nutrient_status = analysis_service.get_nutrient_status(soil_data, raw_values, status_info)
-        print(f"Nutrient status count: {len(nutrient_status)}")
+        # Perform OCR and parsing on the worker pool (no file saving)
+        ocr_result, soil_data, raw_values, status_info = await run_card_analysis(image_bytes)
+        log("Soil data parsed successfully", logging.DEBUG)
 
         # Generate a unique image_id and cache the analysis so the recommendation
         # endpoint can reuse the detailed soil data without needing a saved file
         image_id = str(uuid.uuid4())
-        ANALYSIS_CACHE[image_id] = (soil_data, raw_values, status_info)
-
-        return AnalysisResponse(
-            success=True,
-            image_id=image_id,
-            extracted_text=ocr_result,
-            soil_data=soil_data,
-            nutrient_status=nutrient_status,
-            message="Analysis completed",
-            message_kn="ವಿಶ್ಲೇಷಣೆ ಪೂರ್ಣಗೊಂಡಿದೆ",
-        )
+        return api_response(await build_analysis_response(image_id, ocr_result, soil_data, raw_values, status_info))
+    except HTTPException:
+        raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Analysis failed: {e}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+BATCH_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def expand_batch_upload(filename: str, content_type: str, contents: bytes) -> list:
+    """Turn one uploaded part into (filename, image_bytes, error) entries.
+
+    Zip archives are expanded to their image members; anything else must be
+    a JPEG or PNG. Problems are reported per entry so the rest of the batch
+    still runs.
+    """
+    file_ext = Path(filename).suffix.lower()
+    is_zip = file_ext == ".zip" or content_type in ("application/zip", "application/x-zip-compressed")
+    if not is_zip:
+        if content_type not in ("image/jpeg", "image/png", "image/jpg", "application/octet-stream") and file_ext not in BATCH_IMAGE_EXTENSIONS:
+            return [(filename, None, "Invalid file type. Only JPEG and PNG are allowed.")]
+        if len(contents) == 0:
+            return [(filename, None, "Empty file received")]
+        if len(contents) > OCR_BATCH_MAX_IMAGE_BYTES:
+            return [(filename, None, "Image too large")]
+        return [(filename, contents, None)]
+
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(contents))
+    except zipfile.BadZipFile:
+        return [(filename, None, "Invalid zip archive")]
+
+    entries = []
+    with archive:
+        for member in archive.infolist():
+            name = member.filename
+            # Skip folders and macOS resource forks
+            if member.is_dir() or name.startswith("__MACOSX/") or Path(name).name.startswith("."):
+                continue
+            if Path(name).suffix.lower() not in BATCH_IMAGE_EXTENSIONS:
+                continue
+            # file_size comes from the archive header, so check it before inflating
+            if member.file_size > OCR_BATCH_MAX_IMAGE_BYTES:
+                entries.append((name, None, "Image too large"))
+                continue
+            entries.append((name, archive.read(member), None))
+    return entries
+
+
+async def stream_batch_results(cards: list):
+    """Analyze cards in OCR_BATCH_SIZE chunks and yield NDJSON lines as chunks finish."""
+    def line(index, filename, **fields):
+        return BatchAnalysisItem(index=index, filename=filename, **fields).model_dump_json() + "\n"
+
+    pending = []
+    for index, (filename, image_bytes, error) in enumerate(cards):
+        if error:
+            yield line(index, filename, success=False, error=error)
+        else:
+            pending.append(index)
+
+    # At most one chunk per pool worker in flight, so single-card requests
+    # can still get a pool slot while a large batch is running
+    in_flight = asyncio.Semaphore(ocr_pool.max_workers)
+
+    async def run_chunk(indexes):
+        images = [cards[i][1] for i in indexes]
+        async with in_flight:
+            while True:
+                try:
+                    outcomes = await run_on_ocr_pool(
+                        analyze_card_batch, images, timeout=OCR_TIMEOUT_SECONDS * len(images)
+                    )
+                    break
+                except HTTPException as e:
+                    if e.status_code != 503:
+                        outcomes = [(None, e.detail)] * len(images)
+                        break
+                    await asyncio.sleep(OCR_RETRY_AFTER_SECONDS)
+        return indexes, outcomes
+
+    chunk_size = max(1, OCR_BATCH_SIZE)
+    tasks = [
+        asyncio.create_task(run_chunk(pending[i:i + chunk_size]))
+        for i in range(0, len(pending), chunk_size)
+    ]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            indexes, outcomes = await finished
+            for index, (analysis, error) in zip(indexes, outcomes):
+                filename = cards[index][0]
+                if analysis is None:
+                    yield line(index, filename, success=False, error=error)
+                    continue
+                ocr_result, soil_data, raw_values, status_info = analysis
+                response = await build_analysis_response(str(uuid.uuid4()), ocr_result, soil_data, raw_values, status_info)
+                yield line(index, filename, success=True, result=response)
+    finally:
+        # Client went away - stop queueing the remaining chunks
+        for task in tasks:
+            task.cancel()
+
+
+@app.post("/analyze-batch")
+async def analyze_batch(files: List[UploadFile] = File(...)):
+    """Analyze many soil health cards in one request.
+
+    Accepts several images and/or zip archives of images. Returns NDJSON
+    (one BatchAnalysisItem per line) in completion order; each successful
+    result has its own image_id for /recommendation.
+    """
+    ensure_ocr_ready()
+
+    cards = []
+    for file in files:
+        contents = await file.read()
+        cards.extend(expand_batch_upload(file.filename or "", file.content_type, contents))
+        if len(cards) > OCR_BATCH_MAX_IMAGES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many images. At most {OCR_BATCH_MAX_IMAGES} cards per batch.",
+            )
+    if not cards:
+        raise HTTPException(status_code=400, detail="No images found in upload")
+
+    log(f"Batch analyze request: {len(cards)} images from {len(files)} files")
+    return StreamingResponse(stream_batch_results(cards), media_type="application/x-ndjson")
+
+
+BULK_CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+BULK_REC_CSV_FIELDS = ["title", "title_kn", "description", "description_kn", "fertilizer", "fertilizer_kn", "dosage", "dosage_kn"]
+
+
+def bulk_csv_header(crop_id: Optional[str]) -> list:
+    if crop_id:
+        return ["index", "error"] + BULK_REC_CSV_FIELDS
+    header = ["index", "error"]
+    for param in analysis_service.PARAM_ORDER:
+        header += [param, f"{param}_status", f"{param}_status_kn"]
+    return header
+
+
+def bulk_output(index: int, crop_id: Optional[str], output: str, soil_data=None, nutrient_status=None, error=None) -> str:
+    """NDJSON line or CSV rows for one bulk row."""
+    recommendations = None
+    if crop_id and error is None:
+        recommendations = recommendation_service.get_rule_based_recommendations(crop_id, soil_data, nutrient_status)
+
+    if output == "csv":
+        if error is not None:
+            return csv_text([[index, error]])
+        if crop_id:
+            return csv_text([index, ""] + [getattr(rec, field) for field in BULK_REC_CSV_FIELDS] for rec in recommendations)
+        row = [index, ""]
+        for status in nutrient_status:
+            row += [status.value, status.status, status.status_kn]
+        return csv_text([row])
+
+    if crop_id:
+        item = BulkRecommendItem(index=index, success=error is None, crop_id=crop_id, recommendations=recommendations, error=error)
+    else:
+        item = BulkClassifyItem(index=index, success=error is None, soil_data=soil_data, nutrient_status=nutrient_status, error=error)
+    return item.model_dump_json() + "\n"
+
+
+async def spool_bulk_body(request: Request, input_fmt: str):
+    """Spool a bulk upload before streaming.
+
+    Bodies over SOIL_BULK_MAX_BYTES are a 413, a JSON body without a rows
+    array is a 400.
+    """
+    too_large = HTTPException(status_code=413, detail=f"Upload is larger than {SOIL_BULK_MAX_BYTES} bytes")
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > SOIL_BULK_MAX_BYTES:
+        raise too_large
+    try:
+        body = await spool_body(request.stream(), SOIL_BULK_SPOOL_BYTES, SOIL_BULK_MAX_BYTES)
+    except BodyTooLargeError:
+        raise too_large
+    if input_fmt == "json":
+        try:
+            await check_rows_body(body)
+        except ValueError as e:
+            body.close()
+            raise HTTPException(status_code=400, detail=str(e))
+    return body
+
+
+async def stream_bulk_soil(body, input_fmt: str, output: str, crop_id: Optional[str] = None):
+    """Rate spooled soil rows SOIL_BULK_CHUNK_ROWS at a time and yield results in input order.
+
+    With a crop_id each row also gets the rule-based recommendations.
+    """
+    if output == "csv":
+        yield csv_text([bulk_csv_header(crop_id)])
+
+    records = iter_records(iter_file(body), input_fmt)
+    async for group in iter_groups(records, max(1, SOIL_BULK_CHUNK_ROWS)):
+        parsed = []
+        for index, record, error in group:
+            soil_data = None
+            if error is None:
+                soil_data, error = to_soil_data(record)
+            parsed.append((index, soil_data, error))
+
+        valid = [soil_data for _, soil_data, error in parsed if error is None]
+        statuses = iter(analysis_service.rate_soil_batch(valid) if valid else [])
+        yield "".join(
+            bulk_output(index, crop_id, output, soil_data, next(statuses) if error is None else None, error)
+            for index, soil_data, error in parsed
+        )
+
+
+@app.post("/soil/classify-bulk")
+async def classify_soil_bulk(
+    request: Request,
+    output: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+):
+    """Rate soil test rows from a lab export without OCR.
+
+    The body is NDJSON (one SoilData object per line, the default), CSV with
+    a header row (Content-Type: text/csv) or {"rows": [...]} JSON
+    (Content-Type: application/json). Results stream back in input order as
+    NDJSON (one BulkClassifyItem per line) or, with format=csv, one CSV row
+    per input row. Invalid rows are reported per row.
+    """
+    input_fmt = input_format(request.headers.get("content-type"))
+    log(f"Bulk classify request: input={input_fmt}, format={output}")
+    body = await spool_bulk_body(request, input_fmt)
+    media_type = BULK_CSV_MEDIA_TYPE if output == "csv" else "application/x-ndjson"
+    return StreamingResponse(stream_bulk_soil(body, input_fmt, output), media_type=media_type)
+
+
+@app.post("/soil/recommend-bulk")
+async def recommend_soil_bulk(
+    request: Request,
+    crop_id: str = Query(...),
+    output: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+):
+    """Rule-based recommendations for every soil row of a lab export.
+
+    Takes the same bodies as /soil/classify-bulk. Streams one
+    BulkRecommendItem per row as NDJSON or, with format=csv, one CSV row per
+    recommendation. FarmerCHAT is not called.
+    """
+    if crop_id not in recommendation_service.CROPS:
+        raise HTTPException(status_code=404, detail=f"Unknown crop: {crop_id}")
+    input_fmt = input_format(request.headers.get("content-type"))
+    log(f"Bulk recommend request: crop={crop_id}, input={input_fmt}, format={output}")
+    body = await spool_bulk_body(request, input_fmt)
+    media_type = BULK_CSV_MEDIA_TYPE if output == "csv" else "application/x-ndjson"
+    return StreamingResponse(stream_bulk_soil(body, input_fmt, output, crop_id), media_type=media_type)
+
+
+@app.post("/jobs/analyze", response_model=JobResponse, status_code=202)
+async def submit_analysis_job(file: UploadFile = File(...), callback_url: Optional[str] = Form(None)):
+    """Queue a soil health card for analysis and return a job id immediately.
+
+    Poll GET /jobs/{job_id} for the result. If callback_url is given, the
+    final job state is also POSTed there as JSON; it must be a public host
+    or one of JOB_CALLBACK_ALLOWED_HOSTS.
+    """
+    log(f"Job request: filename={file.filename}, content_type={file.content_type}, callback={callback_url}")
+
+    # Validate file type
+    allowed_types = ["image/jpeg", "image/png", "image/jpg", "application/octet-stream"]
+    file_ext = Path(file.filename).suffix.lower() if file.filename else ""
+    allowed_extensions = [".jpg", ".jpeg", ".png"]
+
+    if file.content_type not in allowed_types and file_ext not in allowed_extensions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type. Only JPEG and PNG are allowed.",
+        )
+    if callback_url:
+        try:
+            await check_callback_url(callback_url, JOB_CALLBACK_ALLOWED_HOSTS)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    image_bytes = await file.read()
+    if len(image_bytes) == 0:
+        raise HTTPException(status_code=400, detail="Empty file received")
+
+    job_id = str(uuid.uuid4())
+    if not await job_runner.submit(job_id, image_bytes, callback_url):
+        log(f"Job queue full ({job_runner.queued} jobs), rejecting request", logging.WARNING)
+        raise HTTPException(
+            status_code=503,
+            detail="Too many cards waiting for analysis. Please retry shortly.",
+            headers={"Retry-After": str(OCR_RETRY_AFTER_SECONDS)},
+        )
+
+    return JobResponse(
+        success=True,
+        job_id=job_id,
+        status=QUEUED,
+        message="Analysis queued",
+        message_kn="ವಿಶ್ಲೇಷಣೆ ಸರದಿಯಲ್ಲಿದೆ",
+    )
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_analysis_job(job_id: str):
+    """Status of an analysis job, with the AnalysisResponse once done.
+
+    A done job's id works as the image_id for /recommendation for as long
+    as the job is kept (JOB_RETENTION_SECONDS).
+    """
+    job = await asyncio.to_thread(job_runner.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return api_response(JobStatusResponse(
+        job_id=job_id,
+        status=job["status"],
+        created_at=job["created_at"],
+        updated_at=job["updated_at"],
+        result=job["result"],
+        error=job["error"],
+    ))
+
+
 @app.post("/analyze", response_model=AnalysisResponse)
 async def analyze_image(request: AnalysisRequest):
     """Analyze an uploaded soil health card image."""
@@ -275,23 +937,17 @@ async def analyze_image(request: AnalysisRequest):
         raise HTTPException(status_code=404, detail="Image not found")
 
     try:
-        print(f"Analyzing image: {image_path}")
+        log(f"Analyzing image: {image_path}")
         
-        # Perform OCR
-        ocr_result = ocr_service.extract_text(str(image_path))
-        print(f"OCR result: {len(ocr_result)} chars extracted")
-
-        # Analyze soil data - extract values AND status text from OCR
-        soil_data, raw_values, status_info = analysis_service.analyze_soil_card(ocr_result)
-        print(f"Soil data parsed successfully")
-        print(f"Raw values found: {len(raw_values)}")
-        print(f"Status info (from OCR): {len(status_info)} items")
+        # Perform OCR and parsing on the worker pool
+        ocr_result, soil_data, raw_values, status_info = await run_card_analysis(str(image_path))
+        log("Soil data parsed successfully", logging.DEBUG)
 
         # Get nutrient status using OCR-extracted status text
         nutrient_status = analysis_service.get_nutrient_status(soil_data, raw_values, status_info)
-        print(f"Nutrient status count: {len(nutrient_status)}")
+        log(f"Nutrient status count: {len(nutrient_status)}", logging.DEBUG)
 
-        return AnalysisResponse(
+        return api_response(AnalysisResponse(
             success=True,
             image_id=request.image_id,
             extracted_text=ocr_result,
@@ -299,46 +955,113 @@ async def analyze_image(request: AnalysisRequest):
             nutrient_status=nutrient_status,
             message="Analysis completed",
             message_kn="ವಿಶ್ಲೇಷಣೆ ಪೂರ್ಣಗೊಂಡಿದೆ",
-        )
+        ))
+    except HTTPException:
+        raise
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Analysis failed: {e}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+async def load_soil_analysis(image_id: Optional[str]):
+    """Soil data and nutrient status for an analyzed image, or (None, None).
+
+    Returns:
+        (soil_data, nutrient_status)
+    """
+    if not image_id:
+        return None, None
+    # First, check the session store (results from /analyze-direct).
+    # Sessions are not consumed, so one analysis serves several crops
+    cached = await analysis_sessions.aget(image_id)
+    if cached:
+        soil_data, raw_values, status_info = cached
+        return soil_data, analysis_service.get_nutrient_status(soil_data, raw_values, status_info)
+    # A job id: finished jobs outlive their session (JOB_RETENTION_SECONDS
+    # vs SESSION_TTL_SECONDS), and the job keeps the analysis it returned
+    job = await asyncio.to_thread(job_runner.store.get, image_id)
+    if job and job["status"] == DONE and job["result"]:
+        result = job["result"]
+        return SoilData(**result["soil_data"]), [NutrientStatus(**status) for status in result["nutrient_status"]]
+    # Fallback to legacy file-based flow if an image was uploaded/saved
+    image_path = UPLOAD_DIR / image_id
+    if image_path.exists():
+        _, soil_data, raw_values, status_info = await run_card_analysis(str(image_path))
+        # Get nutrient status with color/status information
+        return soil_data, analysis_service.get_nutrient_status(soil_data, raw_values, status_info)
+    return None, None
+
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.get("/recommendation/{crop_id}/stream")
+async def stream_recommendation(crop_id: str, image_id: str = None):
+    """Stream recommendations as Server-Sent Events.
+
+    The rule-based recommendations are sent first, as "recommendation"
+    events with source "rules"; AI recommendations follow one by one
+    (source "ai") as soon as each is complete, then a final "done" event.
+    """
+    if crop_id not in recommendation_service.CROPS:
+        raise HTTPException(status_code=404, detail=f"Unknown crop: {crop_id}")
+    soil_data, nutrient_status = await load_soil_analysis(image_id)
+
+    async def events():
+        for rec in recommendation_service.get_rule_based_recommendations(crop_id, soil_data, nutrient_status):
+            yield sse_event("recommendation", {"source": "rules", "recommendation": rec.model_dump()})
+
+        ai_count = 0
+        try:
+            async for rec in recommendation_service.stream_ai_recommendations(crop_id, soil_data, nutrient_status):
+                ai_count += 1
+                yield sse_event("recommendation", {"source": "ai", "recommendation": rec.model_dump()})
+        except Exception as e:
+            log(f"AI recommendation stream failed: {type(e).__name__}: {e}", logging.WARNING)
+            yield sse_event("error", {"detail": "AI recommendations unavailable"})
+        yield sse_event("done", {"ai_count": ai_count})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Stop proxies (nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/recommendation/{crop_id}", response_model=RecommendationResponse)
-async def get_recommendation(crop_id: str, image_id: str = None):
-    """Get recommendations for a specific crop based on soil analysis."""
+async def get_recommendation(
+    crop_id: str,
+    image_id: str = None,
+    deadline: Optional[float] = Query(None, gt=0, le=60, description="Latency budget in seconds"),
+):
+    """Get recommendations for a specific crop based on soil analysis.
+
+    With a deadline, the rule-based recommendations are returned if the AI
+    answer isn't ready in time; ``source`` in the response says which was used.
+    """
     try:
         # Get soil data and nutrient status if image_id provided
-        soil_data = None
-        nutrient_status = None
-        if image_id:
-            # First, check in-memory cache (results from /analyze-direct)
-            cached = ANALYSIS_CACHE.pop(image_id, None)
-            if cached:
-                soil_data, raw_values, status_info = cached
-                nutrient_status = analysis_service.get_nutrient_status(
-                    soil_data, raw_values, status_info
-                )
-            else:
-                # Fallback to legacy file-based flow if an image was uploaded/saved
-                image_path = UPLOAD_DIR / image_id
-                if image_path.exists():
-                    ocr_result = ocr_service.extract_text(str(image_path))
-                    # analyze_soil_card returns (soil_data, raw_values, status_info)
-                    soil_data, raw_values, status_info = analysis_service.analyze_soil_card(ocr_result)
-                    # Get nutrient status with color/status information
-                    nutrient_status = analysis_service.get_nutrient_status(soil_data, raw_values, status_info)
+        soil_data, nutrient_status = await load_soil_analysis(image_id)
+
+        if deadline is None and REC_DEADLINE_SECONDS > 0:
+            deadline = REC_DEADLINE_SECONDS
 
         # Get recommendations (now async with Gooey AI)
-        recommendations = await recommendation_service.get_recommendations(crop_id, soil_data, nutrient_status)
+        recommendations, source = await recommendation_service.recommend(
+            crop_id, soil_data, nutrient_status, deadline=deadline
+        )
 
-        return RecommendationResponse(
+        return api_response(RecommendationResponse(
             success=True,
             crop_id=crop_id,
             recommendations=recommendations,
-        )
+            source=source,
+        ))
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
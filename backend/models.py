@@ -89,6 +89,16 @@ class AnalysisResponse(BaseModel):
     message_kn: str
 
 
+class BatchAnalysisItem(BaseModel):
+    """One line of the /analyze-batch NDJSON stream."""
+
+    index: int  # Position of the image in the upload (zip members in archive order)
+    filename: str
+    success: bool
+    result: Optional[AnalysisResponse] = None
+    error: Optional[str] = None
+
+
 class Recommendation(BaseModel):
     """Single recommendation."""
 
@@ -108,3 +118,45 @@ class RecommendationResponse(BaseModel):
     success: bool
     crop_id: str
     recommendations: List[Recommendation]
+    source: Optional[str] = None  # "ai", "cache" or "rules"
+
+
+class BulkClassifyItem(BaseModel):
+    """One line of the /soil/classify-bulk NDJSON stream."""
+
+    index: int  # Position of the row in the upload (CSV header not counted)
+    success: bool
+    soil_data: Optional[SoilData] = None
+    nutrient_status: Optional[List[NutrientStatus]] = None
+    error: Optional[str] = None
+
+
+class BulkRecommendItem(BaseModel):
+    """One line of the /soil/recommend-bulk NDJSON stream."""
+
+    index: int
+    success: bool
+    crop_id: str
+    recommendations: Optional[List[Recommendation]] = None
+    error: Optional[str] = None
+
+
+class JobResponse(BaseModel):
+    """Accepted analysis job."""
+
+    success: bool
+    job_id: str
+    status: str  # "queued", "running", "done", "failed"
+    message: str
+    message_kn: str
+
+
+class JobStatusResponse(BaseModel):
+    """Analysis job status, with the result once the job is done."""
+
+    job_id: str
+    status: str
+    created_at: float
+    updated_at: float
+    result: Optional[AnalysisResponse] = None
+    error: Optional[str] = None
@@ -2,7 +2,25 @@
 
 import re
 from typing import List, Tuple, Dict
+
+import numpy as np
+
 from models import SoilData, NutrientStatus
+from services.thresholds import get_threshold_table
+from services.app_logging import get_logger
+from services.metrics import stage, CARD_PARAMS_FOUND, CARD_PARAM_FOUND
+from services.profiling import profiled
+
+logger = get_logger("analysis")
+
+# Value shapes in priority order: a range beats a comparison beats a decimal
+# beats an integer, wherever each occurs in the row.
+VALUE_PATTERNS = [
+    r"\d+\.?\d*\s*[-–]\s*\d+\.?\d*",  # Range: 5.0-5.5
+    r"[><]\s*\d+\.?\d*",              # Comparison: >0.6, <2
+    r"\d+\.?\d+",                      # Decimal: 0.75
+    r"\d+",                             # Integer: 140
+]
 
 
 class AnalysisService:
@@ -43,6 +61,19 @@ class AnalysisService:
         "ಕ್ಷಾರೀಯ": ("#F59E0B", "Alkaline"),
     }
 
+    # Compiled once per process. Each parameter's patterns are joined into one
+    # regex, which keeps the "first parameter (in order) matching anywhere in
+    # the row" rule with one scan per parameter instead of one per pattern.
+    _PARAM_REGEXES = [
+        (param, re.compile("|".join(patterns), re.IGNORECASE)) for param, patterns in PARAM_PATTERNS.items()
+    ]
+    _PARAM_REGEX = dict(_PARAM_REGEXES)
+    # Rest of a formula label a pattern matched only the start of, e.g. the
+    # "O5)" after "(P2" in "(P2O5)" or the "0)" after "(K2" in a misread "(K20)"
+    _LABEL_TAIL = re.compile(r"[A-Za-z0-9]*\)")
+    _VALUE_REGEXES = [re.compile(pattern) for pattern in VALUE_PATTERNS]
+    _STATUSES = [(status_kn, color, status_en) for status_kn, (color, status_en) in STATUS_MAP.items()]
+
     NUTRIENT_KN = {
         "ph": "ರಸಸಾರ (pH)",
         "ec": "ವಿದ್ಯುತ್ ವಾಹಕತೆ (EC)",
@@ -84,161 +115,62 @@ class AnalysisService:
 
     def _find_param(self, text: str) -> str:
         """Find which parameter this text refers to."""
-        for param, patterns in self.PARAM_PATTERNS.items():
-            for pattern in patterns:
-                if re.search(pattern, text, re.IGNORECASE):
-                    return param
+        for param, regex in self._PARAM_REGEXES:
+            if regex.search(text):
+                return param
         return None
 
     def _find_status(self, text: str) -> Tuple[str, str, str]:
         """Find status keyword in text and return (status_kn, color, status_en)."""
-        for status_kn, (color, status_en) in self.STATUS_MAP.items():
-            if status_kn in text:
-                return (status_kn, color, status_en)
+        for status in self._STATUSES:
+            if status[0] in text:
+                return status
         return ("ಪತ್ತೆಯಾಗಿಲ್ಲ", "#6B7280", "Not Found")
 
-    def _extract_value(self, text: str) -> str:
-        """Extract numeric value from text."""
-        # Look for patterns like: 5.0-5.5, >0.6, <2, 140-280, etc.
-        patterns = [
-            r'(\d+\.?\d*\s*[-–]\s*\d+\.?\d*)',  # Range: 5.0-5.5
-            r'([><]\s*\d+\.?\d*)',              # Comparison: >0.6, <2
-            r'(\d+\.?\d+)',                      # Decimal: 0.75
-            r'(\d+)',                            # Integer: 140
-        ]
-        for pattern in patterns:
-            m = re.search(pattern, text)
+    def _label_end(self, param: str, text: str) -> int:
+        """Index just past ``param``'s label in the row, e.g. after "ರಂಜಕ (P2O5)".
+
+        Label matches separated only by spaces count as one label, so the
+        digits of an oxide formula are never taken for the value.
+        """
+        end = None
+        for m in self._PARAM_REGEX[param].finditer(text):
+            if end is not None and text[end:m.start()].strip():
+                break
+            end = max(end or 0, m.end())
+            tail = self._LABEL_TAIL.match(text, end)
+            if tail:
+                end = tail.end()
+        return end or 0
+
+    def _extract_value(self, text: str, start: int = 0) -> str:
+        """Extract numeric value from text[start:], e.g. 5.0-5.5, >0.6, <2, 140 (see VALUE_PATTERNS)."""
+        for regex in self._VALUE_REGEXES:
+            m = regex.search(text, start)
             if m:
-                return m.group(1).replace(' ', '')
+                return m.group().replace(' ', '')
         return None
 
-    # Colors: RED=#EF4444, YELLOW=#F59E0B, GREEN=#10B981
-    RED = "#EF4444"
-    YELLOW = "#F59E0B"
-    GREEN = "#10B981"
-    GRAY = "#6B7280"
-
     def _get_status_from_value(self, param: str, value: float) -> Tuple[str, str, str]:
-        """Determine status from value using GKVK/UAS thresholds."""
-        if value is None:
-            return ("ಪತ್ತೆಯಾಗಿಲ್ಲ", self.GRAY, "Not Found")
-        
-        # pH - special handling with multiple ranges
-        if param == "ph":
-            if value < 5.5:
-                return ("ಆಮ್ಲೀಯ", self.RED, "Acidic")
-            elif value <= 6.5:
-                return ("ಸ್ವಲ್ಪ ಆಮ್ಲೀಯ", self.YELLOW, "Slightly Acidic")
-            elif value <= 7.5:
-                return ("ತಟಸ್ಥ", self.GREEN, "Neutral")
-            elif value <= 8.5:
-                return ("ಸ್ವಲ್ಪ ಕ್ಷಾರೀಯ", self.YELLOW, "Slightly Alkaline")
-            else:
-                return ("ಕ್ಷಾರೀಯ", self.RED, "Alkaline")
-        
-        # EC - Electrical Conductivity
-        if param == "ec":
-            if value < 1.0:
-                return ("ಸಾಮಾನ್ಯ", self.GREEN, "Normal")
-            elif value <= 2.0:
-                return ("ಸ್ವಲ್ಪ ಲವಣ", self.YELLOW, "Slightly Saline")
-            else:
-                return ("ಲವಣಯುಕ್ತ", self.RED, "Saline")
-        
-        # Organic Carbon
-        if param == "organic_carbon":
-            if value < 0.50:
-                return ("ಕಡಿಮೆ", self.RED, "Low")
-            elif value <= 0.75:
-                return ("ಮಧ್ಯಮ", self.YELLOW, "Medium")
-            else:
-                return ("ಹೆಚ್ಚು", self.GREEN, "High")
-        
-        # Nitrogen
-        if param == "nitrogen":
-            if value < 140:
-                return ("ಕಡಿಮೆ", self.RED, "Low")
-            elif value <= 280:
-                return ("ಮಧ್ಯಮ", self.YELLOW, "Medium")
-            else:
-                return ("ಹೆಚ್ಚು", self.GREEN, "High")
-        
-        # Phosphorus
-        if param == "phosphorus":
-            if value < 23:
-                return ("ಕಡಿಮೆ", self.RED, "Low")
-            elif value <= 57:
-                return ("ಮಧ್ಯಮ", self.YELLOW, "Medium")
-            else:
-                return ("ಹೆಚ್ಚು", self.GREEN, "High")
-        
-        # Potassium
-        if param == "potassium":
-            if value < 145:
-                return ("ಕಡಿಮೆ", self.RED, "Low")
-            elif value <= 337:
-                return ("ಮಧ್ಯಮ", self.YELLOW, "Medium")
-            else:
-                return ("ಹೆಚ್ಚು", self.GREEN, "High")
-        
-        # Sulphur
-        if param == "sulphur":
-            if value < 10:
-                return ("ಕಡಿಮೆ", self.RED, "Low")
-            elif value <= 20:
-                return ("ಮಧ್ಯಮ", self.YELLOW, "Medium")
-            else:
-                return ("ಹೆಚ್ಚು", self.GREEN, "High")
-        
-        # Zinc - critical limit based
-        if param == "zinc":
-            if value < 0.6:
-                return ("ಕೊರತೆ", self.RED, "Deficient")
-            else:
-                return ("ಸಾಕಷ್ಟು", self.GREEN, "Sufficient")
-        
-        # Boron
-        if param == "boron":
-            if value < 0.5:
-                return ("ಕೊರತೆ", self.RED, "Deficient")
-            elif value <= 1.0:
-                return ("ಮಧ್ಯಮ", self.YELLOW, "Medium")
-            else:
-                return ("ಸಾಕಷ್ಟು", self.GREEN, "Sufficient")
-        
-        # Iron - critical limit based
-        if param == "iron":
-            if value < 4.5:
-                return ("ಕೊರತೆ", self.RED, "Deficient")
-            else:
-                return ("ಸಾಕಷ್ಟು", self.GREEN, "Sufficient")
-        
-        # Manganese - critical limit based
-        if param == "manganese":
-            if value < 1.0:
-                return ("ಕೊರತೆ", self.RED, "Deficient")
-            else:
-                return ("ಸಾಕಷ್ಟು", self.GREEN, "Sufficient")
-        
-        # Copper - critical limit based
-        if param == "copper":
-            if value < 0.2:
-                return ("ಕೊರತೆ", self.RED, "Deficient")
-            else:
-                return ("ಸಾಕಷ್ಟು", self.GREEN, "Sufficient")
-        
-        return ("ಪತ್ತೆಯಾಗಿಲ್ಲ", self.GRAY, "Not Found")
+        """Determine status from value using GKVK/UAS thresholds (data/nutrient_thresholds.json)."""
+        return get_threshold_table().classify(param, value)
 
+    @profiled("analyze_soil_card")
     def analyze_soil_card(self, ocr_text: str) -> Tuple[SoilData, Dict, Dict]:
         """Parse OCR output to extract soil data."""
+        with stage("analyze_soil_card"):
+            soil_data, raw_values, status_info = self._analyze_soil_card(ocr_text)
+        found = [param for param in self.PARAM_ORDER if status_info[param][0] == "ocr"]
+        CARD_PARAMS_FOUND.observe(len(found))
+        for param in found:
+            CARD_PARAM_FOUND.inc(param=param)
+        return soil_data, raw_values, status_info
+
+    def _analyze_soil_card(self, ocr_text: str) -> Tuple[SoilData, Dict, Dict]:
         soil_data = SoilData()
         raw_values = {}
         status_info = {}
         
-        print(f"\n{'='*60}", flush=True)
-        print("ANALYZING OCR OUTPUT", flush=True)
-        print(f"{'='*60}", flush=True)
-        
         # Split into rows
         rows = ocr_text.strip().split('\n')
         
@@ -254,7 +186,7 @@ class AnalysisService:
                 continue
             
             # Extract value
-            value = self._extract_value(row)
+            value = self._extract_value(row, self._label_end(param, row))
             
             # Try to extract Kannada status
             status_kn, color, status_en = self._find_status(row)
@@ -272,10 +204,13 @@ class AnalysisService:
                 'row': row
             }
             
-            print(f"  Found {param}: value={value}", flush=True)
+            logger.debug("Found %s: value=%s", param, value)
         
         # Build output for all 12 parameters
-        print(f"\nRESULTS ({len(found)}/12 found):", flush=True)
+        logger.info(
+            f"Parsed card: {len(found)}/12 parameters found",
+            extra={"fields": {"found": len(found), "missing": [p for p in self.PARAM_ORDER if p not in found]}},
+        )
         for i, param in enumerate(self.PARAM_ORDER):
             if param in found:
                 d = found[param]
@@ -286,13 +221,11 @@ class AnalysisService:
                 setattr(soil_data, param, round(self._parse_value(raw), 2) if raw else None)
                 raw_values[param] = raw
                 status_info[param] = ("ocr", color, status_kn)
-                
-                print(f"  {i+1:02d}. {param:15s}: {raw:12s} | [status]", flush=True)
+                logger.debug("%02d. %-15s: %s", i + 1, param, raw)
             else:
                 status_info[param] = ("missing", "#6B7280", "ಪತ್ತೆಯಾಗಿಲ್ಲ")
-                print(f"  {i+1:02d}. {param:15s}: NOT FOUND", flush=True)
-        
-        print(f"{'='*60}\n", flush=True)
+                logger.debug("%02d. %-15s: NOT FOUND", i + 1, param)
+
         return soil_data, raw_values, status_info
 
     def get_nutrient_status(self, soil_data, raw_values=None, status_info=None):
@@ -316,3 +249,36 @@ class AnalysisService:
                 color=color,
             ))
         return result
+
+    def rate_soil_batch(self, rows: List[SoilData]) -> List[List[NutrientStatus]]:
+        """Nutrient status for many SoilData rows at once (no OCR involved).
+
+        Values are rated from the threshold table with one vectorized pass per
+        parameter; missing values come back as "Not Found".
+        """
+        table = get_threshold_table()
+        samples = np.array(
+            [[getattr(row, param) for param in self.PARAM_ORDER] for row in rows], dtype=np.float64
+        ).reshape(len(rows), len(self.PARAM_ORDER))
+        indices = table.classify_samples(samples, self.PARAM_ORDER)
+
+        columns = []
+        for column, param in enumerate(self.PARAM_ORDER):
+            status_kn, color, status_en = table.labels(param, indices[:, column])
+            columns.append((param, status_kn, color, status_en))
+
+        result = []
+        for i, row in enumerate(rows):
+            result.append([
+                NutrientStatus(
+                    nutrient=param.replace("_", " ").title(),
+                    nutrient_kn=self.NUTRIENT_KN.get(param, param),
+                    value=getattr(row, param),
+                    unit=self.UNITS.get(param, ""),
+                    status=status_en[i],
+                    status_kn=status_kn[i],
+                    color=color[i],
+                )
+                for param, status_kn, color, status_en in columns
+            ])
+        return result
@@ -0,0 +1,248 @@
+"""Application logging: a queue in front of a background writer thread.
+
+Callers (the event loop included) only put a record on a queue; a
+``QueueListener`` thread formats the records and writes them to a rotating
+file of JSON lines and, as plain text, to stdout. When the queue is full,
+new records are dropped and counted rather than blocking the caller.
+
+Extra structured fields go in ``extra={"fields": {...}}``::
+
+    logger = get_logger("ocr")
+    logger.info("OCR finished", extra={"fields": {"rows": 14, "ms": 812.4}})
+
+Child processes (OCR process pool, worker farm) log straight to stdout;
+only the parent process writes and rotates the file.
+"""
+
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional, TextIO
+
+from config import (
+    LOG_LEVEL,
+    LOG_FILE,
+    LOG_FILE_MAX_BYTES,
+    LOG_FILE_BACKUPS,
+    LOG_CONSOLE,
+    LOG_QUEUE_SIZE,
+)
+
+ROOT_LOGGER = "soiltrack"
+
+CONSOLE_FORMAT = "[%(asctime)s] %(levelname)s %(name)s: %(message)s"
+CONSOLE_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, msg, extra fields and exc."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records once ``max_size`` are waiting.
+
+    Uses a ``SimpleQueue`` (a C deque, much cheaper per put than
+    ``queue.Queue``); the size check is approximate under contention.
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, max_size: int):
+        super().__init__(log_queue)
+        self.max_size = max_size
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the args and render any traceback now (they may not survive
+        # until the writer gets to the record) and leave the formatting to
+        # the writer thread's handlers. Unlike the base class, the record is
+        # not copied: this handler is the only one on the "soiltrack" tree.
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+        else:
+            self.queue.put_nowait(record)
+
+
+_lock = threading.Lock()
+_state = {"pid": None, "handler": None, "listener": None}
+
+
+def configure_logging(
+    level: str = LOG_LEVEL,
+    log_file: Optional[str] = LOG_FILE,
+    max_bytes: int = LOG_FILE_MAX_BYTES,
+    backups: int = LOG_FILE_BACKUPS,
+    console: bool = LOG_CONSOLE,
+    console_stream: Optional[TextIO] = None,
+    queue_size: int = LOG_QUEUE_SIZE,
+    child: Optional[bool] = None,
+) -> logging.Logger:
+    """Set up the "soiltrack" logger tree; a later call replaces the setup.
+
+    In a child process (``child``, detected when not given) the file is
+    skipped and records go to the console directly.
+    """
+    if child is None:
+        child = multiprocessing.parent_process() is not None
+    with _lock:
+        _stop_listener()
+        root = logging.getLogger(ROOT_LOGGER)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+            handler.close()
+        root.setLevel(level)
+        root.propagate = False
+
+        handlers = []
+        if log_file and not child:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+            )
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+        if console:
+            console_handler = logging.StreamHandler(console_stream or sys.stdout)
+            console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT, CONSOLE_DATE_FORMAT))
+            handlers.append(console_handler)
+
+        if child:
+            for handler in handlers:
+                root.addHandler(handler)
+            _state.update(pid=os.getpid())
+            return root
+
+        queue_handler = DroppingQueueHandler(queue.SimpleQueue(), queue_size)
+        root.addHandler(queue_handler)
+        listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _state.update(pid=os.getpid(), handler=queue_handler, listener=listener)
+        return root
+
+
+def _stop_listener():
+    listener = _state["listener"]
+    if listener is not None and _state["pid"] == os.getpid():
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+    _state.update(handler=None, listener=None)
+
+
+def shutdown_logging():
+    """Write out the queued records and stop the writer thread."""
+    with _lock:
+        _stop_listener()
+
+
+def _after_fork_in_child():
+    # The writer thread does not survive a fork (and the lock may have been
+    # held by another thread); log to the console from here on
+    global _lock
+    _lock = threading.Lock()
+    if _state["pid"] is not None:
+        _state.update(handler=None, listener=None)
+        configure_logging(child=True)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """A logger under "soiltrack", configuring logging on first use."""
+    if _state["pid"] is None:
+        configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def logging_stats() -> dict:
+    """Queue depth and dropped records of this process's writer."""
+    handler = _state["handler"]
+    if handler is None:
+        return {"queued": 0, "dropped": 0}
+    return {"queued": handler.queue.qsize(), "dropped": handler.dropped}
+
+
+class RequestLogMiddleware:
+    """ASGI middleware logging one record per HTTP request.
+
+    A ``sample_rate`` share of requests is logged; 5xx answers and
+    exceptions always are. Plain ASGI rather than ``@app.middleware``, which
+    runs every request through an extra task and memory streams.
+    """
+
+    def __init__(self, app, logger: logging.Logger, sample_rate: float = 1.0, log_headers: bool = False):
+        self.app = app
+        self.logger = logger
+        self.sample_rate = sample_rate
+        self.log_headers = log_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = None
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception as e:
+            # The traceback is logged by the app's exception handler
+            self.logger.error(
+                "%s %s failed: %s: %s", scope["method"], scope["path"], type(e).__name__, e,
+                extra={"fields": {"method": scope["method"], "path": scope["path"]}},
+            )
+            raise
+
+        level = logging.ERROR if status is None or status >= 500 else logging.INFO
+        if not self.logger.isEnabledFor(level):
+            return
+        if level == logging.INFO and self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+        fields = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status,
+            "ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+        if self.log_headers:
+            fields["headers"] = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        self.logger.log(level, "%s %s -> %s", scope["method"], scope["path"], status, extra={"fields": fields})
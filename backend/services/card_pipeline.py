@@ -0,0 +1,70 @@
+"""Card pipeline - OCR plus soil card parsing as one worker-pool job."""
+
+from typing import Tuple, Dict, List, Optional
+from models import SoilData
+from services.ocr_service import OCRService
+from services.analysis_service import AnalysisService
+from services.app_logging import get_logger
+
+logger = get_logger("pipeline")
+
+# Built lazily so that process-pool workers create their own instances
+_services = None
+
+
+def get_services() -> Tuple[OCRService, AnalysisService]:
+    """Return the OCR and analysis services for this process."""
+    global _services
+    if _services is None:
+        _services = (OCRService(), AnalysisService())
+    return _services
+
+
+def analyze_card(image_input) -> Tuple[str, SoilData, Dict, Dict]:
+    """Run OCR and parse the soil card.
+
+    Module-level so it can be pickled into a process pool.
+
+    Returns:
+        (ocr_text, soil_data, raw_values, status_info)
+    """
+    ocr_service, analysis_service = get_services()
+
+    ocr_result = ocr_service.extract_text(image_input)
+    logger.debug(f"OCR result: {len(ocr_result)} chars extracted")
+
+    # Analyze soil data - extract values AND status text from OCR
+    soil_data, raw_values, status_info = analysis_service.analyze_soil_card(ocr_result)
+    logger.debug(f"Raw values found: {len(raw_values)}, status info (from OCR): {len(status_info)} items")
+
+    return ocr_result, soil_data, raw_values, status_info
+
+
+def analyze_card_batch(image_inputs: list) -> List[Tuple[Optional[Tuple[str, SoilData, Dict, Dict]], Optional[str]]]:
+    """Run batched OCR on several cards and parse each of them.
+
+    Returns:
+        One (analysis, error) pair per image, in input order; analysis is the
+        analyze_card tuple, or None with an error message if parsing failed
+    """
+    ocr_service, analysis_service = get_services()
+
+    outcomes = []
+    for ocr_result in ocr_service.extract_text_batch(image_inputs):
+        try:
+            soil_data, raw_values, status_info = analysis_service.analyze_soil_card(ocr_result)
+        except Exception as e:
+            outcomes.append((None, f"{type(e).__name__}: {e}"))
+            continue
+        outcomes.append(((ocr_result, soil_data, raw_values, status_info), None))
+    return outcomes
+
+
+def load_models() -> float:
+    """Load and warm up the OCR models in this process.
+
+    Returns:
+        Seconds spent loading
+    """
+    ocr_service, _ = get_services()
+    return ocr_service.load()
@@ -0,0 +1,221 @@
+"""Template-aware OCR for the GKVK soil health card table.
+
+The card has a fixed table with one row per parameter (AnalysisService.
+PARAM_ORDER). Instead of running text detection over the whole photo, the
+template reader finds the card outline and the table grid once and then runs
+recognition only on the value and status cells of those rows.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Row labels emitted for each parameter, in card order. They are what
+# AnalysisService._find_param matches, so each must resolve to its own row.
+ROW_LABELS = [
+    ("ph", "(pH)"),
+    ("ec", "(EC)"),
+    ("organic_carbon", "(OC)"),
+    ("nitrogen", "(N)"),
+    ("phosphorus", "(P2O5)"),
+    ("potassium", "(K2O)"),
+    ("sulphur", "(S)"),
+    ("zinc", "(Zn)"),
+    ("boron", "(B)"),
+    ("iron", "(Fe)"),
+    ("manganese", "(Mn)"),
+    ("copper", "(Cu)"),
+]
+
+VALUE_ALLOWLIST = "0123456789.-<>"
+
+
+def _merge_lines(positions: np.ndarray, min_gap: int = 4) -> List[int]:
+    """Collapse runs of adjacent line pixels into single line centres."""
+    lines = []
+    start = prev = None
+    for pos in positions:
+        if start is None:
+            start = prev = pos
+        elif pos - prev <= min_gap:
+            prev = pos
+        else:
+            lines.append((start + prev) // 2)
+            start = prev = pos
+    if start is not None:
+        lines.append((start + prev) // 2)
+    return lines
+
+
+def _order_corners(points: np.ndarray) -> np.ndarray:
+    """Order four points as top-left, top-right, bottom-right, bottom-left."""
+    points = points.reshape(4, 2).astype(np.float32)
+    sums = points.sum(axis=1)
+    diffs = np.diff(points, axis=1).ravel()
+    return np.array([
+        points[np.argmin(sums)],
+        points[np.argmin(diffs)],
+        points[np.argmax(sums)],
+        points[np.argmax(diffs)],
+    ], dtype=np.float32)
+
+
+class CardTemplateReader:
+    """Recognise only the value/status cells of the parameter table.
+
+    ``read`` returns detections in the same ``(box, text, confidence)`` shape
+    as ``reader.readtext`` - one per label, value and status cell - so the
+    normal row grouping applies, or None when the grid cannot be found and
+    the caller should fall back to full-page OCR.
+    """
+
+    def __init__(
+        self,
+        header_rows: int = 1,
+        value_column: int = 2,
+        status_column: int = 3,
+        cell_cache_size: int = 4096,
+    ):
+        self.header_rows = header_rows
+        self.value_column = value_column
+        self.status_column = status_column
+        self.cell_cache_size = cell_cache_size
+        # sha1(cell pixels + kind) -> (text, confidence)
+        self._cell_cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fingerprint(self) -> dict:
+        """Settings that change the OCR output (used in cache keys)."""
+        return {
+            "header_rows": self.header_rows,
+            "value_column": self.value_column,
+            "status_column": self.status_column,
+        }
+
+    def locate_card(self, gray: np.ndarray) -> np.ndarray:
+        """Warp the card outline to an upright rectangle, or return the input."""
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        edges = cv2.Canny(blurred, 50, 150)
+        edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return gray
+
+        outline = max(contours, key=cv2.contourArea)
+        if cv2.contourArea(outline) < 0.3 * gray.shape[0] * gray.shape[1]:
+            return gray
+        approx = cv2.approxPolyDP(outline, 0.02 * cv2.arcLength(outline, True), True)
+        if len(approx) != 4:
+            return gray
+
+        corners = _order_corners(approx)
+        width = int(max(np.linalg.norm(corners[0] - corners[1]), np.linalg.norm(corners[3] - corners[2])))
+        height = int(max(np.linalg.norm(corners[0] - corners[3]), np.linalg.norm(corners[1] - corners[2])))
+        target = np.array([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]], dtype=np.float32)
+        matrix = cv2.getPerspectiveTransform(corners, target)
+        return cv2.warpPerspective(gray, matrix, (width, height))
+
+    def locate_grid(self, gray: np.ndarray) -> Optional[Tuple[List[int], List[int]]]:
+        """Find horizontal and vertical table line positions."""
+        height, width = gray.shape[:2]
+        binary = cv2.adaptiveThreshold(
+            gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 15, 10
+        )
+        horizontal = cv2.morphologyEx(
+            binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (max(10, width // 20), 1))
+        )
+        vertical = cv2.morphologyEx(
+            binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(10, height // 40)))
+        )
+
+        row_ink = horizontal.sum(axis=1) / 255
+        ys = _merge_lines(np.where(row_ink > 0.4 * width)[0])
+        if len(ys) < 2:
+            return None
+        table_height = ys[-1] - ys[0]
+        col_ink = vertical[ys[0]:ys[-1]].sum(axis=0) / 255
+        xs = _merge_lines(np.where(col_ink > 0.5 * table_height)[0])
+        return ys, xs
+
+    def _cells(self, ys: List[int], xs: List[int]) -> Optional[List[Tuple[List[int], List[int], List[int]]]]:
+        """(label, value, status) boxes as [x_min, x_max, y_min, y_max] per parameter row."""
+        rows = [(top, bottom) for top, bottom in zip(ys, ys[1:]) if bottom - top >= 8]
+        columns = [(left, right) for left, right in zip(xs, xs[1:]) if right - left >= 8]
+        param_rows = rows[self.header_rows:self.header_rows + len(ROW_LABELS)]
+        if len(param_rows) < len(ROW_LABELS) or len(columns) <= max(self.value_column, self.status_column):
+            return None
+
+        pad = 3
+        cells = []
+        for top, bottom in param_rows:
+            def box(column):
+                left, right = columns[column]
+                return [left + pad, right - pad, top + pad, bottom - pad]
+            label_box = [columns[0][0] + pad, columns[0][0] + pad + 1, top + pad, bottom - pad]
+            cells.append((label_box, box(self.value_column), box(self.status_column)))
+        return cells
+
+    def _cache_key(self, gray: np.ndarray, box: List[int], kind: str) -> str:
+        x_min, x_max, y_min, y_max = box
+        crop = np.ascontiguousarray(gray[y_min:y_max, x_min:x_max])
+        digest = hashlib.sha1(kind.encode("utf-8"))
+        digest.update(str(crop.shape).encode("utf-8"))
+        digest.update(crop.tobytes())
+        return digest.hexdigest()
+
+    def _recognize(self, reader, gray: np.ndarray, boxes: List[List[int]], kind: str) -> List[Tuple[str, float]]:
+        """Recognise ``boxes``, skipping cells whose pixels were seen before."""
+        keys = [self._cache_key(gray, box, kind) for box in boxes]
+        results = [None] * len(boxes)
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._cell_cache:
+                    self._cell_cache.move_to_end(key)
+                    results[i] = self._cell_cache[key]
+
+        todo = [i for i, r in enumerate(results) if r is None]
+        if todo:
+            recognized = reader.recognize(
+                gray,
+                horizontal_list=[boxes[i] for i in todo],
+                free_list=[],
+                allowlist=VALUE_ALLOWLIST if kind == "value" else None,
+            )
+            # recognize() re-sorts its input, so match results back by top-left corner
+            by_corner = {(int(box[0][0]), int(box[0][1])): (text, float(conf)) for box, text, conf in recognized}
+            with self._lock:
+                for i in todo:
+                    x_min, _, y_min, _ = boxes[i]
+                    results[i] = by_corner.get((x_min, y_min), ("", 0.0))
+                    self._cell_cache[keys[i]] = results[i]
+                while len(self._cell_cache) > self.cell_cache_size:
+                    self._cell_cache.popitem(last=False)
+        return results
+
+    def read(self, reader, image: np.ndarray) -> Optional[list]:
+        """Recognise the parameter table, or None if the grid was not found."""
+        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if image.ndim == 3 else image
+        gray = self.locate_card(gray)
+        grid = self.locate_grid(gray)
+        if grid is None:
+            return None
+        cells = self._cells(*grid)
+        if cells is None:
+            return None
+
+        values = self._recognize(reader, gray, [value for _, value, _ in cells], "value")
+        statuses = self._recognize(reader, gray, [status for _, _, status in cells], "status")
+
+        detections = []
+        for (_, label), (label_box, value_box, status_box), value, status in zip(ROW_LABELS, cells, values, statuses):
+            for (x_min, x_max, y_min, y_max), (text, confidence) in (
+                (label_box, (label, 1.0)), (value_box, value), (status_box, status)
+            ):
+                if text:
+                    box = [[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]]
+                    detections.append((box, text, confidence))
+        return detections
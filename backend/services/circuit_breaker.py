@@ -0,0 +1,129 @@
+"""Circuit breaker for upstream calls, driven by a rolling error-rate/latency window."""
+
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stop calling an upstream that is failing or too slow.
+
+    Outcomes of the last ``window_seconds`` are kept. Once at least
+    ``min_calls`` are in the window and the share of failures reaches
+    ``error_rate_threshold`` (or the share of calls slower than
+    ``slow_call_seconds`` reaches ``slow_rate_threshold``) the circuit
+    opens and ``allow`` returns False for ``open_seconds``. After that it is
+    half-open: up to ``half_open_probes`` calls go through, and the first
+    result decides whether it closes again or re-opens.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 60.0,
+        min_calls: int = 5,
+        error_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 15.0,
+        slow_rate_threshold: float = 0.5,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+    ):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate_threshold = slow_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        # (finished_at, ok, slow)
+        self._window = deque()
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now. Every allowed call must be recorded or discarded."""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok: bool, latency: float) -> None:
+        """Record the outcome of an allowed call."""
+        now = time.monotonic()
+        slow = latency >= self.slow_call_seconds
+        with self._lock:
+            state = self._current_state(now)
+            if state == HALF_OPEN:
+                if ok and not slow:
+                    self._state = CLOSED
+                    self._window.clear()
+                else:
+                    self._open(now)
+                return
+            if state == OPEN:
+                return  # A call that started before the circuit opened
+
+            self._window.append((now, ok, slow))
+            while self._window and now - self._window[0][0] > self.window_seconds:
+                self._window.popleft()
+
+            calls = len(self._window)
+            if calls < self.min_calls:
+                return
+            failures = sum(1 for _, call_ok, _ in self._window if not call_ok)
+            slow_calls = sum(1 for _, _, call_slow in self._window if call_slow)
+            if failures / calls >= self.error_rate_threshold or slow_calls / calls >= self.slow_rate_threshold:
+                self._open(now)
+
+    def discard(self) -> None:
+        """Give back an allowed call that ended without an outcome (the caller went away)."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def _open(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._window.clear()
+        self.times_opened += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            calls = len(self._window)
+            failures = sum(1 for _, ok, _ in self._window if not ok)
+            slow_calls = sum(1 for _, _, slow in self._window if slow)
+            return {
+                "state": state,
+                "window_calls": calls,
+                "window_error_rate": round(failures / calls, 3) if calls else 0.0,
+                "window_slow_rate": round(slow_calls / calls, 3) if calls else 0.0,
+                "open_remaining_seconds": round(max(0.0, self.open_seconds - (now - self._opened_at)), 1) if state == OPEN else 0.0,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+            }
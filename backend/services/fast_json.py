@@ -0,0 +1,113 @@
+"""Fast JSON responses with gzip/brotli compression.
+
+``FastJSONResponse`` serializes its content once: pydantic models through
+pydantic-core (``model_dump_json``), everything else through orjson when it
+is installed. Returning one from an endpoint also skips FastAPI's
+response_model step, which would otherwise dump the model, validate the
+dump against the model again and then encode it with ``jsonable_encoder``.
+Only use it for models we built ourselves from validated data. (Recent
+FastAPI versions already serialize a response_model with pydantic-core;
+the older path, and routes without a response_model, go through
+``jsonable_encoder`` and ``json.dumps``.)
+
+Bodies of at least RESPONSE_COMPRESSION_MIN_BYTES are compressed with the
+best encoding the client accepts (br, then gzip). Kannada text is three
+bytes per character in UTF-8 and compresses well.
+"""
+
+import gzip
+import json
+from typing import Any, Optional
+
+from pydantic import BaseModel
+from starlette.datastructures import Headers
+from starlette.responses import Response
+
+from config import RESPONSE_COMPRESSION_MIN_BYTES, RESPONSE_GZIP_LEVEL, RESPONSE_BROTLI_QUALITY
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _default(obj):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """UTF-8 JSON for a pydantic model or plain JSON-able content."""
+    if isinstance(content, BaseModel):
+        return content.__pydantic_serializer__.to_json(content)
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def supported_encodings() -> tuple:
+    """Content codings this process can produce, best first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """The coding to use for an Accept-Encoding header, or None for identity.
+
+    The highest q-value wins; ties go to the order of ``supported_encodings``.
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in supported_encodings():
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=RESPONSE_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL, mtime=0)
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered by ``dumps`` and compressed per Accept-Encoding."""
+
+    media_type = "application/json"
+
+    def __init__(self, content: Any, *args, min_compress_bytes: int = RESPONSE_COMPRESSION_MIN_BYTES, **kwargs):
+        self.min_compress_bytes = min_compress_bytes
+        super().__init__(content, *args, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if self.min_compress_bytes > 0 and len(self.body) >= self.min_compress_bytes and "content-encoding" not in self.headers:
+            encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+            if encoding:
+                self.body = compress(self.body, encoding)
+                self.headers["content-encoding"] = encoding
+                self.headers["content-length"] = str(len(self.body))
+            self.headers.add_vary_header("Accept-Encoding")
+        await super().__call__(scope, receive, send)
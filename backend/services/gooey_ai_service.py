@@ -1,27 +1,126 @@
 """Service for integrating with Gooey AI's FarmerCHAT API."""
 
+import asyncio
+import hashlib
+import importlib.util
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 import httpx
 import json
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List
 from models import SoilData, Recommendation, NutrientStatus
-from config import GOOEY_AI_API_KEY, GOOEY_AI_BASE_URL, FARMERCHAT_MODEL
+from services.single_flight import SingleFlight
+from services.json_stream import ArrayItemStreamParser
+from services.circuit_breaker import CircuitBreaker
+from services.app_logging import get_logger
+from services.metrics import STAGE_SECONDS, UPSTREAM_RESPONSES
+from config import (
+    GOOEY_AI_API_KEY,
+    GOOEY_AI_BASE_URL,
+    FARMERCHAT_MODEL,
+    GOOEY_AI_CONNECT_TIMEOUT,
+    GOOEY_AI_READ_TIMEOUT,
+    GOOEY_AI_MAX_CONNECTIONS,
+    GOOEY_AI_MAX_KEEPALIVE,
+    GOOEY_AI_KEEPALIVE_EXPIRY,
+    GOOEY_AI_HTTP2,
+    GOOEY_AI_MAX_CONCURRENCY,
+    GOOEY_AI_STREAM_PATH,
+    GOOEY_AI_MAX_RETRIES,
+    GOOEY_AI_RETRY_BASE_DELAY,
+    GOOEY_AI_RETRY_MAX_DELAY,
+    GOOEY_AI_BREAKER_WINDOW_SECONDS,
+    GOOEY_AI_BREAKER_MIN_CALLS,
+    GOOEY_AI_BREAKER_ERROR_RATE,
+    GOOEY_AI_BREAKER_SLOW_CALL_SECONDS,
+    GOOEY_AI_BREAKER_SLOW_RATE,
+    GOOEY_AI_BREAKER_OPEN_SECONDS,
+)
 
-# Import log function from main
-try:
-    from main import log
-except ImportError:
-    # Fallback if main is not available
-    def log(msg):
-        print(f"[GooeyAI] {msg}")
+logger = get_logger("gooey_ai")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Gooey AI while the circuit breaker is open."""
 
 
 class GooeyAIService:
     """Service for interacting with Gooey AI's FarmerCHAT."""
 
-    def __init__(self):
-        self.api_key = GOOEY_AI_API_KEY
-        self.base_url = GOOEY_AI_BASE_URL
+    def __init__(
+        self,
+        api_key: str = GOOEY_AI_API_KEY,
+        base_url: str = GOOEY_AI_BASE_URL,
+        max_concurrency: int = GOOEY_AI_MAX_CONCURRENCY,
+        http2: bool = GOOEY_AI_HTTP2,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        # Empty: no streaming endpoint, stream_recommendations must not be used
+        self.stream_path = GOOEY_AI_STREAM_PATH
         self.model = FARMERCHAT_MODEL
+        self.max_concurrency = max_concurrency
+        # HTTP/2 needs the optional "h2" package (httpx[http2])
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        if http2 and not self.http2:
+            logger.warning("h2 package not installed - Gooey AI client will use HTTP/1.1")
+        # Shared, pooled client - opened in the app lifespan (or on first use)
+        self._client: Optional[httpx.AsyncClient] = None
+        # Caps concurrent upstream calls; extra callers queue here
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = 0
+        self._calls = 0
+        # Concurrent requests with byte-identical prompts share one upstream call
+        self._flights = SingleFlight()
+        # Skip the upstream entirely while it is failing or too slow
+        self.breaker = CircuitBreaker(
+            window_seconds=GOOEY_AI_BREAKER_WINDOW_SECONDS,
+            min_calls=GOOEY_AI_BREAKER_MIN_CALLS,
+            error_rate_threshold=GOOEY_AI_BREAKER_ERROR_RATE,
+            slow_call_seconds=GOOEY_AI_BREAKER_SLOW_CALL_SECONDS,
+            slow_rate_threshold=GOOEY_AI_BREAKER_SLOW_RATE,
+            open_seconds=GOOEY_AI_BREAKER_OPEN_SECONDS,
+        )
+        self._retries = 0
+
+    def open(self) -> httpx.AsyncClient:
+        """Create the pooled HTTP client if it isn't open yet."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers={
+                    "Authorization": f"bearer {self.api_key}",  # Gooey AI uses lowercase "bearer"
+                    "Content-Type": "application/json",
+                },
+                timeout=httpx.Timeout(
+                    GOOEY_AI_READ_TIMEOUT, connect=GOOEY_AI_CONNECT_TIMEOUT, pool=GOOEY_AI_READ_TIMEOUT
+                ),
+                limits=httpx.Limits(
+                    max_connections=GOOEY_AI_MAX_CONNECTIONS,
+                    max_keepalive_connections=GOOEY_AI_MAX_KEEPALIVE,
+                    keepalive_expiry=GOOEY_AI_KEEPALIVE_EXPIRY,
+                ),
+                http2=self.http2,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the pooled client and its connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {
+            "http2": self.http2,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "calls": self._calls,
+            "retries": self._retries,
+            "single_flight": self._flights.stats(),
+            "circuit_breaker": self.breaker.stats(),
+        }
 
     def _format_soil_data(self, soil_data: SoilData) -> str:
         """Format soil data into a readable string for the AI."""
@@ -153,115 +252,295 @@ Make recommendations practical, specific, calculation-based, and suitable for Ka
             List of recommendations from FarmerCHAT
         """
         if not self.api_key:
-            log("Gooey AI API key not configured. Skipping AI recommendations.")
+            logger.warning("Gooey AI API key not configured. Skipping AI recommendations.")
             return None  # Return None to trigger fallback to default recommendations
         
         prompt = self._create_prompt(crop_name, crop_name_kn, soil_data, nutrient_status)
-        
+        fingerprint = hashlib.sha256(f"{self.model}\n{prompt}".encode("utf-8")).hexdigest()
+
+        recommendations = await self._flights.do(fingerprint, lambda: self._call_farmerchat(prompt))
+        # Coalesced callers get the same list - hand each one its own copies
+        return [rec.model_copy() for rec in recommendations] if recommendations else recommendations
+
+    async def _call_farmerchat(self, prompt: str) -> Optional[List[Recommendation]]:
+        """Send one prompt to FarmerCHAT and parse the recommendations."""
         try:
             # Gooey AI API call
             # Based on Gooey AI dashboard, the endpoint is /v2/video-bots?example_id={example_id}
             # The model ID in config is actually the example_id
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Gooey AI uses /v2/video-bots endpoint with example_id as query parameter
-                endpoint = f"{self.base_url}/video-bots?example_id={self.model}"
-                
-                # Gooey AI payload format - based on dashboard example
-                payload = {
-                    "input_prompt": prompt,
-                    "messages": [],
-                }
+            # Gooey AI uses /v2/video-bots endpoint with example_id as query parameter
+            endpoint = f"{self.base_url}/video-bots?example_id={self.model}"
+            
+            # Gooey AI payload format - based on dashboard example
+            payload = {
+                "input_prompt": prompt,
+                "messages": [],
+            }
+            
+            logger.info(f"Calling Gooey AI endpoint: {endpoint}")
+            logger.debug(f"Payload keys: {list(payload.keys())}")
+            
+            response = await self._post_with_retry(endpoint, payload)
+            
+            logger.info(f"Gooey AI response status: {response.status_code}")
+            
+            if response.status_code == 200:
+                result = response.json()
+                logger.debug(f"Gooey AI success! Response keys: {list(result.keys()) if isinstance(result, dict) else 'not a dict'}")
                 
-                log(f"Calling Gooey AI endpoint: {endpoint}")
-                log(f"Payload keys: {list(payload.keys())}")
+                # Parse the response - Gooey AI returns: {"output": {"output_text": ["..."]}}
+                output = result.get("output", {})
+                output_text_array = output.get("output_text", [])
                 
-                response = await client.post(
-                    endpoint,
-                    headers={
-                        "Authorization": f"bearer {self.api_key}",  # Gooey AI uses lowercase "bearer"
-                        "Content-Type": "application/json",
-                    },
-                    json=payload,
-                )
+                if not output_text_array:
+                    logger.warning("Gooey AI response has no output_text")
+                    return self._get_fallback_recommendations()
                 
-                log(f"Gooey AI response status: {response.status_code}")
+                # Get the first output text (the AI's response)
+                ai_response = output_text_array[0] if isinstance(output_text_array, list) else str(output_text_array)
+                logger.debug(f"Gooey AI response text length: {len(ai_response)}")
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    log(f"Gooey AI success! Response keys: {list(result.keys()) if isinstance(result, dict) else 'not a dict'}")
+                # Try to parse JSON from the response
+                try:
+                    # Try to find JSON in the response text
+                    json_start = ai_response.find("{")
+                    json_end = ai_response.rfind("}") + 1
+                    
+                    if json_start >= 0 and json_end > json_start:
+                        # Extract JSON portion
+                        json_str = ai_response[json_start:json_end]
+                        parsed = json.loads(json_str)
+                    else:
+                        # If no JSON found, try parsing the whole response
+                        parsed = json.loads(ai_response)
                     
-                    # Parse the response - Gooey AI returns: {"output": {"output_text": ["..."]}}
-                    output = result.get("output", {})
-                    output_text_array = output.get("output_text", [])
+                    recommendations_data = parsed.get("recommendations", [])
                     
-                    if not output_text_array:
-                        log("Gooey AI response has no output_text")
+                    if not recommendations_data:
+                        logger.warning("No recommendations found in parsed JSON")
                         return self._get_fallback_recommendations()
                     
-                    # Get the first output text (the AI's response)
-                    ai_response = output_text_array[0] if isinstance(output_text_array, list) else str(output_text_array)
-                    log(f"Gooey AI response text length: {len(ai_response)}")
+                    # Convert to Recommendation objects
+                    recommendations = [self._to_recommendation(rec) for rec in recommendations_data]
                     
-                    # Try to parse JSON from the response
-                    try:
-                        # Try to find JSON in the response text
-                        json_start = ai_response.find("{")
-                        json_end = ai_response.rfind("}") + 1
-                        
-                        if json_start >= 0 and json_end > json_start:
-                            # Extract JSON portion
-                            json_str = ai_response[json_start:json_end]
-                            parsed = json.loads(json_str)
-                        else:
-                            # If no JSON found, try parsing the whole response
-                            parsed = json.loads(ai_response)
-                        
-                        recommendations_data = parsed.get("recommendations", [])
-                        
-                        if not recommendations_data:
-                            log("No recommendations found in parsed JSON")
-                            return self._get_fallback_recommendations()
-                        
-                        # Convert to Recommendation objects
-                        recommendations = []
-                        for rec in recommendations_data:
-                            recommendations.append(Recommendation(
-                                title=rec.get("title", "Recommendation"),
-                                title_kn=rec.get("title_kn", "ಶಿಫಾರಸು"),
-                                description=rec.get("description", ""),
-                                description_kn=rec.get("description_kn", ""),
-                                fertilizer=rec.get("fertilizer"),
-                                fertilizer_kn=rec.get("fertilizer_kn"),
-                                dosage=rec.get("dosage"),
-                                dosage_kn=rec.get("dosage_kn"),
-                            ))
-                        
-                        log(f"Successfully parsed {len(recommendations)} recommendations from Gooey AI")
-                        return recommendations
-                        
-                    except (json.JSONDecodeError, KeyError) as e:
-                        log(f"Failed to parse AI response as JSON: {e}")
-                        log(f"AI Response (first 500 chars): {str(ai_response)[:500]}")
-                        # Fallback to default recommendations
-                        return self._get_fallback_recommendations()
-                else:
-                    error_text = response.text[:500]
-                    log(f"Gooey AI error: Status {response.status_code}: {error_text}")
-                    response.raise_for_status()
-                    return self._get_fallback_recommendations()
+                    logger.info(f"Successfully parsed {len(recommendations)} recommendations from Gooey AI")
+                    return recommendations
                     
+                except (json.JSONDecodeError, KeyError) as e:
+                    logger.warning(f"Failed to parse AI response as JSON: {e}")
+                    logger.debug(f"AI Response (first 500 chars): {str(ai_response)[:500]}")
+                    # Fallback to default recommendations
+                    return self._get_fallback_recommendations()
+            else:
+                error_text = response.text[:500]
+                logger.error(f"Gooey AI error: Status {response.status_code}: {error_text}")
+                response.raise_for_status()
+                return self._get_fallback_recommendations()
+                
+        except CircuitOpenError:
+            logger.warning("Gooey AI circuit is open - skipping AI recommendations")
+            return None
         except httpx.HTTPError as e:
-            log(f"Gooey AI API error: {e}")
-            log(f"NOTE: If you see 404 errors, the model ID '{self.model}' might be incorrect.")
-            log(f"Check your Gooey AI dashboard for the correct model ID and update FARMERCHAT_MODEL in config.py")
+            logger.error(f"Gooey AI API error: {e}")
+            logger.info(f"NOTE: If you see 404 errors, the model ID '{self.model}' might be incorrect.")
+            logger.info(f"Check your Gooey AI dashboard for the correct model ID and update FARMERCHAT_MODEL in config.py")
             # Fallback to default recommendations
             return self._get_fallback_recommendations()
         except Exception as e:
-            log(f"Unexpected error calling Gooey AI: {e}")
-            import traceback
-            log(traceback.format_exc())
+            logger.exception(f"Unexpected error calling Gooey AI: {e}")
             return self._get_fallback_recommendations()
 
+    async def _post_with_retry(self, endpoint: str, payload: dict) -> httpx.Response:
+        """POST through the circuit breaker, retrying 429/5xx and connect errors.
+
+        Retries use exponential backoff with full jitter, or the server's
+        Retry-After when given. A Retry-After beyond GOOEY_AI_RETRY_MAX_DELAY
+        is not waited out - the response is returned as is.
+
+        Raises:
+            CircuitOpenError: the breaker is open (checked before every attempt)
+        """
+        client = self.open()
+        for attempt in range(GOOEY_AI_MAX_RETRIES + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError("Gooey AI circuit is open")
+            last_attempt = attempt == GOOEY_AI_MAX_RETRIES
+            start = time.perf_counter()
+            recorded = False
+            async with self._semaphore:
+                self._in_flight += 1
+                self._calls += 1
+                try:
+                    response = await client.post(endpoint, json=payload)
+                except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                    self.breaker.record(False, time.perf_counter() - start)
+                    recorded = True
+                    UPSTREAM_RESPONSES.inc(upstream="gooey_ai", status="error")
+                    if last_attempt:
+                        raise
+                    response = None
+                    logger.warning(f"Gooey AI connect failed ({e})")
+                except httpx.HTTPError:
+                    self.breaker.record(False, time.perf_counter() - start)
+                    recorded = True
+                    UPSTREAM_RESPONSES.inc(upstream="gooey_ai", status="error")
+                    raise
+                else:
+                    retryable = response.status_code == 429 or response.status_code >= 500
+                    self.breaker.record(not retryable, time.perf_counter() - start)
+                    recorded = True
+                    UPSTREAM_RESPONSES.inc(upstream="gooey_ai", status=response.status_code)
+                finally:
+                    self._in_flight -= 1
+                    # A cancelled or otherwise aborted call says nothing about
+                    # the upstream, but must give back a half-open probe slot
+                    if not recorded:
+                        self.breaker.discard()
+                    STAGE_SECONDS.observe(time.perf_counter() - start, stage="gooey_ai")
+
+            if response is not None:
+                if not retryable or last_attempt:
+                    return response
+            delay = self._retry_delay(response, attempt)
+            if delay is None:
+                return response
+            logger.warning(f"Gooey AI attempt {attempt + 1} failed, retrying in {delay:.1f}s")
+            self._retries += 1
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _retry_delay(response: Optional[httpx.Response], attempt: int) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None to give up."""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                delay = max(0.0, delay)
+                return delay if delay <= GOOEY_AI_RETRY_MAX_DELAY else None
+        # Full jitter keeps many clients from retrying in lockstep
+        return random.uniform(0, min(GOOEY_AI_RETRY_MAX_DELAY, GOOEY_AI_RETRY_BASE_DELAY * 2 ** attempt))
+
+    async def stream_recommendations(
+        self, crop_name: str, crop_name_kn: str, soil_data: Optional[SoilData] = None, nutrient_status: Optional[List[NutrientStatus]] = None
+    ) -> AsyncIterator[Recommendation]:
+        """Yield FarmerCHAT recommendations one by one as the answer streams in.
+
+        Only for a configured ``stream_path``. Raises httpx.HTTPError if the
+        streaming endpoint is unavailable, so callers can fall back to
+        get_recommendations.
+        """
+        if not self.api_key:
+            logger.warning("Gooey AI API key not configured. Skipping AI recommendations.")
+            return
+
+        prompt = self._create_prompt(crop_name, crop_name_kn, soil_data, nutrient_status)
+        endpoint = f"{self.base_url}{self.stream_path}?example_id={self.model}"
+        payload = {
+            "input_prompt": prompt,
+            "messages": [],
+        }
+        parser = ArrayItemStreamParser()
+        logger.info(f"Streaming from Gooey AI endpoint: {endpoint}")
+
+        if not self.breaker.allow():
+            raise CircuitOpenError("Gooey AI circuit is open")
+        client = self.open()
+        start = time.perf_counter()
+        failed = answered = finished = False
+        async with self._semaphore:
+            self._in_flight += 1
+            self._calls += 1
+            try:
+                async with client.stream(
+                    "POST", endpoint, json=payload, headers={"Accept": "text/event-stream"}
+                ) as response:
+                    answered = True
+                    UPSTREAM_RESPONSES.inc(upstream="gooey_ai", status=response.status_code)
+                    response.raise_for_status()
+                    async for text in self._iter_stream_text(response):
+                        for rec in parser.feed(text):
+                            yield self._to_recommendation(rec)
+                finished = True
+            except httpx.HTTPError as e:
+                # As in _post_with_retry, only 429/5xx answers and transport
+                # errors count against the breaker; a 4xx is not an outage
+                status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+                failed = status is None or status == 429 or status >= 500
+                if not answered:
+                    UPSTREAM_RESPONSES.inc(upstream="gooey_ai", status="error")
+                raise
+            finally:
+                self._in_flight -= 1
+                # A consumer that went away mid-stream (GeneratorExit,
+                # CancelledError) says nothing about the upstream
+                if finished or failed:
+                    self.breaker.record(not failed, time.perf_counter() - start)
+                else:
+                    self.breaker.discard()
+                STAGE_SECONDS.observe(time.perf_counter() - start, stage="gooey_ai_stream")
+
+    @staticmethod
+    async def _iter_stream_text(response: httpx.Response) -> AsyncIterator[str]:
+        """Yield new output text from a streamed response.
+
+        Server-sent events may carry the text as a delta or as the whole
+        output so far, either raw or as JSON with an output_text field;
+        cumulative text is reduced to the new part. Any other content type
+        is read as a plain chunked body.
+        """
+        if "text/event-stream" not in response.headers.get("content-type", ""):
+            async for chunk in response.aiter_text():
+                yield chunk
+            return
+
+        seen = ""
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if not data or data == "[DONE]":
+                continue
+            try:
+                event = json.loads(data)
+            except json.JSONDecodeError:
+                event = data
+            if isinstance(event, dict):
+                output = event.get("output", event)
+                text = output.get("output_text", "") if isinstance(output, dict) else ""
+                if isinstance(text, list):
+                    text = text[0] if text else ""
+            else:
+                text = str(event)
+            if not text:
+                continue
+            if seen and text.startswith(seen):
+                delta = text[len(seen):]
+                seen = text
+            else:
+                delta = text
+                seen += text
+            if delta:
+                yield delta
+
+    @staticmethod
+    def _to_recommendation(rec: dict) -> Recommendation:
+        return Recommendation(
+            title=rec.get("title", "Recommendation"),
+            title_kn=rec.get("title_kn", "ಶಿಫಾರಸು"),
+            description=rec.get("description", ""),
+            description_kn=rec.get("description_kn", ""),
+            fertilizer=rec.get("fertilizer"),
+            fertilizer_kn=rec.get("fertilizer_kn"),
+            dosage=rec.get("dosage"),
+            dosage_kn=rec.get("dosage_kn"),
+        )
+
     def _get_fallback_recommendations(self) -> List[Recommendation]:
         """Return fallback recommendations if AI call fails."""
         return [
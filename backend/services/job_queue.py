@@ -0,0 +1,329 @@
+"""Asynchronous analysis jobs - persistent job table plus an in-process worker queue."""
+
+import asyncio
+import ipaddress
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Collection, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from services.app_logging import get_logger
+
+logger = get_logger("jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+async def check_callback_url(url: str, allowed_hosts: Collection[str] = ()) -> None:
+    """Refuse callback URLs that would make the server call into its own network.
+
+    With ``allowed_hosts`` the host must be one of them; otherwise every
+    address it resolves to must be public, which rules out loopback,
+    private, link-local (cloud metadata) and reserved addresses.
+
+    Raises:
+        ValueError: the URL is not allowed, with the reason
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("callback_url must be an http(s) URL")
+    host = parts.hostname.lower()
+    if allowed_hosts:
+        if host not in allowed_hosts:
+            raise ValueError(f"callback host {host} is not allowed")
+        return
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (OSError, ValueError):
+        raise ValueError(f"callback host {host} does not resolve")
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%")[0])
+        if not address.is_global:
+            raise ValueError(f"callback host {host} is not a public address")
+
+
+class JobStore:
+    """SQLite job table. Uploaded images are kept on disk until processed.
+
+    Several processes may share the table (``uvicorn --workers N``): a job
+    runs only after ``claim`` made the caller its owner, and a running job
+    is taken over only once its owner's lease has expired.
+    """
+
+    def __init__(self, db_path: Path, image_dir: Path):
+        self.image_dir = Path(image_dir)
+        self.image_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                callback_url TEXT,
+                result TEXT,
+                error TEXT,
+                owner TEXT,
+                lease_until REAL
+            )"""
+        )
+        # Tables created before jobs were claimed
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+            if column not in columns:
+                try:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+                except sqlite3.OperationalError:
+                    pass  # Added by another process in the meantime
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+
+    def image_path(self, job_id: str) -> Path:
+        return self.image_dir / f"{job_id}.img"
+
+    def create(self, job_id: str, image_bytes: bytes, callback_url: Optional[str]) -> None:
+        self.image_path(job_id).write_bytes(image_bytes)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, created_at, updated_at, callback_url) VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, now, now, callback_url),
+            )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def claim(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Make ``owner`` run a queued job, or a running one whose lease expired.
+
+        Returns False if the job is finished, gone or owned by a live runner.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, lease_until = ?, updated_at = ? "
+                "WHERE id = ? AND (status = ? OR (status = ? AND (lease_until IS NULL OR lease_until < ?)))",
+                (RUNNING, owner, now + lease_seconds, now, job_id, QUEUED, RUNNING, now),
+            )
+        return cursor.rowcount == 1
+
+    def renew(self, owner: str, lease_seconds: float) -> None:
+        """Extend the lease on every job ``owner`` is running."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE owner = ? AND status = ?",
+                (time.time() + lease_seconds, owner, RUNNING),
+            )
+
+    def set_status(
+        self,
+        job_id: str,
+        status: str,
+        result: Optional[dict] = None,
+        error: Optional[str] = None,
+        owner: Optional[str] = None,
+    ) -> bool:
+        """Update a job; with ``owner``, only if it still owns it. Returns whether a row changed."""
+        query = "UPDATE jobs SET status = ?, updated_at = ?, result = ?, error = ? WHERE id = ?"
+        params = [status, time.time(), json.dumps(result, ensure_ascii=False) if result is not None else None, error, job_id]
+        if owner is not None:
+            query += " AND owner = ?"
+            params.append(owner)
+        with self._lock:
+            changed = self._conn.execute(query, params).rowcount == 1
+        if changed and status in (DONE, FAILED):
+            self.image_path(job_id).unlink(missing_ok=True)
+        return changed
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def unfinished(self) -> list:
+        """Ids of queued jobs and of running jobs whose owner's lease expired."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? OR (status = ? AND (lease_until IS NULL OR lease_until < ?)) "
+                "ORDER BY created_at",
+                (QUEUED, RUNNING, time.time()),
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def purge(self, older_than: float) -> None:
+        """Delete finished jobs last updated before ``older_than``."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?", (DONE, FAILED, older_than)
+            )
+
+
+class JobRunner:
+    """Runs queued jobs on a fixed number of asyncio workers.
+
+    ``handler(job_id, image_bytes)`` does the actual work and returns the
+    JSON-serialisable result; any exception marks the job failed. Store
+    reads and writes run on threads, off the event loop, and finished jobs
+    past their retention are purged every ``purge_interval`` seconds.
+
+    A job is claimed in the store before it runs, so runners in other
+    processes sharing the table never run it twice. The claim is a lease of
+    ``lease_seconds``, renewed while the runner lives; jobs left behind by
+    a runner that died (queued, or running past their lease) are picked up
+    again on the same schedule.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handler: Callable[[str, bytes], Awaitable[dict]],
+        workers: int = 2,
+        max_queued: int = 100,
+        retention_seconds: float = 86400,
+        callback_timeout: float = 10.0,
+        callback_allowed_hosts: Collection[str] = (),
+        purge_interval: float = 3600.0,
+        lease_seconds: float = 300.0,
+    ):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retention_seconds = retention_seconds
+        self.callback_timeout = callback_timeout
+        self.callback_allowed_hosts = callback_allowed_hosts
+        self.purge_interval = purge_interval
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue: "asyncio.Queue[str]" = None
+        self._tasks = []
+        # Ids in the local queue, so recovery does not queue them twice
+        self._pending = set()
+        # Submissions between the capacity check and the queue
+        self._submitting = 0
+
+    def start(self) -> None:
+        """Start workers and re-queue jobs left over from a previous run."""
+        self._queue = asyncio.Queue()
+        self._enqueue(self.store.unfinished())
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._purge_periodically()))
+        self._tasks.append(asyncio.create_task(self._keep_leases()))
+
+    def _enqueue(self, job_ids) -> None:
+        for job_id in job_ids:
+            if job_id not in self._pending:
+                self._pending.add(job_id)
+                self._queue.put_nowait(job_id)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def submit(self, job_id: str, image_bytes: bytes, callback_url: Optional[str] = None) -> bool:
+        """Persist and enqueue a job. Returns False if the queue is full."""
+        if self.queued + self._submitting >= self.max_queued:
+            return False
+        self._submitting += 1
+        try:
+            await asyncio.to_thread(self.store.create, job_id, image_bytes, callback_url)
+        finally:
+            self._submitting -= 1
+        self._enqueue([job_id])
+        return True
+
+    async def _purge_periodically(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.store.purge, time.time() - self.retention_seconds)
+            except sqlite3.Error as e:
+                logger.warning(f"Job purge failed: {e}")
+            await asyncio.sleep(self.purge_interval)
+
+    async def _keep_leases(self) -> None:
+        """Renew this runner's leases and pick up jobs abandoned by dead runners."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self.store.renew, self.owner, self.lease_seconds)
+                self._enqueue(await asyncio.to_thread(self.store.unfinished))
+            except sqlite3.Error as e:
+                logger.warning(f"Job lease renewal failed: {e}")
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self._pending.discard(job_id)
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.exception(f"Job {job_id} crashed: {type(e).__name__}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        if not await asyncio.to_thread(self.store.claim, job_id, self.owner, self.lease_seconds):
+            return  # Finished, or taken by another runner
+        try:
+            image_bytes = await asyncio.to_thread(self.store.image_path(job_id).read_bytes)
+        except OSError as e:
+            await asyncio.to_thread(self.store.set_status, job_id, FAILED, error=f"Image unavailable: {e}", owner=self.owner)
+            return
+
+        try:
+            result = await self.handler(job_id, image_bytes)
+        except Exception as e:
+            logger.warning(f"Job {job_id} failed: {type(e).__name__}: {e}")
+            finished = await asyncio.to_thread(
+                self.store.set_status, job_id, FAILED, error=str(e) or type(e).__name__, owner=self.owner
+            )
+        else:
+            finished = await asyncio.to_thread(self.store.set_status, job_id, DONE, result=result, owner=self.owner)
+
+        # A runner that lost its lease leaves the outcome to the one that took over
+        if finished:
+            await self._notify(job_id)
+
+    async def _notify(self, job_id: str) -> None:
+        """POST the final job state to its callback URL, if one was given."""
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if not job or not job["callback_url"]:
+            return
+        # Checked again at delivery: the host may resolve differently by now
+        try:
+            await check_callback_url(job["callback_url"], self.callback_allowed_hosts)
+        except ValueError as e:
+            logger.warning(f"Job {job_id} callback refused: {e}")
+            return
+        payload = {"job_id": job_id, "status": job["status"], "result": job["result"], "error": job["error"]}
+        try:
+            async with httpx.AsyncClient(timeout=self.callback_timeout) as client:
+                response = await client.post(job["callback_url"], json=payload)
+            logger.info(f"Job {job_id} callback -> {response.status_code}")
+        except httpx.HTTPError as e:
+            logger.warning(f"Job {job_id} callback failed: {e}")
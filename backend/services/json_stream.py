@@ -0,0 +1,56 @@
+"""Incremental JSON parsing for streamed LLM output."""
+
+import json
+from typing import List
+
+
+class ArrayItemStreamParser:
+    """Pull complete array items out of a JSON document as it streams in.
+
+    Feed text chunks in order; ``feed`` returns every object that has been
+    fully received and sits in an array directly inside the top-level
+    object - e.g. each item of ``{"recommendations": [{...}, {...}]}``.
+    Prose before the first ``{`` (LLMs like to add some) is skipped.
+    """
+
+    def __init__(self):
+        self._stack = []  # open containers, "{" or "["
+        self._in_string = False
+        self._escaped = False
+        self._item: List[str] = None  # chars of the item being collected
+
+    def feed(self, text: str) -> List[dict]:
+        items = []
+        for char in text:
+            if self._item is not None:
+                self._item.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                if self._stack:
+                    self._in_string = True
+            elif char in "{[":
+                if not self._stack and char == "[":
+                    continue  # stray bracket in the leading prose
+                if char == "{" and self._stack == ["{", "["]:
+                    self._item = [char]
+                self._stack.append(char)
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                if char == "}" and self._item is not None and self._stack == ["{", "["]:
+                    try:
+                        item = json.loads("".join(self._item))
+                    except json.JSONDecodeError:
+                        item = None
+                    if isinstance(item, dict):
+                        items.append(item)
+                    self._item = None
+        return items
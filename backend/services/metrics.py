@@ -0,0 +1,322 @@
+"""Prometheus-style metrics: counters, gauges and latency histograms.
+
+Metrics live in one registry and are rendered in the Prometheus text
+format (version 0.0.4) by ``GET /metrics``. Values that other services
+already count (pool occupancy, cache hits, queued jobs) are read when the
+endpoint is scraped through ``Callback`` metrics rather than kept twice.
+
+Per-stage timings go to one histogram, labelled by stage::
+
+    with stage("decode"):
+        image = decode_image(image_bytes)
+
+Stages: decode, readtext, readtext_batched, group_rows, extract_text,
+analyze_soil_card, gooey_ai (one POST attempt) and gooey_ai_stream (a
+whole streamed answer). Like /stats, everything is per process:
+with OCR_POOL_KIND=process or the worker farm, the stages that run inside
+the worker processes are not recorded (the farm's readtext call is timed
+from the parent, IPC included).
+"""
+
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; from a cached extract_text (sub-millisecond) up to a slow
+# full-resolution OCR pass or a FarmerCHAT answer
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric:
+    """Base class: a name, help text and label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, Sequence[str], Sequence[str], float]]:
+        """(sample name, label names, label values, value) tuples."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, labelnames, labelvalues, value in self.samples():
+            lines.append(f"{name}{_label_text(labelnames, labelvalues)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield self.name, self.labelnames, key, value
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. requests in flight."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class _Timer:
+    """Context manager observing the seconds spent in its block."""
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: "Histogram", labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative ``le`` buckets, plus sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets if b != math.inf))
+        # key -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, **labels) -> _Timer:
+        return _Timer(self, labels)
+
+    def snapshot(self, **labels) -> Optional[dict]:
+        """Cumulative bucket counts, sum and count for one label set."""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            if series is None:
+                return None
+            counts, total = list(series[0]), series[1]
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            running += count
+            cumulative[bound] = running
+        return {"buckets": cumulative, "sum": total, "count": running}
+
+    def samples(self):
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        bucket_labels = self.labelnames + ("le",)
+        for key, counts, total in series:
+            running = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                running += count
+                yield f"{self.name}_bucket", bucket_labels, key + (_format_value(bound),), running
+            yield f"{self.name}_sum", self.labelnames, key, total
+            yield f"{self.name}_count", self.labelnames, key, running
+
+
+class Callback(Metric):
+    """Metric whose value is read from ``fn`` at scrape time.
+
+    ``fn`` returns a number, or for labelled metrics a dict mapping tuples
+    of label values to numbers. None values are skipped.
+    """
+
+    def __init__(self, name: str, documentation: str, fn: Callable, kind: str = "gauge", labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self):
+        result = self.fn()
+        if not self.labelnames:
+            result = {(): result}
+        for key, value in result.items():
+            if value is not None:
+                yield self.name, self.labelnames, tuple(str(v) for v in key), value
+
+
+class Registry:
+    """Named metrics, rendered in registration order."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        parts = []
+        for metric in metrics:
+            try:
+                parts.append(metric.render())
+            except Exception:
+                # One broken callback must not take the whole scrape down
+                continue
+        return "".join(parts)
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "soiltrack_stage_seconds",
+    "Time spent in each stage of card analysis and recommendation.",
+    ["stage"],
+))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "soiltrack_http_request_duration_seconds",
+    "HTTP request duration by route template, method and status.",
+    ["method", "route", "status"],
+))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "soiltrack_http_requests_in_flight",
+    "HTTP requests currently being handled.",
+))
+UPSTREAM_RESPONSES = REGISTRY.register(Counter(
+    "soiltrack_upstream_responses_total",
+    "Upstream HTTP answers by status code (\"error\" when no answer came back).",
+    ["upstream", "status"],
+))
+CARD_PARAMS_FOUND = REGISTRY.register(Histogram(
+    "soiltrack_card_params_found",
+    "How many of the 12 card parameters were parsed per analysed card.",
+    buckets=range(13),
+))
+CARD_PARAM_FOUND = REGISTRY.register(Counter(
+    "soiltrack_card_param_found_total",
+    "Cards on which each parameter was parsed.",
+    ["param"],
+))
+
+
+def stage(name: str) -> _Timer:
+    """Time a block into soiltrack_stage_seconds{stage=name}."""
+    return STAGE_SECONDS.time(stage=name)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request and counting those in flight.
+
+    Requests are labelled by route template ("/jobs/{job_id}"), not the raw
+    path, so the number of series stays bounded; anything that matched no
+    route is "unmatched".
+    """
+
+    def __init__(self, app, registry_path: str = "/metrics"):
+        self.app = app
+        self.registry_path = registry_path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == self.registry_path:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            )
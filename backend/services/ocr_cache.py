@@ -0,0 +1,161 @@
+"""Content-addressed cache for OCR results."""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from services.app_logging import get_logger
+
+logger = get_logger("ocr_cache")
+
+
+class OCRResultCache:
+    """LRU cache of row-grouped OCR text keyed by image content.
+
+    Entries are evicted least-recently-used first once the stored text
+    exceeds ``max_bytes``. With ``disk_dir`` set, every entry is also
+    written to ``<disk_dir>/<key>.txt`` so results survive restarts and are
+    shared between worker processes; the directory is pruned oldest-first
+    to stay under ``disk_max_bytes``. Writes keep a running total of the
+    directory size, so it is only scanned when that total crosses the
+    budget; the scan also picks up what other processes wrote.
+    """
+
+    # A prune goes this far below the budget, so it isn't rerun on every write
+    PRUNE_TO = 0.9
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[Path] = None, disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._size = 0
+        # extract_text runs on worker-pool threads
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            if self.disk_max_bytes:
+                self._prune_disk()
+
+    @staticmethod
+    def make_key(image_bytes: bytes, config_fingerprint: str) -> str:
+        """Hash the image bytes together with the OCR configuration."""
+        digest = hashlib.sha256(config_fingerprint.encode("utf-8"))
+        digest.update(image_bytes)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return cached text for ``key`` or None, updating hit/miss counters."""
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return text
+
+        text = self._read_disk(key)
+        with self._lock:
+            if text is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, text)
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """Cache ``text`` under ``key``."""
+        with self._lock:
+            self._store(key, text)
+        self._write_disk(key, text)
+
+    def _store(self, key: str, text: str) -> None:
+        """Insert into the in-memory LRU. Caller holds the lock."""
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= len(old.encode("utf-8"))
+        self._entries[key] = text
+        self._size += size
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted.encode("utf-8"))
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.txt"
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        if not self.disk_dir:
+            return None
+        try:
+            return self._disk_path(key).read_text(encoding="utf-8")
+        except (FileNotFoundError, OSError):
+            return None
+
+    def _write_disk(self, key: str, text: str) -> None:
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        data = text.encode("utf-8")
+        try:
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+        try:
+            tmp_path.write_bytes(data)
+            # Atomic so other processes never read a half-written entry
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"OCR cache: failed to persist {key}: {e}")
+            return
+        if not self.disk_max_bytes:
+            return
+        with self._disk_lock:
+            self._disk_bytes += len(data) - replaced
+            over = self._disk_bytes > self.disk_max_bytes
+        if over:
+            self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """Delete the oldest persisted entries until under the disk budget, and resync the total."""
+        with self._disk_lock:
+            try:
+                files = [(p, p.stat()) for p in self.disk_dir.glob("*.txt")]
+            except OSError:
+                return
+            total = sum(st.st_size for _, st in files)
+            if total > self.disk_max_bytes:
+                files.sort(key=lambda item: item[1].st_mtime)
+                for path, st in files:
+                    if total <= self.disk_max_bytes * self.PRUNE_TO:
+                        break
+                    try:
+                        path.unlink()
+                        total -= st.st_size
+                    except OSError:
+                        pass
+            self._disk_bytes = total
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "persistent": self.disk_dir is not None,
+            }
@@ -3,24 +3,262 @@
 import cv2
 import numpy as np
 from PIL import Image
-import easyocr
+import io
+import json
+import logging
 import os
+import threading
+import time
+from config import (
+    OCR_FARM_WORKERS,
+    OCR_FARM_TORCH_THREADS,
+    OCR_CACHE_MAX_BYTES,
+    OCR_CACHE_PERSIST,
+    OCR_CACHE_DIR,
+    OCR_CACHE_DISK_MAX_BYTES,
+    OCR_PREPROCESS,
+    OCR_EXIF_ORIENTATION,
+    OCR_MAX_LONG_EDGE,
+    OCR_GRAYSCALE,
+    OCR_DESKEW,
+    OCR_MODE,
+    OCR_TEMPLATE_HEADER_ROWS,
+    OCR_TEMPLATE_VALUE_COLUMN,
+    OCR_TEMPLATE_STATUS_COLUMN,
+    OCR_RECOGNIZER_BATCH_SIZE,
+)
+from services.ocr_cache import OCRResultCache
+from services.image_preprocess import ImagePreprocessor
+from services.card_template import CardTemplateReader
+from services.app_logging import get_logger
+from services.metrics import stage
+from services.profiling import profiled
 
-# Initialize EasyOCR with English and Kannada
-print("Initializing EasyOCR...", flush=True)
-reader = easyocr.Reader(['en', 'kn'], gpu=False)
-print("EasyOCR ready!", flush=True)
+logger = get_logger("ocr")
+
+EASYOCR_LANGUAGES = ['en', 'kn']
+
+# Common OCR misreads on GKVK cards
+OCR_CORRECTIONS = {
+    '05-1.0': '0.5-1.0',
+    '05-0.75': '0.5-0.75',
+    '5.05.5': '5.0-5.5',
+    ';5.05.5': '5.0-5.5',
+    '5y0,6': '>0.6',
+    '5y0.6': '>0.6',
+    '?4.5': '>4.5',
+    '?0.2': '>0.2',
+    '>0:2': '>0.2',
+    '>1:0': '>1.0',
+    'ZR': 'Zn',
+}
+
+# EasyOCR reader with English and Kannada, built on first use (see get_reader)
+# so importing this module stays fast. In worker-farm mode each worker
+# process loads its own reader instead.
+reader = None
+_reader_lock = threading.Lock()
+
+
+def get_reader():
+    """Return the process-wide EasyOCR reader, loading it on first call."""
+    global reader
+    with _reader_lock:
+        if reader is None:
+            logger.info("Initializing EasyOCR...")
+            start = time.perf_counter()
+            # torch + easyocr take seconds to import, so defer that as well
+            import easyocr
+            reader = easyocr.Reader(EASYOCR_LANGUAGES, gpu=False)
+            logger.info(f"EasyOCR ready! ({time.perf_counter() - start:.1f}s)")
+        return reader
+
+
+def warm_up_reader(ocr_reader) -> None:
+    """Run one tiny inference so the first real card doesn't pay for lazy init."""
+    image = np.full((64, 256, 3), 255, dtype=np.uint8)
+    cv2.putText(image, "pH 5.5", (10, 45), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+    ocr_reader.readtext(image, paragraph=False)
+
+
+# Decode/orient/downscale before detection; None keeps the legacy PIL path
+preprocessor = ImagePreprocessor(
+    exif_orientation=OCR_EXIF_ORIENTATION,
+    max_long_edge=OCR_MAX_LONG_EDGE,
+    grayscale=OCR_GRAYSCALE,
+    deskew=OCR_DESKEW,
+) if OCR_PREPROCESS else None
+
+# Card-template mode: recognise only the table's value/status cells
+card_template = CardTemplateReader(
+    header_rows=OCR_TEMPLATE_HEADER_ROWS,
+    value_column=OCR_TEMPLATE_VALUE_COLUMN,
+    status_column=OCR_TEMPLATE_STATUS_COLUMN,
+) if OCR_MODE == "template" else None
+
+
+def decode_image(image_input):
+    """Convert bytes to a numpy array EasyOCR can use.
+
+    File paths and arrays are passed through unchanged.
+    """
+    if isinstance(image_input, bytes):
+        # Convert bytes to PIL Image, then to numpy array
+        image = Image.open(io.BytesIO(image_input))
+        logger.debug("Converted bytes to numpy array")
+        return np.array(image)
+    if isinstance(image_input, str):
+        # File path - use directly
+        logger.debug(f"Using file path: {image_input}")
+        return image_input
+    # Assume it's already a numpy array
+    logger.debug("Using provided numpy array")
+    return image_input
+
+
+def read_image(ocr_reader, image_input, **kwargs) -> list:
+    """Preprocess ``image_input`` and run OCR on it.
+
+    In template mode only the card table cells are recognised, falling back
+    to full-page ``readtext`` when the grid cannot be found. Boxes are mapped
+    back to original-image coordinates so the row grouping thresholds in
+    extract_text behave the same at any processing size.
+    """
+    with stage("decode"):
+        if preprocessor is None:
+            image, scale = decode_image(image_input), 1.0
+        else:
+            image, scale = preprocessor.process(image_input)
+    if preprocessor is not None:
+        logger.debug(f"Preprocessed image to {image.shape[1]}x{image.shape[0]} (scale={scale:.3f})")
+
+    with stage("readtext"):
+        result = None
+        if card_template is not None and isinstance(image, np.ndarray):
+            result = card_template.read(ocr_reader, image)
+            if result is None:
+                logger.info("Card table grid not found, falling back to full-page OCR")
+        if result is None:
+            result = ocr_reader.readtext(image, **kwargs)
+
+    if scale != 1.0:
+        result = [
+            ([[x / scale, y / scale] for x, y in box], text, confidence)
+            for box, text, confidence in result
+        ]
+    return result
+
+
+def _pad_to(image: np.ndarray, height: int, width: int) -> np.ndarray:
+    """Pad with white on the bottom/right so box coordinates are unchanged."""
+    pad_bottom, pad_right = height - image.shape[0], width - image.shape[1]
+    if not pad_bottom and not pad_right:
+        return image
+    value = 255 if image.ndim == 2 else (255, 255, 255)
+    return cv2.copyMakeBorder(image, 0, pad_bottom, 0, pad_right, cv2.BORDER_CONSTANT, value=value)
+
+
+def read_images_batched(ocr_reader, image_inputs: list, **kwargs) -> list:
+    """Preprocess several images and OCR them with one ``readtext_batched`` call.
+
+    readtext_batched needs equally sized inputs, so images are padded to the
+    largest height and width rather than resized, which keeps each card's
+    boxes in its own coordinates. Returns one readtext-style result per image.
+    """
+    processed = []
+    for image_input in image_inputs:
+        with stage("decode"):
+            processed.append(preprocessor.process(image_input))
+    images = [image for image, _ in processed]
+    if len({image.ndim for image in images}) > 1:
+        images = [cv2.cvtColor(image, cv2.COLOR_GRAY2RGB) if image.ndim == 2 else image for image in images]
+    height = max(image.shape[0] for image in images)
+    width = max(image.shape[1] for image in images)
+    logger.info(f"Batched OCR on {len(images)} images padded to {width}x{height}")
+
+    with stage("readtext_batched"):
+        results = ocr_reader.readtext_batched([_pad_to(image, height, width) for image in images], **kwargs)
+    return [
+        result if scale == 1.0 else [
+            ([[x / scale, y / scale] for x, y in box], text, confidence)
+            for box, text, confidence in result
+        ]
+        for result, (_, scale) in zip(results, processed)
+    ]
 
 
 class OCRService:
     """Extract soil data using EasyOCR."""
 
     def __init__(self):
-        self.reader = reader
-        print("OCRService initialized!", flush=True)
+        self.farm = None
+        if OCR_FARM_WORKERS > 0:
+            from services.ocr_worker_farm import get_worker_farm
+            self.farm = get_worker_farm(OCR_FARM_WORKERS, EASYOCR_LANGUAGES, OCR_FARM_TORCH_THREADS)
+
+        # Anything that changes the OCR output must be part of the cache key
+        self.cache_fingerprint = json.dumps({
+            "languages": EASYOCR_LANGUAGES,
+            "paragraph": False,
+            "corrections": OCR_CORRECTIONS,
+            "preprocess": preprocessor.fingerprint() if preprocessor else None,
+            "template": card_template.fingerprint() if card_template else None,
+        }, sort_keys=True)
+        self.cache = None
+        if OCR_CACHE_MAX_BYTES > 0:
+            self.cache = OCRResultCache(
+                max_bytes=OCR_CACHE_MAX_BYTES,
+                disk_dir=OCR_CACHE_DIR if OCR_CACHE_PERSIST else None,
+                disk_max_bytes=OCR_CACHE_DISK_MAX_BYTES,
+            )
+        logger.info("OCRService initialized!")
+
+    @property
+    def reader(self):
+        return get_reader()
+
+    def load(self) -> float:
+        """Load and warm up the OCR models. Safe to call more than once.
+
+        Returns:
+            Seconds spent loading
+        """
+        start = time.perf_counter()
+        if self.farm is not None:
+            self.farm.wait_ready()
+        else:
+            warm_up_reader(self.reader)
+        return time.perf_counter() - start
+
+    def _readtext(self, image_input) -> list:
+        """Run detection + recognition locally or on the worker farm."""
+        if self.farm is not None:
+            # Workers decode the image themselves so the parent only ships bytes;
+            # their own stage timings stay in the worker process
+            with stage("readtext"):
+                return self.farm.readtext(image_input, paragraph=False)
+        return read_image(self.reader, image_input, paragraph=False)
 
+    def _cache_key(self, image_input):
+        """Content hash for bytes and file inputs, None for anything else."""
+        if self.cache is None:
+            return None
+        if isinstance(image_input, bytes):
+            return OCRResultCache.make_key(image_input, self.cache_fingerprint)
+        if isinstance(image_input, str):
+            try:
+                with open(image_input, "rb") as f:
+                    return OCRResultCache.make_key(f.read(), self.cache_fingerprint)
+            except OSError:
+                return None
+        return None
+
+    @profiled("extract_text", hash_input=True)
     def extract_text(self, image_input) -> str:
         """Extract text from soil health card image.
+
+        Identical images (same bytes, same OCR configuration) are served from
+        the result cache without running OCR.
         
         Args:
             image_input: Can be either:
@@ -28,123 +266,184 @@ class OCRService:
                 - bytes: Image bytes data
                 - numpy.ndarray: Image array
         """
-        print(f"Processing image (type: {type(image_input).__name__})", flush=True)
+        with stage("extract_text"):
+            return self._extract_text(image_input)
+
+    def _extract_text(self, image_input) -> str:
+        cache_key = self._cache_key(image_input)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"OCR cache hit ({cache_key[:12]})")
+                return cached
+
+        full_text = self._run_ocr(image_input)
+
+        # Empty text means OCR failed or found nothing - worth retrying
+        if cache_key and full_text:
+            self.cache.put(cache_key, full_text)
+        return full_text
+
+    def extract_text_batch(self, image_inputs: list) -> list:
+        """Extract text from several card images, one string per image.
+
+        Cached images are skipped; the rest go through one batched EasyOCR
+        call where possible (see _run_ocr_batch).
+        """
+        cache_keys = [self._cache_key(image_input) for image_input in image_inputs]
+        texts = [None] * len(image_inputs)
+        for i, cache_key in enumerate(cache_keys):
+            if cache_key:
+                texts[i] = self.cache.get(cache_key)
+
+        todo = [i for i, text in enumerate(texts) if text is None]
+        if len(todo) < len(image_inputs):
+            logger.info(f"OCR cache hits: {len(image_inputs) - len(todo)}/{len(image_inputs)}")
+        if todo:
+            for i, full_text in zip(todo, self._run_ocr_batch([image_inputs[i] for i in todo])):
+                texts[i] = full_text
+                if cache_keys[i] and full_text:
+                    self.cache.put(cache_keys[i], full_text)
+        return texts
+
+    @staticmethod
+    def group_rows(result: list) -> list:
+        """Group readtext detections into table rows, left to right.
+
+        Returns one ' | '-joined string per row.
+        """
+        # Collect all text with coordinates
+        text_items = []
+        for detection in result:
+            coords = detection[0]
+            text = detection[1]
+            confidence = detection[2]
+            
+            y_center = (coords[0][1] + coords[2][1]) / 2
+            x_center = (coords[0][0] + coords[2][0]) / 2
+            width = coords[1][0] - coords[0][0]
+            
+            text_items.append({
+                'text': text,
+                'y': y_center,
+                'x': x_center,
+                'width': width,
+                'confidence': confidence,
+                'coords': coords
+            })
         
-        try:
-            # Convert bytes or numpy array to format EasyOCR can use
-            if isinstance(image_input, bytes):
-                import numpy as np
-                from PIL import Image
-                import io
-                # Convert bytes to PIL Image, then to numpy array
-                image = Image.open(io.BytesIO(image_input))
-                image_array = np.array(image)
-                print("Converted bytes to numpy array", flush=True)
-            elif isinstance(image_input, str):
-                # File path - use directly
-                image_array = image_input
-                print(f"Using file path: {image_input}", flush=True)
+        # Sort by y then x
+        text_items.sort(key=lambda t: (int(t['y'] / 25), t['x']))
+        
+        # Group into rows
+        rows = []
+        current_row = []
+        current_y = -100
+        
+        for item in text_items:
+            if abs(item['y'] - current_y) > 20:
+                if current_row:
+                    current_row.sort(key=lambda t: t['x'])
+                    row_text = ' | '.join([t['text'] for t in current_row])
+                    rows.append(row_text)
+                current_row = [item]
+                current_y = item['y']
             else:
-                # Assume it's already a numpy array
-                image_array = image_input
-                print("Using provided numpy array", flush=True)
-            
+                current_row.append(item)
+        
+        if current_row:
+            current_row.sort(key=lambda t: t['x'])
+            row_text = ' | '.join([t['text'] for t in current_row])
+            rows.append(row_text)
+        
+        return rows
+
+    @staticmethod
+    def apply_corrections(full_text: str) -> str:
+        """Apply common OCR misread corrections."""
+        for wrong, correct in OCR_CORRECTIONS.items():
+            full_text = full_text.replace(wrong, correct)
+        return full_text
+
+    def _run_ocr_batch(self, image_inputs: list) -> list:
+        """OCR several images, batching detection across them when possible.
+
+        The worker farm, template mode and the legacy decode path work one
+        image at a time, so those fall back to running each image on its own.
+        """
+        batchable = (
+            len(image_inputs) > 1
+            and self.farm is None
+            and card_template is None
+            and preprocessor is not None
+            and hasattr(self.reader, "readtext_batched")
+        )
+        if not batchable:
+            return [self._run_ocr(image_input) for image_input in image_inputs]
+
+        try:
+            results = read_images_batched(
+                self.reader, image_inputs, paragraph=False, batch_size=OCR_RECOGNIZER_BATCH_SIZE
+            )
+        except Exception as e:
+            # One undecodable image fails the whole batch - retry them one by one
+            logger.warning(f"Batched OCR failed ({e}), falling back to single images")
+            return [self._run_ocr(image_input) for image_input in image_inputs]
+
+        texts = []
+        for result in results:
+            if not result:
+                logger.warning("No text detected!")
+                texts.append("")
+                continue
+            with stage("group_rows"):
+                rows = self.group_rows(result)
+            texts.append(self._format_text(rows))
+        return texts
+
+    def _format_text(self, rows: list) -> str:
+        """Log the grouped rows and return the corrected card text."""
+        full_text = '\n'.join(rows)
+
+        # Check if we got Kannada text
+        has_kannada = any(ord(c) >= 0x0C80 and ord(c) <= 0x0CFF for c in full_text)
+        logger.info(
+            f"OCR extracted {len(rows)} rows (Kannada text detected: {has_kannada})",
+            extra={"fields": {"rows": len(rows), "kannada": has_kannada}},
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, row in enumerate(rows[:15]):
+                logger.debug(f"Row {i+1}: {row}")
+        
+        return self.apply_corrections(full_text)
+
+    def _run_ocr(self, image_input) -> str:
+        """Run OCR and group detections into ' | '-separated rows."""
+        logger.debug(f"Processing image (type: {type(image_input).__name__})")
+        
+        try:
             # First try: Original image (preserves colors for Kannada)
-            print("Trying original image...", flush=True)
-            result = self.reader.readtext(image_array, paragraph=False)
+            logger.debug("Trying original image...")
+            result = self._readtext(image_input)
             
             if not result:
-                print("No text detected!", flush=True)
+                logger.warning("No text detected!")
                 return ""
             
-            # Collect all text with coordinates
-            text_items = []
-            for detection in result:
-                coords = detection[0]
-                text = detection[1]
-                confidence = detection[2]
-                
-                y_center = (coords[0][1] + coords[2][1]) / 2
-                x_center = (coords[0][0] + coords[2][0]) / 2
-                width = coords[1][0] - coords[0][0]
-                
-                text_items.append({
-                    'text': text,
-                    'y': y_center,
-                    'x': x_center,
-                    'width': width,
-                    'confidence': confidence,
-                    'coords': coords
-                })
-            
-            # Sort by y then x
-            text_items.sort(key=lambda t: (int(t['y'] / 25), t['x']))
-            
-            # Group into rows
-            rows = []
-            current_row = []
-            current_y = -100
-            
-            for item in text_items:
-                if abs(item['y'] - current_y) > 20:
-                    if current_row:
-                        current_row.sort(key=lambda t: t['x'])
-                        row_text = ' | '.join([t['text'] for t in current_row])
-                        rows.append(row_text)
-                    current_row = [item]
-                    current_y = item['y']
-                else:
-                    current_row.append(item)
-            
-            if current_row:
-                current_row.sort(key=lambda t: t['x'])
-                row_text = ' | '.join([t['text'] for t in current_row])
-                rows.append(row_text)
-            
-            full_text = '\n'.join(rows)
+            with stage("group_rows"):
+                rows = self.group_rows(result)
             
             # Save OCR output (only if it's a file path, skip for in-memory processing)
             if isinstance(image_input, str):
                 debug_file = image_input.replace('.jpeg', '_ocr.txt').replace('.jpg', '_ocr.txt')
                 try:
                     with open(debug_file, 'w', encoding='utf-8') as f:
-                        f.write(full_text)
+                        f.write('\n'.join(rows))
                 except:
                     pass  # Skip debug file if can't write
             
-            # Check if we got Kannada text
-            has_kannada = any(ord(c) >= 0x0C80 and ord(c) <= 0x0CFF for c in full_text)
-            print(f"Kannada text detected: {has_kannada}", flush=True)
-            
-            print(f"\n=== OCR EXTRACTED {len(rows)} ROWS ===", flush=True)
-            for i, row in enumerate(rows[:15]):
-                try:
-                    print(f"  Row {i+1}: {row}", flush=True)
-                except:
-                    print(f"  Row {i+1}: [Kannada text]", flush=True)
-            print("=== END OCR ===\n", flush=True)
-            
-            # Apply common corrections
-            corrections = {
-                '05-1.0': '0.5-1.0',
-                '05-0.75': '0.5-0.75',
-                '5.05.5': '5.0-5.5',
-                ';5.05.5': '5.0-5.5',
-                '5y0,6': '>0.6',
-                '5y0.6': '>0.6',
-                '?4.5': '>4.5',
-                '?0.2': '>0.2',
-                '>0:2': '>0.2',
-                '>1:0': '>1.0',
-                'ZR': 'Zn',
-            }
-            for wrong, correct in corrections.items():
-                full_text = full_text.replace(wrong, correct)
-            
-            return full_text
+            return self._format_text(rows)
             
         except Exception as e:
-            print(f"OCR error: {e}", flush=True)
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"OCR error: {e}")
             return ""
@@ -0,0 +1,193 @@
+"""Multi-process OCR worker farm.
+
+Each worker is a long-lived process that loads its own EasyOCR reader once,
+with a pinned torch thread count, and then serves ``readtext`` requests sent
+over a pipe. Throughput scales with the number of cores instead of relying
+on torch intra-op threading inside a single reader.
+"""
+
+import multiprocessing
+import queue
+import threading
+from typing import List, Optional
+
+from services.app_logging import get_logger
+
+logger = get_logger("ocr_farm")
+
+
+def _worker_main(conn, languages: List[str], torch_threads: int) -> None:
+    """Worker process entry point: load the reader, then serve requests."""
+    import torch
+    torch.set_num_threads(torch_threads)
+
+    import easyocr
+    from services.ocr_service import read_image, warm_up_reader
+
+    try:
+        reader = easyocr.Reader(languages, gpu=False)
+        warm_up_reader(reader)
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        conn.close()
+        return
+    logger.info(f"OCR worker ready (pid={multiprocessing.current_process().pid}, torch_threads={torch_threads})")
+    conn.send(("ready", None))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+
+        image_input, kwargs = message
+        try:
+            result = read_image(reader, image_input, **kwargs)
+            conn.send(("ok", result))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+    conn.close()
+
+
+class _Worker:
+    """Parent-side handle for one worker process."""
+
+    def __init__(self, ctx, languages: List[str], torch_threads: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, languages, torch_threads),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self._ready_lock = threading.Lock()
+
+    def wait_ready(self) -> None:
+        """Block until the worker has loaded and warmed up its reader."""
+        with self._ready_lock:
+            if self.ready:
+                return
+            status, payload = self.conn.recv()
+            if status != "ready":
+                raise RuntimeError(f"OCR worker failed to start: {payload}")
+            self.ready = True
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+
+
+class OCRWorkerFarm:
+    """Pool of OCR worker processes, each used by one request at a time."""
+
+    def __init__(self, num_workers: int, languages: List[str], torch_threads: int = 1):
+        self.num_workers = num_workers
+        self.languages = languages
+        self.torch_threads = torch_threads
+        # Workers are forked from a running app (load_models, or a request
+        # thread replacing a dead worker): the event loop, app_logging's
+        # queue-listener thread and pool threads exist, and only the forking
+        # thread survives in the child. That is safe because the child runs
+        # nothing but _worker_main, which uses no parent state except
+        # logging and imports: app_logging's register_at_fork hook swaps its
+        # lock and logs to the console instead of the lost writer thread,
+        # CPython re-initialises the logging and import locks, and torch and
+        # easyocr are first imported in the worker (the parent never loads
+        # them in farm mode), so their thread pools start after the fork.
+        # Anything else _worker_main comes to rely on must be fork-safe the
+        # same way. Spawn/forkserver would instead re-import the app module
+        # (python main.py) in every worker.
+        start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        self._ctx = multiprocessing.get_context(start_method)
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start all worker processes. Readers load in the background."""
+        logger.info(f"Starting OCR worker farm with {self.num_workers} workers...")
+        for _ in range(self.num_workers):
+            self._add_worker()
+
+    def wait_ready(self) -> None:
+        """Block until every worker has loaded its reader."""
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            worker.wait_ready()
+
+    def _add_worker(self) -> None:
+        worker = _Worker(self._ctx, self.languages, self.torch_threads)
+        with self._lock:
+            self._workers.append(worker)
+        self._idle.put(worker)
+
+    def _replace_worker(self, worker: _Worker) -> None:
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+        worker.stop()
+        self._add_worker()
+
+    def readtext(self, image_input, **kwargs) -> list:
+        """Run ``reader.readtext`` on the next idle worker.
+
+        Blocks until a worker is free. ``image_input`` is sent as-is (bytes,
+        file path or numpy array) and decoded/preprocessed inside the worker.
+        """
+        worker = self._idle.get()
+        try:
+            worker.wait_ready()
+            worker.conn.send((image_input, kwargs))
+            status, payload = worker.conn.recv()
+        except (EOFError, BrokenPipeError, OSError, RuntimeError) as e:
+            # The worker died (or never started) - replace it so the farm keeps its size
+            logger.error(f"OCR worker {worker.process.pid} died: {e}")
+            self._replace_worker(worker)
+            raise RuntimeError("OCR worker process died") from e
+
+        self._idle.put(worker)
+        if status != "ok":
+            raise RuntimeError(f"OCR worker failed: {payload}")
+        return payload
+
+    def close(self) -> None:
+        """Stop all worker processes."""
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+
+
+_farm: Optional[OCRWorkerFarm] = None
+_farm_lock = threading.Lock()
+
+
+def get_worker_farm(num_workers: int, languages: List[str], torch_threads: int) -> OCRWorkerFarm:
+    """Return the process-wide worker farm, starting it on first use."""
+    global _farm
+    with _farm_lock:
+        if _farm is None:
+            _farm = OCRWorkerFarm(num_workers, languages, torch_threads)
+            _farm.start()
+        return _farm
+
+
+def shutdown_worker_farm() -> None:
+    """Stop the worker farm if one was started."""
+    global _farm
+    with _farm_lock:
+        if _farm is not None:
+            _farm.close()
+            _farm = None
@@ -0,0 +1,274 @@
+"""Opt-in per-request profiling of the OCR, analysis and recommendation paths.
+
+A request is profiled when it carries ``X-Profile-Token: <PROFILE_ADMIN_TOKEN>``
+or is picked at PROFILE_SAMPLE_RATE. ``ProfilingMiddleware`` then opens a
+capture for the request, and every ``@profiled`` function called while
+handling it runs under one ``cProfile.Profile``. When the response is done,
+the profile (pstats format), the input image hash and the timings of each
+wrapped function are written to a bounded on-disk ring buffer, read back
+through the /admin/profiles endpoints::
+
+    curl -H "X-Profile-Token: $TOKEN" -F file=@card.jpg .../analyze-direct
+    # the answer carries X-Profile-Id: <id>
+    curl -H "X-Profile-Token: $TOKEN" .../admin/profiles/<id>?format=text
+
+The capture follows the request through ``contextvars``: the OCR thread
+pool copies the context into its jobs, process-pool and background job
+work is not profiled. Only one profiler runs at a time in a process;
+wrapped calls that find it busy are timed but not profiled. The
+recommendation call is async, so other requests the event loop serves
+while it waits show up in its profile too.
+"""
+
+import asyncio
+import contextvars
+import cProfile
+import functools
+import hashlib
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, List, Optional
+
+PROFILE_HEADER = "x-profile-token"
+
+_PROFILE_ID = re.compile(r"^[0-9]+-[0-9a-f]{8}$")
+
+_current: contextvars.ContextVar[Optional["ProfileCapture"]] = contextvars.ContextVar("profile_capture", default=None)
+
+# cProfile can only run one profiler at a time on Python 3.12+
+_profiler_lock = threading.Lock()
+
+
+class ProfileCapture:
+    """Profile and timings collected while handling one request."""
+
+    def __init__(self, trigger: str, method: str, path: str):
+        self.id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        self.trigger = trigger
+        self.method = method
+        self.path = path
+        self.created = time.time()
+        self.image_sha256 = None
+        self.profiler = cProfile.Profile()
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, profiled: bool) -> None:
+        with self._lock:
+            entry = self.timings.setdefault(name, {"calls": 0, "seconds": 0.0, "unprofiled_calls": 0})
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            if not profiled:
+                entry["unprofiled_calls"] += 1
+
+    def metadata(self, status: Optional[int], total_seconds: float) -> dict:
+        return {
+            "id": self.id,
+            "created": self.created,
+            "trigger": self.trigger,
+            "method": self.method,
+            "path": self.path,
+            "status": status,
+            "total_seconds": round(total_seconds, 6),
+            "image_sha256": self.image_sha256,
+            "timings": {
+                name: dict(entry, seconds=round(entry["seconds"], 6)) for name, entry in self.timings.items()
+            },
+        }
+
+
+def current_capture() -> Optional[ProfileCapture]:
+    return _current.get()
+
+
+def profiled(name: str, hash_input: bool = False) -> Callable:
+    """Decorator timing and profiling a method while a capture is active.
+
+    With ``hash_input`` the first argument after ``self`` is hashed into the
+    capture's image_sha256 when it is bytes. Costs one context variable
+    lookup per call when no capture is active.
+    """
+
+    def note_input(capture: ProfileCapture, args: tuple) -> None:
+        if hash_input and capture.image_sha256 is None and len(args) > 1 and isinstance(args[1], bytes):
+            capture.image_sha256 = hashlib.sha256(args[1]).hexdigest()
+
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                capture = _current.get()
+                if capture is None:
+                    return await fn(*args, **kwargs)
+                note_input(capture, args)
+                locked = _profiler_lock.acquire(blocking=False)
+                start = time.perf_counter()
+                if locked:
+                    capture.profiler.enable()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    if locked:
+                        capture.profiler.disable()
+                        _profiler_lock.release()
+                    capture.record(name, time.perf_counter() - start, locked)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            capture = _current.get()
+            if capture is None:
+                return fn(*args, **kwargs)
+            note_input(capture, args)
+            locked = _profiler_lock.acquire(blocking=False)
+            start = time.perf_counter()
+            if locked:
+                capture.profiler.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                if locked:
+                    capture.profiler.disable()
+                    _profiler_lock.release()
+                capture.record(name, time.perf_counter() - start, locked)
+        return wrapper
+
+    return decorator
+
+
+class ProfileStore:
+    """Ring buffer of captured profiles in a directory.
+
+    Each capture is ``<id>.prof`` (pstats) plus ``<id>.json`` (metadata);
+    ids sort by capture time, and the oldest captures beyond
+    ``max_entries`` are deleted after every save.
+    """
+
+    def __init__(self, directory: Path, max_entries: int):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def save(self, capture: ProfileCapture, status: Optional[int], total_seconds: float) -> dict:
+        metadata = capture.metadata(status, total_seconds)
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            capture.profiler.dump_stats(str(self.directory / f"{capture.id}.prof"))
+            # Metadata last: a capture is listed only once both files exist
+            tmp = self.directory / f"{capture.id}.json.tmp"
+            tmp.write_text(json.dumps(metadata), encoding="utf-8")
+            os.replace(tmp, self.directory / f"{capture.id}.json")
+            self._prune()
+        return metadata
+
+    def _ids(self) -> List[str]:
+        if not self.directory.is_dir():
+            return []
+        return sorted(
+            (path.stem for path in self.directory.glob("*.json") if _PROFILE_ID.match(path.stem)),
+            key=lambda profile_id: int(profile_id.split("-")[0]),
+        )
+
+    def _prune(self) -> None:
+        ids = self._ids()
+        for profile_id in ids[:max(0, len(ids) - self.max_entries)]:
+            for suffix in (".json", ".prof"):
+                (self.directory / f"{profile_id}{suffix}").unlink(missing_ok=True)
+
+    def list(self) -> List[dict]:
+        """Metadata of the stored captures, newest first."""
+        entries = []
+        for profile_id in reversed(self._ids()):
+            try:
+                entries.append(json.loads((self.directory / f"{profile_id}.json").read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue  # pruned by another process in the meantime
+        return entries
+
+    def profile_path(self, profile_id: str) -> Optional[Path]:
+        """Path of the pstats file for ``profile_id``, or None if unknown."""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}.prof"
+        return path if path.is_file() and (self.directory / f"{profile_id}.json").is_file() else None
+
+    def render_text(self, profile_id: str, sort: str = "cumulative", limit: int = 50) -> Optional[str]:
+        """pstats report of a stored profile, top ``limit`` functions by ``sort``."""
+        path = self.profile_path(profile_id)
+        if path is None:
+            return None
+        out = io.StringIO()
+        stats = pstats.Stats(str(path), stream=out)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+def token_matches(token: Optional[str], admin_token: str) -> bool:
+    return bool(admin_token) and token is not None and hmac.compare_digest(token, admin_token)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware opening a profile capture for selected requests.
+
+    Requests with a valid admin token header are always profiled (and get an
+    ``X-Profile-Id`` response header); others at ``sample_rate``. Captures in
+    which no ``@profiled`` function ran are dropped.
+    """
+
+    def __init__(self, app, store: ProfileStore, admin_token: str = "", sample_rate: float = 0.0, logger=None):
+        self.app = app
+        self.store = store
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.logger = logger
+
+    def _trigger(self, scope) -> Optional[str]:
+        if self.admin_token:
+            for key, value in scope["headers"]:
+                if key == PROFILE_HEADER.encode():
+                    if token_matches(value.decode("latin-1"), self.admin_token):
+                        return "header"
+                    break
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        capture = ProfileCapture(trigger, scope["method"], scope["path"])
+        status = None
+        start = time.perf_counter()
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if trigger == "header":
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", capture.id.encode())]
+            await send(message)
+
+        token = _current.set(capture)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _current.reset(token)
+            if capture.timings:
+                total = time.perf_counter() - start
+                try:
+                    await asyncio.to_thread(self.store.save, capture, status, total)
+                except OSError as e:
+                    if self.logger is not None:
+                        self.logger.warning(f"Could not save profile {capture.id}: {e}")
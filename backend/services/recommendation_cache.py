@@ -0,0 +1,218 @@
+"""Cache of FarmerCHAT recommendations keyed by crop and a quantized soil profile."""
+
+import asyncio
+import hashlib
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from models import NutrientStatus, Recommendation, SoilData
+from services.app_logging import get_logger
+
+logger = get_logger("recommendation_cache")
+
+# Bin width per SoilData field. Profiles whose values fall in the same bins
+# (and have the same status colours) share one cached answer.
+SIGNATURE_BIN_WIDTHS = {
+    "ph": 0.25,
+    "ec": 0.1,
+    "organic_carbon": 0.1,
+    "nitrogen": 25.0,
+    "phosphorus": 5.0,
+    "potassium": 25.0,
+    "sulphur": 2.0,
+    "zinc": 0.2,
+    "boron": 0.1,
+    "iron": 1.0,
+    "manganese": 1.0,
+    "copper": 0.2,
+}
+
+
+def soil_signature(soil_data: Optional[SoilData], nutrient_status: Optional[List[NutrientStatus]]) -> str:
+    """Quantized soil profile: binned value and status colour per nutrient."""
+    # NutrientStatus.nutrient is the field name title-cased ("Organic Carbon")
+    colors = {n.nutrient.lower().replace(" ", "_"): n.color for n in nutrient_status or []}
+    parts = []
+    for field, width in SIGNATURE_BIN_WIDTHS.items():
+        value = getattr(soil_data, field) if soil_data else None
+        value_bin = math.floor(value / width) if value is not None else "-"
+        parts.append(f"{field}={value_bin}:{colors.get(field, '-')}")
+    return "|".join(parts)
+
+
+def _serialize(recommendations: List[Recommendation]) -> str:
+    return json.dumps([rec.model_dump() for rec in recommendations], ensure_ascii=False)
+
+
+def _deserialize(data: str) -> List[Recommendation]:
+    return [Recommendation(**rec) for rec in json.loads(data)]
+
+
+class RecommendationCache:
+    """TTL + LRU cache with stale-while-revalidate and optional SQLite persistence.
+
+    Entries are fresh for ``ttl_seconds``. For a further ``stale_seconds``
+    they are still returned but flagged stale, and the caller serves them
+    while ``revalidate`` refreshes them in the background, so nobody waits
+    on the upstream.
+
+    With a ``db_path`` entries are also kept in SQLite. From the event loop
+    use ``aget``/``aput``: they read SQLite only on a memory miss and run
+    its queries on a thread. The connection has its own lock, so memory
+    lookups never wait on disk I/O.
+    """
+
+    def __init__(self, ttl_seconds: float, stale_seconds: float, max_entries: int, db_path: Path = None):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        # key -> (stored_at, serialized recommendations)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+        self._conn = None
+        self._db_lock = threading.Lock()
+        if db_path is not None:
+            self._conn = sqlite3.connect(str(db_path), timeout=10, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS recommendations (
+                    key TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    stored_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_recommendations_stored_at ON recommendations(stored_at)"
+            )
+
+    @staticmethod
+    def make_key(crop_id: str, soil_data: Optional[SoilData], nutrient_status: Optional[List[NutrientStatus]]) -> str:
+        signature = f"{crop_id}|{soil_signature(soil_data, nutrient_status)}"
+        return hashlib.sha256(signature.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[List[Recommendation], bool]]:
+        """Return (recommendations, is_stale), or None if missing/expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self._conn is not None:
+            entry = self._load(key)
+        return self._lookup_result(key, entry, now)
+
+    async def aget(self, key: str) -> Optional[Tuple[List[Recommendation], bool]]:
+        """``get`` for the event loop; a memory miss is looked up in SQLite on a thread."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self._conn is not None:
+            entry = await asyncio.to_thread(self._load, key)
+        return self._lookup_result(key, entry, now)
+
+    def _load(self, key: str) -> Optional[Tuple[float, str]]:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT stored_at, data FROM recommendations WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], row[1]) if row is not None else None
+
+    def _lookup_result(self, key: str, entry: Optional[Tuple[float, str]], now: float):
+        with self._lock:
+            if entry is None or now - entry[0] > self.ttl_seconds + self.stale_seconds:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            # Loaded from SQLite, unless a put got there first
+            self._entries.setdefault(key, entry)
+            self._entries.move_to_end(key)
+            self._evict()
+            stale = now - entry[0] > self.ttl_seconds
+            if stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+        # Fresh objects per caller, so nobody mutates the cached copy
+        return _deserialize(entry[1]), stale
+
+    def put(self, key: str, recommendations: List[Recommendation]) -> None:
+        data, now = self._remember(key, recommendations)
+        if self._conn is not None:
+            self._persist(key, data, now)
+
+    async def aput(self, key: str, recommendations: List[Recommendation]) -> None:
+        """``put`` for the event loop; memory is updated at once, SQLite on a thread."""
+        data, now = self._remember(key, recommendations)
+        if self._conn is not None:
+            await asyncio.to_thread(self._persist, key, data, now)
+
+    def _remember(self, key: str, recommendations: List[Recommendation]) -> Tuple[str, float]:
+        data = _serialize(recommendations)
+        now = time.time()
+        with self._lock:
+            self._entries[key] = (now, data)
+            self._entries.move_to_end(key)
+            self._evict()
+        return data, now
+
+    def _persist(self, key: str, data: str, now: float) -> None:
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO recommendations (key, data, stored_at) VALUES (?, ?, ?)",
+                (key, data, now),
+            )
+            self._conn.execute(
+                "DELETE FROM recommendations WHERE stored_at < ?",
+                (now - self.ttl_seconds - self.stale_seconds,),
+            )
+            self._conn.execute(
+                "DELETE FROM recommendations WHERE key NOT IN "
+                "(SELECT key FROM recommendations ORDER BY stored_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def revalidate(self, key: str, fetch: Callable[[], Awaitable[Optional[List[Recommendation]]]]) -> None:
+        """Refresh a stale ``key`` in the background, at most once at a time.
+
+        Empty/None results from ``fetch`` are not cached.
+        """
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                recommendations = await fetch()
+                if recommendations:
+                    await self.aput(key, recommendations)
+            except Exception as e:
+                logger.warning(f"Recommendation cache refresh failed: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        # Keep a reference so the task isn't garbage collected mid-flight
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshing": len(self._refreshing),
+                "persistent": self._conn is not None,
+            }
@@ -1,8 +1,28 @@
 """Service for generating crop recommendations."""
 
-from typing import List, Optional
+import asyncio
+from typing import AsyncIterator, List, Optional, Tuple
 from models import Crop, Recommendation, SoilData, NutrientStatus
 from services.gooey_ai_service import GooeyAIService
+from services.recommendation_cache import RecommendationCache
+from services.app_logging import get_logger
+from services.profiling import profiled
+from services.thresholds import get_threshold_table
+from services.recommendation_templates import (
+    BASIC_TEMPLATES,
+    MEDIUM_TEMPLATE,
+    PH_TEMPLATES,
+    compile_templates,
+)
+from config import (
+    REC_CACHE_MAX_ENTRIES,
+    REC_CACHE_TTL_SECONDS,
+    REC_CACHE_STALE_SECONDS,
+    REC_CACHE_PERSIST,
+    REC_CACHE_DB_PATH,
+)
+
+logger = get_logger("recommendations")
 
 
 class RecommendationService:
@@ -11,6 +31,28 @@ class RecommendationService:
     def __init__(self):
         """Initialize the recommendation service with Gooey AI integration."""
         self.gooey_ai = GooeyAIService()
+        # Farmers in one district often share a soil profile, so identical
+        # (binned) profiles reuse one FarmerCHAT answer
+        self.cache = None
+        if REC_CACHE_MAX_ENTRIES > 0:
+            self.cache = RecommendationCache(
+                ttl_seconds=REC_CACHE_TTL_SECONDS,
+                stale_seconds=REC_CACHE_STALE_SECONDS,
+                max_entries=REC_CACHE_MAX_ENTRIES,
+                db_path=REC_CACHE_DB_PATH if REC_CACHE_PERSIST else None,
+            )
+        # Upstream calls that outlived their caller's deadline
+        self._background = set()
+        # Targets and pH limits shared with AnalysisService's ratings
+        self.thresholds = get_threshold_table()
+        # Recommendation texts, with the targets filled in once
+        self.deficiency_templates, self.calculated_templates = compile_templates(self.thresholds)
+
+    # Soil card parameters; NutrientStatus.nutrient is param.replace("_", " ").title()
+    PARAMS = frozenset([
+        "ph", "ec", "organic_carbon", "nitrogen", "phosphorus", "potassium",
+        "sulphur", "zinc", "boron", "iron", "manganese", "copper",
+    ])
 
     # Available crops with Kannada names
     CROPS = {
@@ -159,37 +201,76 @@ class RecommendationService:
         Returns:
             List of recommendations from Gooey AI FarmerCHAT
         """
+        recommendations, _ = await self.recommend(crop_id, soil_data, nutrient_status)
+        return recommendations
+
+    @profiled("recommend")
+    async def recommend(
+        self,
+        crop_id: str,
+        soil_data: Optional[SoilData] = None,
+        nutrient_status: Optional[List[NutrientStatus]] = None,
+        deadline: Optional[float] = None,
+    ) -> Tuple[List[Recommendation], str]:
+        """Recommendations plus where they came from: "cache", "ai" or "rules".
+
+        With a deadline (seconds), the upstream call is raced against the
+        budget: if FarmerCHAT hasn't answered in time the rule-based
+        recommendations are returned, and the call keeps running in the
+        background so its answer still lands in the cache for next time.
+        """
         if crop_id not in self.CROPS:
             raise ValueError(f"Unknown crop: {crop_id}")
 
         crop = self.CROPS[crop_id]
-        
+        key = self.cache.make_key(crop_id, soil_data, nutrient_status) if self.cache is not None else None
+
+        async def fetch():
+            return await self._get_ai_recommendations(crop, soil_data, nutrient_status)
+
+        if key:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                recommendations, stale = cached
+                if stale:
+                    self.cache.revalidate(key, fetch)
+                return recommendations, "cache"
+
         # Try to get AI-powered recommendations from Gooey AI
+        fetch_task = asyncio.ensure_future(self._fetch_and_cache(key, fetch))
+        if deadline is None:
+            ai_recommendations = await fetch_task
+        else:
+            done, _ = await asyncio.wait({fetch_task}, timeout=deadline)
+            if done:
+                ai_recommendations = fetch_task.result()
+            else:
+                logger.info(f"Gooey AI missed the {deadline:.1f}s deadline, answering from rules")
+                # Keep a reference so the task isn't garbage collected mid-flight
+                self._background.add(fetch_task)
+                fetch_task.add_done_callback(self._background.discard)
+                ai_recommendations = None
+        if ai_recommendations:
+            return ai_recommendations, "ai"
+
+        # Fallback to base recommendations if AI fails
+        return self.get_rule_based_recommendations(crop_id, soil_data, nutrient_status), "rules"
+
+    async def _fetch_and_cache(self, key: Optional[str], fetch) -> Optional[List[Recommendation]]:
+        """Run the upstream call, caching a good answer. Never raises."""
         try:
-            ai_recommendations = await self.gooey_ai.get_recommendations(
-                crop_id=crop_id,
-                crop_name=crop.name,
-                crop_name_kn=crop.name_kn,
-                soil_data=soil_data,
-                nutrient_status=nutrient_status
-            )
-            
-            # If we got valid recommendations from AI, return them
-            # (None means API key not configured, empty list means API failed)
-            if ai_recommendations and len(ai_recommendations) > 0:
-                # Check if it's the fallback recommendation (only 1 item with specific title)
-                if len(ai_recommendations) == 1 and ai_recommendations[0].title == "Soil Testing Recommended":
-                    # This is a fallback from API failure, use default instead
-                    pass
-                else:
-                    return ai_recommendations
+            ai_recommendations = await fetch()
         except Exception as e:
-            print(f"Gooey AI recommendation failed: {e}")
-            import traceback
-            traceback.print_exc()
-            # Fall through to default recommendations
-        
-        # Fallback to base recommendations if AI fails
+            logger.exception(f"Gooey AI recommendation failed: {e}")
+            return None
+        if ai_recommendations and key:
+            await self.cache.aput(key, ai_recommendations)
+        return ai_recommendations
+
+    def get_rule_based_recommendations(
+        self, crop_id: str, soil_data: Optional[SoilData] = None, nutrient_status: Optional[List[NutrientStatus]] = None
+    ) -> List[Recommendation]:
+        """Deterministic recommendations from the crop guidelines and soil status."""
         recommendations = self.BASE_RECOMMENDATIONS.get(
             crop_id, self.DEFAULT_RECOMMENDATIONS
         )
@@ -207,59 +288,90 @@ class RecommendationService:
 
         return recommendations
 
+    async def stream_ai_recommendations(
+        self, crop_id: str, soil_data: Optional[SoilData] = None, nutrient_status: Optional[List[NutrientStatus]] = None
+    ) -> AsyncIterator[Recommendation]:
+        """Yield FarmerCHAT recommendations as soon as each one is available.
+
+        Cached answers are replayed at once. Otherwise the upstream answer is
+        streamed and, once complete, cached; if streaming is off
+        (GOOEY_AI_STREAM_PATH empty) or unavailable the regular
+        (non-streaming) call is used instead.
+        """
+        if crop_id not in self.CROPS:
+            raise ValueError(f"Unknown crop: {crop_id}")
+        crop = self.CROPS[crop_id]
+
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(crop_id, soil_data, nutrient_status)
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                for rec in cached[0]:
+                    yield rec
+                return
+
+        if self.gooey_ai.stream_path:
+            streamed = []
+            try:
+                async for rec in self.gooey_ai.stream_recommendations(crop.name, crop.name_kn, soil_data, nutrient_status):
+                    streamed.append(rec)
+                    yield rec
+            except Exception as e:
+                logger.warning(f"Gooey AI streaming failed: {e}")
+                if streamed:
+                    return  # Partial answer already sent; don't repeat it or cache it
+            else:
+                if streamed and key:
+                    await self.cache.aput(key, streamed)
+                return
+
+        recommendations = await self._get_ai_recommendations(crop, soil_data, nutrient_status)
+        for rec in recommendations or []:
+            yield rec
+        if recommendations and key:
+            await self.cache.aput(key, recommendations)
+
+    async def _get_ai_recommendations(
+        self, crop: Crop, soil_data: Optional[SoilData], nutrient_status: Optional[List[NutrientStatus]]
+    ) -> Optional[List[Recommendation]]:
+        """FarmerCHAT recommendations, or None if the API is unavailable or failed."""
+        ai_recommendations = await self.gooey_ai.get_recommendations(
+            crop_id=crop.id,
+            crop_name=crop.name,
+            crop_name_kn=crop.name_kn,
+            soil_data=soil_data,
+            nutrient_status=nutrient_status
+        )
+
+        # None means API key not configured, empty list means API failed
+        if not ai_recommendations:
+            return None
+        # Check if it's the fallback recommendation (only 1 item with specific title)
+        if len(ai_recommendations) == 1 and ai_recommendations[0].title == "Soil Testing Recommended":
+            # This is a fallback from API failure, use default instead
+            return None
+        return ai_recommendations
+
     def _customize_recommendations(
         self, base_recommendations: List[Recommendation], soil_data: SoilData, nutrient_status: List[NutrientStatus]
     ) -> List[Recommendation]:
         """Add comprehensive soil-specific recommendations based on ALL nutrient statuses."""
         recommendations = list(base_recommendations)
-        
-        # Map nutrient names (as they appear in NutrientStatus) to parameter names
-        # NutrientStatus uses param.replace("_", " ").title(), so we need to reverse that
-        nutrient_map = {
-            "Ph": "ph",
-            "Ec": "ec", 
-            "Organic Carbon": "organic_carbon",
-            "Nitrogen": "nitrogen",
-            "Phosphorus": "phosphorus",
-            "Potassium": "potassium",
-            "Sulphur": "sulphur",
-            "Zinc": "zinc",
-            "Boron": "boron",
-            "Iron": "iron",
-            "Manganese": "manganese",
-            "Copper": "copper",
-        }
 
         # Check each nutrient status and add recommendations for deficiencies
         for nutrient in nutrient_status:
-            # Map nutrient name to parameter (handle different formats)
-            nutrient_name = nutrient.nutrient
-            param = None
-            
-            # Try exact match first
-            if nutrient_name in nutrient_map:
-                param = nutrient_map[nutrient_name]
-            else:
-                # Try case-insensitive and with spaces/underscores
-                for key, val in nutrient_map.items():
-                    if key.lower() == nutrient_name.lower() or key.replace(" ", "_").lower() == nutrient_name.replace(" ", "_").lower():
-                        param = val
-                        break
-                
-                # If still not found, try to derive from nutrient name
-                if not param:
-                    param = nutrient_name.lower().replace(" ", "_")
-            
-            if not param or param not in ["ph", "ec", "organic_carbon", "nitrogen", "phosphorus", "potassium", 
-                                          "sulphur", "zinc", "boron", "iron", "manganese", "copper"]:
+            # Map nutrient name back to the parameter, in any case
+            param = nutrient.nutrient.lower().replace(" ", "_")
+            if param not in self.PARAMS:
                 continue
-                
+
             # RED color means low/deficient - needs correction
             if nutrient.color == "#EF4444":  # RED - Low/Deficient
                 rec = self._get_deficiency_recommendation(param, nutrient, soil_data)
                 if rec:
                     recommendations.append(rec)
-            
+
             # YELLOW means medium - might need supplementation
             elif nutrient.color == "#F59E0B":  # YELLOW - Medium
                 rec = self._get_medium_recommendation(param, nutrient, soil_data)
@@ -268,32 +380,10 @@ class RecommendationService:
 
         # Add pH correction if needed (regardless of color)
         if soil_data.ph is not None:
-            if soil_data.ph < 6.0:
-                recommendations.append(
-                    Recommendation(
-                        title="Soil pH Correction (Acidic)",
-                        title_kn="ಮಣ್ಣಿನ pH ತಿದ್ದುಪಡಿ (ಆಮ್ಲೀಯ)",
-                        description=f"Your soil pH is {soil_data.ph:.1f}, which is acidic. Apply lime to improve nutrient availability.",
-                        description_kn=f"ನಿಮ್ಮ ಮಣ್ಣಿನ pH {soil_data.ph:.1f} ಆಗಿದೆ, ಇದು ಆಮ್ಲೀಯವಾಗಿದೆ. ಪೋಷಕಾಂಶಗಳ ಲಭ್ಯತೆಯನ್ನು ಸುಧಾರಿಸಲು ಸುಣ್ಣ ಹಾಕಿ.",
-                        fertilizer="Agricultural Lime",
-                        fertilizer_kn="ಕೃಷಿ ಸುಣ್ಣ",
-                        dosage="2-4 quintals/ha based on pH level",
-                        dosage_kn="pH ಮಟ್ಟದ ಆಧಾರದ ಮೇಲೆ 2-4 ಕ್ವಿಂಟಾಲ್/ಹೆಕ್ಟೇರ್",
-                    )
-                )
-            elif soil_data.ph > 8.5:
-                recommendations.append(
-                    Recommendation(
-                        title="Soil pH Correction (Alkaline)",
-                        title_kn="ಮಣ್ಣಿನ pH ತಿದ್ದುಪಡಿ (ಕ್ಷಾರೀಯ)",
-                        description=f"Your soil pH is {soil_data.ph:.1f}, which is alkaline. Apply gypsum to improve soil structure.",
-                        description_kn=f"ನಿಮ್ಮ ಮಣ್ಣಿನ pH {soil_data.ph:.1f} ಆಗಿದೆ, ಇದು ಕ್ಷಾರೀಯವಾಗಿದೆ. ಮಣ್ಣಿನ ರಚನೆಯನ್ನು ಸುಧಾರಿಸಲು ಜಿಪ್ಸಮ್ ಹಾಕಿ.",
-                        fertilizer="Gypsum",
-                        fertilizer_kn="ಜಿಪ್ಸಮ್",
-                        dosage="2-5 quintals/ha based on pH level",
-                        dosage_kn="pH ಮಟ್ಟದ ಆಧಾರದ ಮೇಲೆ 2-5 ಕ್ವಿಂಟಾಲ್/ಹೆಕ್ಟೇರ್",
-                    )
-                )
+            if soil_data.ph < self.thresholds.get("ph", "lime_below"):
+                recommendations.append(PH_TEMPLATES["acidic"].render(ph=soil_data.ph))
+            elif soil_data.ph > self.thresholds.get("ph", "gypsum_above"):
+                recommendations.append(PH_TEMPLATES["alkaline"].render(ph=soil_data.ph))
 
         return recommendations
 
@@ -313,7 +403,7 @@ class RecommendationService:
         elif param == "phosphorus":
             # DAP contains 18% N and 46% P2O5
             # SSP contains 16% P2O5
-            # Target: reach 57 kg/ha P2O5
+            # Target: reach the phosphorus target in kg/ha P2O5
             p2o5_needed = deficiency * 1.3  # Conversion factor
             dap_needed = (p2o5_needed / 0.46) * 1.2
             return ("DAP", round(dap_needed), "Basal application before sowing/transplanting", "At land preparation")
@@ -332,252 +422,78 @@ class RecommendationService:
         
         elif param == "zinc":
             # Zinc Sulphate (ZnSO4.7H2O) contains 21% Zn
-            zn_needed = 0.6 - current_value  # Target is 0.6 ppm
-            if zn_needed > 0:
-                znso4_needed = (zn_needed * 25) * 1.2  # Rough conversion for soil application
+            if deficiency > 0:
+                znso4_needed = (deficiency * 25) * 1.2  # Rough conversion for soil application
                 return ("Zinc Sulphate (ZnSO4)", round(znso4_needed), "Soil: 25 kg/ha basal OR Foliar: 0.5% spray at 30 and 45 DAS", "Basal at sowing OR foliar during crop growth")
             return ("Zinc Sulphate (ZnSO4)", 25, "Soil: 25 kg/ha basal OR Foliar: 0.5% spray", "At sowing or during growth")
         
         elif param == "boron":
             # Borax contains 11% B
-            b_needed = 0.5 - current_value  # Target is 0.5 ppm
-            if b_needed > 0:
-                borax_needed = (b_needed * 15) * 1.2
+            if deficiency > 0:
+                borax_needed = (deficiency * 15) * 1.2
                 return ("Borax", round(borax_needed), "Soil application mixed with other fertilizers", "At land preparation")
             return ("Borax", 10, "Soil application: 10-15 kg/ha", "At land preparation")
         
         elif param == "iron":
             # Ferrous Sulphate contains 19% Fe
-            fe_needed = 4.5 - current_value  # Target is 4.5 ppm
-            if fe_needed > 0:
-                feso4_needed = (fe_needed * 8) * 1.2
+            if deficiency > 0:
+                feso4_needed = (deficiency * 8) * 1.2
                 return ("Ferrous Sulphate", round(feso4_needed), "Soil: 5-10 kg/ha OR Foliar: 0.5% spray", "At sowing or foliar during growth")
             return ("Ferrous Sulphate / Iron Chelate", 8, "Soil: 8 kg/ha OR Foliar: 0.5% spray", "At sowing or during growth")
         
         elif param == "manganese":
             # Manganese Sulphate contains 28% Mn
-            mn_needed = 1.0 - current_value  # Target is 1.0 ppm
-            if mn_needed > 0:
-                mnso4_needed = (mn_needed * 12) * 1.2
+            if deficiency > 0:
+                mnso4_needed = (deficiency * 12) * 1.2
                 return ("Manganese Sulphate", round(mnso4_needed), "Soil: 10-15 kg/ha OR Foliar: 0.5% spray", "At sowing or during growth")
             return ("Manganese Sulphate", 12, "Soil: 12 kg/ha OR Foliar: 0.5% spray", "At sowing or during growth")
         
         elif param == "copper":
             # Copper Sulphate contains 25% Cu
-            cu_needed = 0.2 - current_value  # Target is 0.2 ppm
-            if cu_needed > 0:
-                cuso4_needed = (cu_needed * 8) * 1.2
+            if deficiency > 0:
+                cuso4_needed = (deficiency * 8) * 1.2
                 return ("Copper Sulphate", round(cuso4_needed), "Soil: 5-10 kg/ha OR Foliar: 0.2% spray", "At sowing or during growth")
             return ("Copper Sulphate", 8, "Soil: 8 kg/ha OR Foliar: 0.2% spray", "At sowing or during growth")
         
         return (None, 0, "", "")
 
-    def _create_nitrogen_rec(self, value: float, fertilizer_name: str, amount: int, method: str, timing: str) -> Recommendation:
-        """Create nitrogen recommendation with calculated amounts."""
-        deficiency = 280 - value
-        return Recommendation(
-            title="Nitrogen Deficiency Correction",
-            title_kn="ಸಾರಜನಕ ಕೊರತೆ ನಿವಾರಣೆ",
-            description=f"Available nitrogen is {value:.0f} kg/ha (target: 280+ kg/ha). Deficiency: {deficiency:.0f} kg/ha. Apply {amount} kg/ha {fertilizer_name}. Method: {method}. Timing: {timing}. Mix well with soil and ensure adequate moisture for best results.",
-            description_kn=f"ಲಭ್ಯವಿರುವ ಸಾರಜನಕ {value:.0f} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಗುರಿ: 280+ ಕೆಜಿ/ಹೆಕ್ಟೇರ್). ಕೊರತೆ: {deficiency:.0f} ಕೆಜಿ/ಹೆಕ್ಟೇರ್. {amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ {fertilizer_name} ಹಾಕಿ. ವಿಧಾನ: {method}. ಸಮಯ: {timing}. ಮಣ್ಣಿನೊಂದಿಗೆ ಚೆನ್ನಾಗಿ ಮಿಶ್ರಣ ಮಾಡಿ ಮತ್ತು ಉತ್ತಮ ಫಲಿತಾಂಶಗಳಿಗಾಗಿ ಸಾಕಷ್ಟು ತೇವಾಂಶವನ್ನು ಖಚಿತಪಡಿಸಿ.",
-            fertilizer=fertilizer_name,
-            fertilizer_kn="ಯೂರಿಯಾ",
-            dosage=f"{amount} kg/ha",
-            dosage_kn=f"{amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್",
-        )
-
-    def _create_phosphorus_rec(self, value: float, fertilizer_name: str, amount: int, method: str, timing: str) -> Recommendation:
-        """Create phosphorus recommendation with calculated amounts."""
-        deficiency = 57 - value
-        return Recommendation(
-            title="Phosphorus Deficiency Correction",
-            title_kn="ರಂಜಕ ಕೊರತೆ ನಿವಾರಣೆ",
-            description=f"Available phosphorus is {value:.0f} kg/ha (target: 57+ kg/ha). Deficiency: {deficiency:.0f} kg/ha. Apply {amount} kg/ha {fertilizer_name}. Method: {method}. Timing: {timing}. Mix thoroughly with soil during land preparation and ensure good soil contact.",
-            description_kn=f"ಲಭ್ಯವಿರುವ ರಂಜಕ {value:.0f} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಗುರಿ: 57+ ಕೆಜಿ/ಹೆಕ್ಟೇರ್). ಕೊರತೆ: {deficiency:.0f} ಕೆಜಿ/ಹೆಕ್ಟೇರ್. {amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ {fertilizer_name} ಹಾಕಿ. ವಿಧಾನ: {method}. ಸಮಯ: {timing}. ಭೂಮಿ ಸಿದ್ಧತೆಯ ಸಮಯದಲ್ಲಿ ಮಣ್ಣಿನೊಂದಿಗೆ ಚೆನ್ನಾಗಿ ಮಿಶ್ರಣ ಮಾಡಿ ಮತ್ತು ಉತ್ತಮ ಮಣ್ಣಿನ ಸಂಪರ್ಕವನ್ನು ಖಚಿತಪಡಿಸಿ.",
-            fertilizer=fertilizer_name,
-            fertilizer_kn="ಡಿಎಪಿ",
-            dosage=f"{amount} kg/ha",
-            dosage_kn=f"{amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್",
-        )
-
-    def _create_potassium_rec(self, value: float, fertilizer_name: str, amount: int, method: str, timing: str) -> Recommendation:
-        """Create potassium recommendation with calculated amounts."""
-        deficiency = 337 - value
-        return Recommendation(
-            title="Potassium Deficiency Correction",
-            title_kn="ಪೊಟ್ಯಾಸಿಯಂ ಕೊರತೆ ನಿವಾರಣೆ",
-            description=f"Available potassium is {value:.0f} kg/ha (target: 337+ kg/ha). Deficiency: {deficiency:.0f} kg/ha. Apply {amount} kg/ha {fertilizer_name}. Method: {method}. Timing: {timing}. Apply in furrows or broadcast and mix with soil.",
-            description_kn=f"ಲಭ್ಯವಿರುವ ಪೊಟ್ಯಾಸಿಯಂ {value:.0f} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಗುರಿ: 337+ ಕೆಜಿ/ಹೆಕ್ಟೇರ್). ಕೊರತೆ: {deficiency:.0f} ಕೆಜಿ/ಹೆಕ್ಟೇರ್. {amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ {fertilizer_name} ಹಾಕಿ. ವಿಧಾನ: {method}. ಸಮಯ: {timing}. ಕಂದರಗಳಲ್ಲಿ ಅಥವಾ ವ್ಯಾಪಕವಾಗಿ ಹಾಕಿ ಮತ್ತು ಮಣ್ಣಿನೊಂದಿಗೆ ಮಿಶ್ರಣ ಮಾಡಿ.",
-            fertilizer=fertilizer_name,
-            fertilizer_kn="ಎಂಒಪಿ",
-            dosage=f"{amount} kg/ha",
-            dosage_kn=f"{amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್",
-        )
-
     def _get_deficiency_recommendation(self, param: str, nutrient: NutrientStatus, soil_data: SoilData) -> Optional[Recommendation]:
         """Get recommendation for a deficient nutrient with calculated amounts and application methods."""
         value = getattr(soil_data, param, None)
         if value is None:
             return None
-        
-        # Get target values based on thresholds
-        target_values = {
-            "nitrogen": 280,
-            "phosphorus": 57,
-            "potassium": 337,
-            "sulphur": 20,
-            "zinc": 0.6,
-            "boron": 0.5,
-            "iron": 4.5,
-            "manganese": 1.0,
-            "copper": 0.2,
-        }
-        
-        target = target_values.get(param, None)
-        
-        # Calculate fertilizer amount if we have a target
-        fertilizer_name = None
-        amount = None
-        method = None
-        timing = None
-        
+
+        # pH is handled separately
+        template = self.deficiency_templates.get(param)
+        if template is None:
+            return None
+
+        target = self.thresholds.target(param)
+        fertilizer_name = amount = method = timing = None
         if target and value < target:
             fertilizer_name, amount, method, timing = self._calculate_fertilizer_amount(param, value, target)
-        
-        # Create recommendations with calculated values
-        recommendations_map = {
-            "ph": None,  # Handled separately
-            "ec": Recommendation(
-                title="Electrical Conductivity Management",
-                title_kn="ವಿದ್ಯುತ್ ವಾಹಕತೆ ನಿರ್ವಹಣೆ",
-                description=f"EC is {value:.2f} dS/m. For saline soils, use gypsum and ensure proper drainage.",
-                description_kn=f"EC {value:.2f} dS/m ಆಗಿದೆ. ಲವಣ ಮಣ್ಣಿಗೆ, ಜಿಪ್ಸಮ್ ಬಳಸಿ ಮತ್ತು ಸರಿಯಾದ ಜಲನಿಕಾಸವನ್ನು ಖಚಿತಪಡಿಸಿ.",
-                fertilizer="Gypsum + Organic Matter",
-                fertilizer_kn="ಜಿಪ್ಸಮ್ + ಸಾವಯವ ವಸ್ತು",
-                dosage="As per soil test",
-                dosage_kn="ಮಣ್ಣು ಪರೀಕ್ಷೆ ಪ್ರಕಾರ",
-            ),
-            "organic_carbon": Recommendation(
-                title="Organic Carbon Improvement",
-                title_kn="ಸಾವಯವ ಇಂಗಾಲ ಸುಧಾರಣೆ",
-                description=f"Organic carbon is {value:.2f}%, which is low. Add FYM, compost, or green manure.",
-                description_kn=f"ಸಾವಯವ ಇಂಗಾಲ {value:.2f}% ಆಗಿದೆ, ಇದು ಕಡಿಮೆಯಾಗಿದೆ. ಕೊಟ್ಟಿಗೆ ಗೊಬ್ಬರ, ಕಾಂಪೋಸ್ಟ್ ಅಥವಾ ಹಸಿರು ಗೊಬ್ಬರ ಸೇರಿಸಿ.",
-                fertilizer="FYM / Compost / Green Manure",
-                fertilizer_kn="ಕೊಟ್ಟಿಗೆ ಗೊಬ್ಬರ / ಕಾಂಪೋಸ್ಟ್ / ಹಸಿರು ಗೊಬ್ಬರ",
-                dosage="5-10 tons/ha annually",
-                dosage_kn="ವಾರ್ಷಿಕವಾಗಿ 5-10 ಟನ್/ಹೆಕ್ಟೇರ್",
-            ),
-            "nitrogen": self._create_nitrogen_rec(value, fertilizer_name, amount, method, timing) if fertilizer_name and amount else Recommendation(
-                title="Nitrogen Deficiency Correction",
-                title_kn="ಸಾರಜನಕ ಕೊರತೆ ನಿವಾರಣೆ",
-                description=f"Available nitrogen is {value:.0f} kg/ha (target: 280+ kg/ha). Apply nitrogen fertilizers in split doses: 50% basal at sowing, 25% at 30 days after sowing (DAS), and 25% at 60 DAS. Mix well with soil and ensure adequate moisture.",
-                description_kn=f"ಲಭ್ಯವಿರುವ ಸಾರಜನಕ {value:.0f} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಗುರಿ: 280+ ಕೆಜಿ/ಹೆಕ್ಟೇರ್). ಸಾರಜನಕ ಗೊಬ್ಬರಗಳನ್ನು ವಿಭಾಗಗಳಲ್ಲಿ ಹಾಕಿ: 50% ಬಿತ್ತನೆ ಸಮಯದಲ್ಲಿ ಮೂಲ, 25% 30 ದಿನಗಳ ನಂತರ, 25% 60 ದಿನಗಳ ನಂತರ. ಮಣ್ಣಿನೊಂದಿಗೆ ಚೆನ್ನಾಗಿ ಮಿಶ್ರಣ ಮಾಡಿ ಮತ್ತು ಸಾಕಷ್ಟು ತೇವಾಂಶವನ್ನು ಖಚಿತಪಡಿಸಿ.",
-                fertilizer="Urea / Ammonium Sulphate",
-                fertilizer_kn="ಯೂರಿಯಾ / ಅಮೋನಿಯಂ ಸಲ್ಫೇಟ್",
-                dosage="Calculate based on deficiency (target: 280+ kg/ha)",
-                dosage_kn="ಕೊರತೆಯ ಆಧಾರದ ಮೇಲೆ ಲೆಕ್ಕಾಚಾರ (ಗುರಿ: 280+ ಕೆಜಿ/ಹೆಕ್ಟೇರ್)",
-            ),
-            "phosphorus": self._create_phosphorus_rec(value, fertilizer_name, amount, method, timing) if fertilizer_name and amount else Recommendation(
-                title="Phosphorus Deficiency Correction",
-                title_kn="ರಂಜಕ ಕೊರತೆ ನಿವಾರಣೆ",
-                description=f"Available phosphorus is {value:.0f} kg/ha (target: 57+ kg/ha). Apply DAP or SSP as basal dose before sowing/transplanting. Mix thoroughly with soil during land preparation.",
-                description_kn=f"ಲಭ್ಯವಿರುವ ರಂಜಕ {value:.0f} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಗುರಿ: 57+ ಕೆಜಿ/ಹೆಕ್ಟೇರ್). ಬಿತ್ತನೆ/ನಾಟಿಗೆ ಮೊದಲು ಡಿಎಪಿ ಅಥವಾ ಎಸ್ಎಸ್ಪಿ ಅನ್ನು ಮೂಲ ಗೊಬ್ಬರವಾಗಿ ಹಾಕಿ. ಭೂಮಿ ಸಿದ್ಧತೆಯ ಸಮಯದಲ್ಲಿ ಮಣ್ಣಿನೊಂದಿಗೆ ಚೆನ್ನಾಗಿ ಮಿಶ್ರಣ ಮಾಡಿ.",
-                fertilizer="DAP / SSP / Rock Phosphate",
-                fertilizer_kn="ಡಿಎಪಿ / ಎಸ್ಎಸ್ಪಿ / ರಾಕ್ ಫಾಸ್ಫೇಟ್",
-                dosage="Calculate based on deficiency (target: 57+ kg/ha)",
-                dosage_kn="ಕೊರತೆಯ ಆಧಾರದ ಮೇಲೆ ಲೆಕ್ಕಾಚಾರ (ಗುರಿ: 57+ ಕೆಜಿ/ಹೆಕ್ಟೇರ್)",
-            ),
-            "potassium": self._create_potassium_rec(value, fertilizer_name, amount, method, timing) if fertilizer_name and amount else Recommendation(
-                title="Potassium Deficiency Correction",
-                title_kn="ಪೊಟ್ಯಾಸಿಯಂ ಕೊರತೆ ನಿವಾರಣೆ",
-                description=f"Available potassium is {value:.0f} kg/ha (target: 337+ kg/ha). Apply MOP in splits: 50% basal, 50% at 30-45 days after sowing.",
-                description_kn=f"ಲಭ್ಯವಿರುವ ಪೊಟ್ಯಾಸಿಯಂ {value:.0f} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಗುರಿ: 337+ ಕೆಜಿ/ಹೆಕ್ಟೇರ್). ಎಂಒಪಿ ಅನ್ನು ವಿಭಾಗಗಳಲ್ಲಿ ಹಾಕಿ: 50% ಮೂಲ, 50% 30-45 ದಿನಗಳ ನಂತರ.",
-                fertilizer="MOP (Muriate of Potash)",
-                fertilizer_kn="ಎಂಒಪಿ (ಪೊಟ್ಯಾಸಿಯಂ ಮ್ಯೂರಿಯೇಟ್)",
-                dosage="Calculate based on deficiency (target: 337+ kg/ha)",
-                dosage_kn="ಕೊರತೆಯ ಆಧಾರದ ಮೇಲೆ ಲೆಕ್ಕಾಚಾರ (ಗುರಿ: 337+ ಕೆಜಿ/ಹೆಕ್ಟೇರ್)",
-            ),
-            "sulphur": Recommendation(
-                title="Sulphur Deficiency Correction",
-                title_kn="ಗಂಧಕ ಕೊರತೆ ನಿವಾರಣೆ",
-                description=f"Available sulphur is {value:.0f} ppm (target: 20+ ppm). Deficiency: {20 - value:.0f} ppm. Apply {amount} kg/ha {fertilizer_name} if calculated, otherwise 200-300 kg/ha gypsum. Method: {method}. Timing: {timing}. Mix with soil during land preparation.",
-                description_kn=f"ಲಭ್ಯವಿರುವ ಗಂಧಕ {value:.0f} ppm (ಗುರಿ: 20+ ppm). ಕೊರತೆ: {20 - value:.0f} ppm. {amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ {fertilizer_name} ಹಾಕಿ (ಲೆಕ್ಕಾಚಾರ ಮಾಡಿದರೆ), ಇಲ್ಲದಿದ್ದರೆ 200-300 ಕೆಜಿ/ಹೆಕ್ಟೇರ್ ಜಿಪ್ಸಮ್. ವಿಧಾನ: {method}. ಸಮಯ: {timing}. ಭೂಮಿ ಸಿದ್ಧತೆಯ ಸಮಯದಲ್ಲಿ ಮಣ್ಣಿನೊಂದಿಗೆ ಮಿಶ್ರಣ ಮಾಡಿ.",
-                fertilizer=fertilizer_name or "Gypsum / Ammonium Sulphate",
-                fertilizer_kn=fertilizer_name or "ಜಿಪ್ಸಮ್ / ಅಮೋನಿಯಂ ಸಲ್ಫೇಟ್",
-                dosage=f"{amount} kg/ha" if amount else "200-300 kg/ha gypsum",
-                dosage_kn=f"{amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್" if amount else "200-300 ಕೆಜಿ/ಹೆಕ್ಟೇರ್ ಜಿಪ್ಸಮ್",
-            ),
-            "zinc": Recommendation(
-                title="Zinc Deficiency Correction",
-                title_kn="ಸತು ಕೊರತೆ ನಿವಾರಣೆ",
-                description=f"Zinc is {value:.2f} ppm (target: 0.6+ ppm). Apply {amount} kg/ha {fertilizer_name}. Method: {method}. Timing: {timing}. For soil application, mix with other fertilizers. For foliar spray, apply in early morning or evening.",
-                description_kn=f"ಸತು {value:.2f} ppm (ಗುರಿ: 0.6+ ppm). {amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ {fertilizer_name} ಹಾಕಿ. ವಿಧಾನ: {method}. ಸಮಯ: {timing}. ಮಣ್ಣಿನ ಅನ್ವಯಕ್ಕೆ, ಇತರ ಗೊಬ್ಬರಗಳೊಂದಿಗೆ ಮಿಶ್ರಣ ಮಾಡಿ. ಎಲೆ ಸಿಂಪರಣೆಗೆ, ಬೆಳಿಗ್ಗೆ ಅಥವಾ ಸಂಜೆ ಹಾಕಿ.",
-                fertilizer=fertilizer_name or "Zinc Sulphate (ZnSO4)",
-                fertilizer_kn=fertilizer_name or "ಸತು ಸಲ್ಫೇಟ್ (ZnSO4)",
-                dosage=f"{amount} kg/ha (soil) or 0.5% foliar spray" if amount else "25 kg/ha (soil) or 0.5% foliar spray",
-                dosage_kn=f"{amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಮಣ್ಣು) ಅಥವಾ 0.5% ಎಲೆ ಸಿಂಪರಣೆ" if amount else "25 ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಮಣ್ಣು) ಅಥವಾ 0.5% ಎಲೆ ಸಿಂಪರಣೆ",
-            ),
-            "boron": Recommendation(
-                title="Boron Deficiency Correction",
-                title_kn="ಬೋರಾನ್ ಕೊರತೆ ನಿವಾರಣೆ",
-                description=f"Boron is {value:.2f} ppm (target: 0.5+ ppm). Apply {amount} kg/ha {fertilizer_name}. Method: {method}. Timing: {timing}. Mix with other fertilizers during land preparation. Avoid direct contact with seeds.",
-                description_kn=f"ಬೋರಾನ್ {value:.2f} ppm (ಗುರಿ: 0.5+ ppm). {amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ {fertilizer_name} ಹಾಕಿ. ವಿಧಾನ: {method}. ಸಮಯ: {timing}. ಭೂಮಿ ಸಿದ್ಧತೆಯ ಸಮಯದಲ್ಲಿ ಇತರ ಗೊಬ್ಬರಗಳೊಂದಿಗೆ ಮಿಶ್ರಣ ಮಾಡಿ. ಬೀಜಗಳೊಂದಿಗೆ ನೇರ ಸಂಪರ್ಕವನ್ನು ತಪ್ಪಿಸಿ.",
-                fertilizer=fertilizer_name or "Borax (Sodium Tetraborate)",
-                fertilizer_kn=fertilizer_name or "ಬೋರಾಕ್ಸ್ (ಸೋಡಿಯಂ ಟೆಟ್ರಾಬೋರೇಟ್)",
-                dosage=f"{amount} kg/ha" if amount else "10-15 kg/ha",
-                dosage_kn=f"{amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್" if amount else "10-15 ಕೆಜಿ/ಹೆಕ್ಟೇರ್",
-            ),
-            "iron": Recommendation(
-                title="Iron Deficiency Correction",
-                title_kn="ಕಬ್ಬಿಣ ಕೊರತೆ ನಿವಾರಣೆ",
-                description=f"Iron is {value:.2f} ppm (target: 4.5+ ppm). Apply {amount} kg/ha {fertilizer_name}. Method: {method}. Timing: {timing}. For foliar spray, use 0.5% solution in early morning. Avoid mixing with alkaline fertilizers.",
-                description_kn=f"ಕಬ್ಬಿಣ {value:.2f} ppm (ಗುರಿ: 4.5+ ppm). {amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ {fertilizer_name} ಹಾಕಿ. ವಿಧಾನ: {method}. ಸಮಯ: {timing}. ಎಲೆ ಸಿಂಪರಣೆಗೆ, ಬೆಳಿಗ್ಗೆ 0.5% ದ್ರಾವಣ ಬಳಸಿ. ಕ್ಷಾರೀಯ ಗೊಬ್ಬರಗಳೊಂದಿಗೆ ಮಿಶ್ರಣ ಮಾಡಬೇಡಿ.",
-                fertilizer=fertilizer_name or "Ferrous Sulphate / Iron Chelate",
-                fertilizer_kn=fertilizer_name or "ಫೆರಸ್ ಸಲ್ಫೇಟ್ / ಕಬ್ಬಿಣ ಕೀಲೇಟ್",
-                dosage=f"{amount} kg/ha (soil) or 0.5% foliar spray" if amount else "8 kg/ha (soil) or 0.5% foliar spray",
-                dosage_kn=f"{amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಮಣ್ಣು) ಅಥವಾ 0.5% ಎಲೆ ಸಿಂಪರಣೆ" if amount else "8 ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಮಣ್ಣು) ಅಥವಾ 0.5% ಎಲೆ ಸಿಂಪರಣೆ",
-            ),
-            "manganese": Recommendation(
-                title="Manganese Deficiency Correction",
-                title_kn="ಮ್ಯಾಂಗನೀಸ್ ಕೊರತೆ ನಿವಾರಣೆ",
-                description=f"Manganese is {value:.2f} ppm (target: 1.0+ ppm). Apply {amount} kg/ha {fertilizer_name}. Method: {method}. Timing: {timing}. For foliar spray, use 0.5% solution. Best applied during active growth stage.",
-                description_kn=f"ಮ್ಯಾಂಗನೀಸ್ {value:.2f} ppm (ಗುರಿ: 1.0+ ppm). {amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ {fertilizer_name} ಹಾಕಿ. ವಿಧಾನ: {method}. ಸಮಯ: {timing}. ಎಲೆ ಸಿಂಪರಣೆಗೆ, 0.5% ದ್ರಾವಣ ಬಳಸಿ. ಸಕ್ರಿಯ ಬೆಳವಣಿಗೆಯ ಹಂತದಲ್ಲಿ ಅತ್ಯುತ್ತಮವಾಗಿ ಅನ್ವಯಿಸಲಾಗುತ್ತದೆ.",
-                fertilizer=fertilizer_name or "Manganese Sulphate (MnSO4)",
-                fertilizer_kn=fertilizer_name or "ಮ್ಯಾಂಗನೀಸ್ ಸಲ್ಫೇಟ್ (MnSO4)",
-                dosage=f"{amount} kg/ha (soil) or 0.5% foliar spray" if amount else "12 kg/ha (soil) or 0.5% foliar spray",
-                dosage_kn=f"{amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಮಣ್ಣು) ಅಥವಾ 0.5% ಎಲೆ ಸಿಂಪರಣೆ" if amount else "12 ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಮಣ್ಣು) ಅಥವಾ 0.5% ಎಲೆ ಸಿಂಪರಣೆ",
-            ),
-            "copper": Recommendation(
-                title="Copper Deficiency Correction",
-                title_kn="ತಾಮ್ರ ಕೊರತೆ ನಿವಾರಣೆ",
-                description=f"Copper is {value:.2f} ppm (target: 0.2+ ppm). Apply {amount} kg/ha {fertilizer_name}. Method: {method}. Timing: {timing}. For foliar spray, use 0.2% solution. Apply during early growth stages for best results.",
-                description_kn=f"ತಾಮ್ರ {value:.2f} ppm (ಗುರಿ: 0.2+ ppm). {amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ {fertilizer_name} ಹಾಕಿ. ವಿಧಾನ: {method}. ಸಮಯ: {timing}. ಎಲೆ ಸಿಂಪರಣೆಗೆ, 0.2% ದ್ರಾವಣ ಬಳಸಿ. ಉತ್ತಮ ಫಲಿತಾಂಶಗಳಿಗಾಗಿ ಆರಂಭಿಕ ಬೆಳವಣಿಗೆಯ ಹಂತದಲ್ಲಿ ಅನ್ವಯಿಸಿ.",
-                fertilizer=fertilizer_name or "Copper Sulphate (CuSO4)",
-                fertilizer_kn=fertilizer_name or "ತಾಮ್ರ ಸಲ್ಫೇಟ್ (CuSO4)",
-                dosage=f"{amount} kg/ha (soil) or 0.2% foliar spray" if amount else "8 kg/ha (soil) or 0.2% foliar spray",
-                dosage_kn=f"{amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಮಣ್ಣು) ಅಥವಾ 0.2% ಎಲೆ ಸಿಂಪರಣೆ" if amount else "8 ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಮಣ್ಣು) ಅಥವಾ 0.2% ಎಲೆ ಸಿಂಪರಣೆ",
-            ),
-        }
-        
-        return recommendations_map.get(param)
+            if fertilizer_name and amount:
+                template = self.calculated_templates.get(param, template)
+
+        return template.render(
+            value=value,
+            deficiency=None if target is None else target - value,
+            fertilizer_name=fertilizer_name,
+            amount=amount,
+            method=method,
+            timing=timing,
+        )
 
     def _get_medium_recommendation(self, param: str, nutrient: NutrientStatus, soil_data: SoilData) -> Optional[Recommendation]:
         """Get recommendation for a medium-level nutrient (optional supplementation)."""
         value = getattr(soil_data, param, None)
         if value is None:
             return None
-            
+
         # Only add medium recommendations for critical nutrients
-        if param in ["nitrogen", "phosphorus", "potassium"]:
-            return Recommendation(
-                title=f"{nutrient.nutrient} Optimization",
-                title_kn=f"{nutrient.nutrient_kn} ಅನುಕೂಲೀಕರಣ",
-                description=f"{nutrient.nutrient} is at medium level ({value:.0f} {nutrient.unit}). Consider moderate supplementation for optimal yield.",
-                description_kn=f"{nutrient.nutrient_kn} ಮಧ್ಯಮ ಮಟ್ಟದಲ್ಲಿದೆ ({value:.0f} {nutrient.unit}). ಸೂಕ್ತ ಇಳುವರಿಗಾಗಿ ಮಧ್ಯಮ ಪೂರಕವನ್ನು ಪರಿಗಣಿಸಿ.",
-                fertilizer="As per crop requirement",
-                fertilizer_kn="ಬೆಳೆಯ ಅವಶ್ಯಕತೆ ಪ್ರಕಾರ",
-                dosage="Moderate application recommended",
-                dosage_kn="ಮಧ್ಯಮ ಅನ್ವಯ ಶಿಫಾರಸು",
+        if param in ("nitrogen", "phosphorus", "potassium"):
+            return MEDIUM_TEMPLATE.render(
+                nutrient=nutrient.nutrient, nutrient_kn=nutrient.nutrient_kn, unit=nutrient.unit, value=value
             )
         return None
 
@@ -586,49 +502,15 @@ class RecommendationService:
     ) -> List[Recommendation]:
         """Basic customization when nutrient_status is not available (fallback)."""
         recommendations = list(base_recommendations)
-        
+
         # Basic pH and nitrogen checks (old method as fallback)
         if soil_data.ph is not None:
-            if soil_data.ph < 6.0:
-                recommendations.append(
-                    Recommendation(
-                        title="Soil pH Correction (Acidic)",
-                        title_kn="ಮಣ್ಣಿನ pH ತಿದ್ದುಪಡಿ (ಆಮ್ಲೀಯ)",
-                        description="Apply lime to correct acidic soil",
-                        description_kn="ಆಮ್ಲೀಯ ಮಣ್ಣನ್ನು ಸರಿಪಡಿಸಲು ಸುಣ್ಣ ಹಾಕಿ",
-                        fertilizer="Agricultural Lime",
-                        fertilizer_kn="ಕೃಷಿ ಸುಣ್ಣ",
-                        dosage="2-4 quintals/ha",
-                        dosage_kn="2-4 ಕ್ವಿಂಟಾಲ್/ಹೆಕ್ಟೇರ್",
-                    )
-                )
-            elif soil_data.ph > 8.5:
-                recommendations.append(
-                    Recommendation(
-                        title="Soil pH Correction (Alkaline)",
-                        title_kn="ಮಣ್ಣಿನ pH ತಿದ್ದುಪಡಿ (ಕ್ಷಾರೀಯ)",
-                        description="Apply gypsum to correct alkaline soil",
-                        description_kn="ಕ್ಷಾರೀಯ ಮಣ್ಣನ್ನು ಸರಿಪಡಿಸಲು ಜಿಪ್ಸಮ್ ಹಾಕಿ",
-                        fertilizer="Gypsum",
-                        fertilizer_kn="ಜಿಪ್ಸಮ್",
-                        dosage="2-5 quintals/ha",
-                        dosage_kn="2-5 ಕ್ವಿಂಟಾಲ್/ಹೆಕ್ಟೇರ್",
-                    )
-                )
-
-        if soil_data.nitrogen is not None and soil_data.nitrogen < 280:
-            recommendations.append(
-                Recommendation(
-                    title="Nitrogen Deficiency Correction",
-                    title_kn="ಸಾರಜನಕ ಕೊರತೆ ನಿವಾರಣೆ",
-                    description="Soil is low in nitrogen. Increase nitrogen application.",
-                    description_kn="ಮಣ್ಣಿನಲ್ಲಿ ಸಾರಜನಕ ಕಡಿಮೆ ಇದೆ. ಸಾರಜನಕ ಅನ್ವಯವನ್ನು ಹೆಚ್ಚಿಸಿ.",
-                    fertilizer="Urea / Ammonium Sulphate",
-                    fertilizer_kn="ಯೂರಿಯಾ / ಅಮೋನಿಯಂ ಸಲ್ಫೇಟ್",
-                    dosage="Increase by 20-25%",
-                    dosage_kn="20-25% ಹೆಚ್ಚಿಸಿ",
-                )
-            )
+            if soil_data.ph < self.thresholds.get("ph", "lime_below"):
+                recommendations.append(BASIC_TEMPLATES["ph_acidic"].render())
+            elif soil_data.ph > self.thresholds.get("ph", "gypsum_above"):
+                recommendations.append(BASIC_TEMPLATES["ph_alkaline"].render())
 
-        return recommendations
+        if soil_data.nitrogen is not None and soil_data.nitrogen < self.thresholds.target("nitrogen"):
+            recommendations.append(BASIC_TEMPLATES["nitrogen"].render())
 
+        return recommendations
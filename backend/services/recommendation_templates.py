@@ -0,0 +1,304 @@
+"""Prebuilt bilingual templates for the rule-based recommendations.
+
+Every field is a ``str.format`` pattern (or a plain string). Targets from
+the threshold table are filled in once, when ``compile_templates`` runs,
+so rendering a recommendation costs a few ``format_map`` calls and a
+``Recommendation.model_construct`` - the strings are our own, so pydantic
+validation is skipped.
+"""
+
+from typing import Callable, Dict, List, Tuple
+
+from models import Recommendation
+from services.thresholds import ThresholdTable
+
+FIELDS = (
+    "title", "title_kn", "description", "description_kn",
+    "fertilizer", "fertilizer_kn", "dosage", "dosage_kn",
+)
+
+
+class Either:
+    """A field whose pattern depends on whether a context value is set."""
+
+    __slots__ = ("key", "when_set", "otherwise")
+
+    def __init__(self, key: str, when_set: str, otherwise: str):
+        self.key = key
+        self.when_set = when_set
+        self.otherwise = otherwise
+
+
+def _fill(pattern, constants: Dict[str, object]):
+    """Substitute plain ``{name}`` placeholders for the given constants."""
+    if isinstance(pattern, Either):
+        return Either(pattern.key, _fill(pattern.when_set, constants), _fill(pattern.otherwise, constants))
+    if pattern is None:
+        return None
+    for name, value in constants.items():
+        pattern = pattern.replace("{" + name + "}", str(value))
+    return pattern
+
+
+def _renderer(pattern) -> Callable[[dict], str]:
+    if isinstance(pattern, Either):
+        when_set, otherwise, key = _renderer(pattern.when_set), _renderer(pattern.otherwise), pattern.key
+        return lambda context: when_set(context) if context.get(key) else otherwise(context)
+    if "{" not in pattern:
+        return lambda context: pattern
+    return pattern.format_map
+
+
+class RecommendationTemplate:
+    """One recommendation with placeholders, split into constant and rendered fields."""
+
+    def __init__(self, **fields):
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown recommendation fields: {sorted(unknown)}")
+        self.fields = fields
+        self._constants: Dict[str, str] = {}
+        self._dynamic: List[Tuple[str, Callable[[dict], str]]] = []
+        for name, pattern in fields.items():
+            if pattern is None or (isinstance(pattern, str) and "{" not in pattern):
+                self._constants[name] = pattern
+            else:
+                self._dynamic.append((name, _renderer(pattern)))
+
+    def bind(self, **constants) -> "RecommendationTemplate":
+        """A copy with some placeholders (e.g. ``target``) filled in for good."""
+        return RecommendationTemplate(**{name: _fill(pattern, constants) for name, pattern in self.fields.items()})
+
+    def render(self, **context) -> Recommendation:
+        fields = dict(self._constants)
+        for name, render in self._dynamic:
+            fields[name] = render(context)
+        return Recommendation.model_construct(**fields)
+
+
+# Low/deficient nutrients. Context: value, deficiency, fertilizer_name,
+# amount, method, timing (the last four from _calculate_fertilizer_amount,
+# None when nothing was calculated). {target} comes from the threshold table.
+DEFICIENCY_TEMPLATES = {
+    "ec": RecommendationTemplate(
+        title="Electrical Conductivity Management",
+        title_kn="ವಿದ್ಯುತ್ ವಾಹಕತೆ ನಿರ್ವಹಣೆ",
+        description="EC is {value:.2f} dS/m. For saline soils, use gypsum and ensure proper drainage.",
+        description_kn="EC {value:.2f} dS/m ಆಗಿದೆ. ಲವಣ ಮಣ್ಣಿಗೆ, ಜಿಪ್ಸಮ್ ಬಳಸಿ ಮತ್ತು ಸರಿಯಾದ ಜಲನಿಕಾಸವನ್ನು ಖಚಿತಪಡಿಸಿ.",
+        fertilizer="Gypsum + Organic Matter",
+        fertilizer_kn="ಜಿಪ್ಸಮ್ + ಸಾವಯವ ವಸ್ತು",
+        dosage="As per soil test",
+        dosage_kn="ಮಣ್ಣು ಪರೀಕ್ಷೆ ಪ್ರಕಾರ",
+    ),
+    "organic_carbon": RecommendationTemplate(
+        title="Organic Carbon Improvement",
+        title_kn="ಸಾವಯವ ಇಂಗಾಲ ಸುಧಾರಣೆ",
+        description="Organic carbon is {value:.2f}%, which is low. Add FYM, compost, or green manure.",
+        description_kn="ಸಾವಯವ ಇಂಗಾಲ {value:.2f}% ಆಗಿದೆ, ಇದು ಕಡಿಮೆಯಾಗಿದೆ. ಕೊಟ್ಟಿಗೆ ಗೊಬ್ಬರ, ಕಾಂಪೋಸ್ಟ್ ಅಥವಾ ಹಸಿರು ಗೊಬ್ಬರ ಸೇರಿಸಿ.",
+        fertilizer="FYM / Compost / Green Manure",
+        fertilizer_kn="ಕೊಟ್ಟಿಗೆ ಗೊಬ್ಬರ / ಕಾಂಪೋಸ್ಟ್ / ಹಸಿರು ಗೊಬ್ಬರ",
+        dosage="5-10 tons/ha annually",
+        dosage_kn="ವಾರ್ಷಿಕವಾಗಿ 5-10 ಟನ್/ಹೆಕ್ಟೇರ್",
+    ),
+    "nitrogen": RecommendationTemplate(
+        title="Nitrogen Deficiency Correction",
+        title_kn="ಸಾರಜನಕ ಕೊರತೆ ನಿವಾರಣೆ",
+        description="Available nitrogen is {value:.0f} kg/ha (target: {target}+ kg/ha). Apply nitrogen fertilizers in split doses: 50% basal at sowing, 25% at 30 days after sowing (DAS), and 25% at 60 DAS. Mix well with soil and ensure adequate moisture.",
+        description_kn="ಲಭ್ಯವಿರುವ ಸಾರಜನಕ {value:.0f} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಗುರಿ: {target}+ ಕೆಜಿ/ಹೆಕ್ಟೇರ್). ಸಾರಜನಕ ಗೊಬ್ಬರಗಳನ್ನು ವಿಭಾಗಗಳಲ್ಲಿ ಹಾಕಿ: 50% ಬಿತ್ತನೆ ಸಮಯದಲ್ಲಿ ಮೂಲ, 25% 30 ದಿನಗಳ ನಂತರ, 25% 60 ದಿನಗಳ ನಂತರ. ಮಣ್ಣಿನೊಂದಿಗೆ ಚೆನ್ನಾಗಿ ಮಿಶ್ರಣ ಮಾಡಿ ಮತ್ತು ಸಾಕಷ್ಟು ತೇವಾಂಶವನ್ನು ಖಚಿತಪಡಿಸಿ.",
+        fertilizer="Urea / Ammonium Sulphate",
+        fertilizer_kn="ಯೂರಿಯಾ / ಅಮೋನಿಯಂ ಸಲ್ಫೇಟ್",
+        dosage="Calculate based on deficiency (target: {target}+ kg/ha)",
+        dosage_kn="ಕೊರತೆಯ ಆಧಾರದ ಮೇಲೆ ಲೆಕ್ಕಾಚಾರ (ಗುರಿ: {target}+ ಕೆಜಿ/ಹೆಕ್ಟೇರ್)",
+    ),
+    "phosphorus": RecommendationTemplate(
+        title="Phosphorus Deficiency Correction",
+        title_kn="ರಂಜಕ ಕೊರತೆ ನಿವಾರಣೆ",
+        description="Available phosphorus is {value:.0f} kg/ha (target: {target}+ kg/ha). Apply DAP or SSP as basal dose before sowing/transplanting. Mix thoroughly with soil during land preparation.",
+        description_kn="ಲಭ್ಯವಿರುವ ರಂಜಕ {value:.0f} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಗುರಿ: {target}+ ಕೆಜಿ/ಹೆಕ್ಟೇರ್). ಬಿತ್ತನೆ/ನಾಟಿಗೆ ಮೊದಲು ಡಿಎಪಿ ಅಥವಾ ಎಸ್ಎಸ್ಪಿ ಅನ್ನು ಮೂಲ ಗೊಬ್ಬರವಾಗಿ ಹಾಕಿ. ಭೂಮಿ ಸಿದ್ಧತೆಯ ಸಮಯದಲ್ಲಿ ಮಣ್ಣಿನೊಂದಿಗೆ ಚೆನ್ನಾಗಿ ಮಿಶ್ರಣ ಮಾಡಿ.",
+        fertilizer="DAP / SSP / Rock Phosphate",
+        fertilizer_kn="ಡಿಎಪಿ / ಎಸ್ಎಸ್ಪಿ / ರಾಕ್ ಫಾಸ್ಫೇಟ್",
+        dosage="Calculate based on deficiency (target: {target}+ kg/ha)",
+        dosage_kn="ಕೊರತೆಯ ಆಧಾರದ ಮೇಲೆ ಲೆಕ್ಕಾಚಾರ (ಗುರಿ: {target}+ ಕೆಜಿ/ಹೆಕ್ಟೇರ್)",
+    ),
+    "potassium": RecommendationTemplate(
+        title="Potassium Deficiency Correction",
+        title_kn="ಪೊಟ್ಯಾಸಿಯಂ ಕೊರತೆ ನಿವಾರಣೆ",
+        description="Available potassium is {value:.0f} kg/ha (target: {target}+ kg/ha). Apply MOP in splits: 50% basal, 50% at 30-45 days after sowing.",
+        description_kn="ಲಭ್ಯವಿರುವ ಪೊಟ್ಯಾಸಿಯಂ {value:.0f} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಗುರಿ: {target}+ ಕೆಜಿ/ಹೆಕ್ಟೇರ್). ಎಂಒಪಿ ಅನ್ನು ವಿಭಾಗಗಳಲ್ಲಿ ಹಾಕಿ: 50% ಮೂಲ, 50% 30-45 ದಿನಗಳ ನಂತರ.",
+        fertilizer="MOP (Muriate of Potash)",
+        fertilizer_kn="ಎಂಒಪಿ (ಪೊಟ್ಯಾಸಿಯಂ ಮ್ಯೂರಿಯೇಟ್)",
+        dosage="Calculate based on deficiency (target: {target}+ kg/ha)",
+        dosage_kn="ಕೊರತೆಯ ಆಧಾರದ ಮೇಲೆ ಲೆಕ್ಕಾಚಾರ (ಗುರಿ: {target}+ ಕೆಜಿ/ಹೆಕ್ಟೇರ್)",
+    ),
+    "sulphur": RecommendationTemplate(
+        title="Sulphur Deficiency Correction",
+        title_kn="ಗಂಧಕ ಕೊರತೆ ನಿವಾರಣೆ",
+        description="Available sulphur is {value:.0f} ppm (target: {target}+ ppm). Deficiency: {deficiency:.0f} ppm. Apply {amount} kg/ha {fertilizer_name} if calculated, otherwise 200-300 kg/ha gypsum. Method: {method}. Timing: {timing}. Mix with soil during land preparation.",
+        description_kn="ಲಭ್ಯವಿರುವ ಗಂಧಕ {value:.0f} ppm (ಗುರಿ: {target}+ ppm). ಕೊರತೆ: {deficiency:.0f} ppm. {amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ {fertilizer_name} ಹಾಕಿ (ಲೆಕ್ಕಾಚಾರ ಮಾಡಿದರೆ), ಇಲ್ಲದಿದ್ದರೆ 200-300 ಕೆಜಿ/ಹೆಕ್ಟೇರ್ ಜಿಪ್ಸಮ್. ವಿಧಾನ: {method}. ಸಮಯ: {timing}. ಭೂಮಿ ಸಿದ್ಧತೆಯ ಸಮಯದಲ್ಲಿ ಮಣ್ಣಿನೊಂದಿಗೆ ಮಿಶ್ರಣ ಮಾಡಿ.",
+        fertilizer=Either("fertilizer_name", "{fertilizer_name}", "Gypsum / Ammonium Sulphate"),
+        fertilizer_kn=Either("fertilizer_name", "{fertilizer_name}", "ಜಿಪ್ಸಮ್ / ಅಮೋನಿಯಂ ಸಲ್ಫೇಟ್"),
+        dosage=Either("amount", "{amount} kg/ha", "200-300 kg/ha gypsum"),
+        dosage_kn=Either("amount", "{amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್", "200-300 ಕೆಜಿ/ಹೆಕ್ಟೇರ್ ಜಿಪ್ಸಮ್"),
+    ),
+    "zinc": RecommendationTemplate(
+        title="Zinc Deficiency Correction",
+        title_kn="ಸತು ಕೊರತೆ ನಿವಾರಣೆ",
+        description="Zinc is {value:.2f} ppm (target: {target}+ ppm). Apply {amount} kg/ha {fertilizer_name}. Method: {method}. Timing: {timing}. For soil application, mix with other fertilizers. For foliar spray, apply in early morning or evening.",
+        description_kn="ಸತು {value:.2f} ppm (ಗುರಿ: {target}+ ppm). {amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ {fertilizer_name} ಹಾಕಿ. ವಿಧಾನ: {method}. ಸಮಯ: {timing}. ಮಣ್ಣಿನ ಅನ್ವಯಕ್ಕೆ, ಇತರ ಗೊಬ್ಬರಗಳೊಂದಿಗೆ ಮಿಶ್ರಣ ಮಾಡಿ. ಎಲೆ ಸಿಂಪರಣೆಗೆ, ಬೆಳಿಗ್ಗೆ ಅಥವಾ ಸಂಜೆ ಹಾಕಿ.",
+        fertilizer=Either("fertilizer_name", "{fertilizer_name}", "Zinc Sulphate (ZnSO4)"),
+        fertilizer_kn=Either("fertilizer_name", "{fertilizer_name}", "ಸತು ಸಲ್ಫೇಟ್ (ZnSO4)"),
+        dosage=Either("amount", "{amount} kg/ha (soil) or 0.5% foliar spray", "25 kg/ha (soil) or 0.5% foliar spray"),
+        dosage_kn=Either("amount", "{amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಮಣ್ಣು) ಅಥವಾ 0.5% ಎಲೆ ಸಿಂಪರಣೆ", "25 ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಮಣ್ಣು) ಅಥವಾ 0.5% ಎಲೆ ಸಿಂಪರಣೆ"),
+    ),
+    "boron": RecommendationTemplate(
+        title="Boron Deficiency Correction",
+        title_kn="ಬೋರಾನ್ ಕೊರತೆ ನಿವಾರಣೆ",
+        description="Boron is {value:.2f} ppm (target: {target}+ ppm). Apply {amount} kg/ha {fertilizer_name}. Method: {method}. Timing: {timing}. Mix with other fertilizers during land preparation. Avoid direct contact with seeds.",
+        description_kn="ಬೋರಾನ್ {value:.2f} ppm (ಗುರಿ: {target}+ ppm). {amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ {fertilizer_name} ಹಾಕಿ. ವಿಧಾನ: {method}. ಸಮಯ: {timing}. ಭೂಮಿ ಸಿದ್ಧತೆಯ ಸಮಯದಲ್ಲಿ ಇತರ ಗೊಬ್ಬರಗಳೊಂದಿಗೆ ಮಿಶ್ರಣ ಮಾಡಿ. ಬೀಜಗಳೊಂದಿಗೆ ನೇರ ಸಂಪರ್ಕವನ್ನು ತಪ್ಪಿಸಿ.",
+        fertilizer=Either("fertilizer_name", "{fertilizer_name}", "Borax (Sodium Tetraborate)"),
+        fertilizer_kn=Either("fertilizer_name", "{fertilizer_name}", "ಬೋರಾಕ್ಸ್ (ಸೋಡಿಯಂ ಟೆಟ್ರಾಬೋರೇಟ್)"),
+        dosage=Either("amount", "{amount} kg/ha", "10-15 kg/ha"),
+        dosage_kn=Either("amount", "{amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್", "10-15 ಕೆಜಿ/ಹೆಕ್ಟೇರ್"),
+    ),
+    "iron": RecommendationTemplate(
+        title="Iron Deficiency Correction",
+        title_kn="ಕಬ್ಬಿಣ ಕೊರತೆ ನಿವಾರಣೆ",
+        description="Iron is {value:.2f} ppm (target: {target}+ ppm). Apply {amount} kg/ha {fertilizer_name}. Method: {method}. Timing: {timing}. For foliar spray, use 0.5% solution in early morning. Avoid mixing with alkaline fertilizers.",
+        description_kn="ಕಬ್ಬಿಣ {value:.2f} ppm (ಗುರಿ: {target}+ ppm). {amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ {fertilizer_name} ಹಾಕಿ. ವಿಧಾನ: {method}. ಸಮಯ: {timing}. ಎಲೆ ಸಿಂಪರಣೆಗೆ, ಬೆಳಿಗ್ಗೆ 0.5% ದ್ರಾವಣ ಬಳಸಿ. ಕ್ಷಾರೀಯ ಗೊಬ್ಬರಗಳೊಂದಿಗೆ ಮಿಶ್ರಣ ಮಾಡಬೇಡಿ.",
+        fertilizer=Either("fertilizer_name", "{fertilizer_name}", "Ferrous Sulphate / Iron Chelate"),
+        fertilizer_kn=Either("fertilizer_name", "{fertilizer_name}", "ಫೆರಸ್ ಸಲ್ಫೇಟ್ / ಕಬ್ಬಿಣ ಕೀಲೇಟ್"),
+        dosage=Either("amount", "{amount} kg/ha (soil) or 0.5% foliar spray", "8 kg/ha (soil) or 0.5% foliar spray"),
+        dosage_kn=Either("amount", "{amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಮಣ್ಣು) ಅಥವಾ 0.5% ಎಲೆ ಸಿಂಪರಣೆ", "8 ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಮಣ್ಣು) ಅಥವಾ 0.5% ಎಲೆ ಸಿಂಪರಣೆ"),
+    ),
+    "manganese": RecommendationTemplate(
+        title="Manganese Deficiency Correction",
+        title_kn="ಮ್ಯಾಂಗನೀಸ್ ಕೊರತೆ ನಿವಾರಣೆ",
+        description="Manganese is {value:.2f} ppm (target: {target}+ ppm). Apply {amount} kg/ha {fertilizer_name}. Method: {method}. Timing: {timing}. For foliar spray, use 0.5% solution. Best applied during active growth stage.",
+        description_kn="ಮ್ಯಾಂಗನೀಸ್ {value:.2f} ppm (ಗುರಿ: {target}+ ppm). {amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ {fertilizer_name} ಹಾಕಿ. ವಿಧಾನ: {method}. ಸಮಯ: {timing}. ಎಲೆ ಸಿಂಪರಣೆಗೆ, 0.5% ದ್ರಾವಣ ಬಳಸಿ. ಸಕ್ರಿಯ ಬೆಳವಣಿಗೆಯ ಹಂತದಲ್ಲಿ ಅತ್ಯುತ್ತಮವಾಗಿ ಅನ್ವಯಿಸಲಾಗುತ್ತದೆ.",
+        fertilizer=Either("fertilizer_name", "{fertilizer_name}", "Manganese Sulphate (MnSO4)"),
+        fertilizer_kn=Either("fertilizer_name", "{fertilizer_name}", "ಮ್ಯಾಂಗನೀಸ್ ಸಲ್ಫೇಟ್ (MnSO4)"),
+        dosage=Either("amount", "{amount} kg/ha (soil) or 0.5% foliar spray", "12 kg/ha (soil) or 0.5% foliar spray"),
+        dosage_kn=Either("amount", "{amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಮಣ್ಣು) ಅಥವಾ 0.5% ಎಲೆ ಸಿಂಪರಣೆ", "12 ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಮಣ್ಣು) ಅಥವಾ 0.5% ಎಲೆ ಸಿಂಪರಣೆ"),
+    ),
+    "copper": RecommendationTemplate(
+        title="Copper Deficiency Correction",
+        title_kn="ತಾಮ್ರ ಕೊರತೆ ನಿವಾರಣೆ",
+        description="Copper is {value:.2f} ppm (target: {target}+ ppm). Apply {amount} kg/ha {fertilizer_name}. Method: {method}. Timing: {timing}. For foliar spray, use 0.2% solution. Apply during early growth stages for best results.",
+        description_kn="ತಾಮ್ರ {value:.2f} ppm (ಗುರಿ: {target}+ ppm). {amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ {fertilizer_name} ಹಾಕಿ. ವಿಧಾನ: {method}. ಸಮಯ: {timing}. ಎಲೆ ಸಿಂಪರಣೆಗೆ, 0.2% ದ್ರಾವಣ ಬಳಸಿ. ಉತ್ತಮ ಫಲಿತಾಂಶಗಳಿಗಾಗಿ ಆರಂಭಿಕ ಬೆಳವಣಿಗೆಯ ಹಂತದಲ್ಲಿ ಅನ್ವಯಿಸಿ.",
+        fertilizer=Either("fertilizer_name", "{fertilizer_name}", "Copper Sulphate (CuSO4)"),
+        fertilizer_kn=Either("fertilizer_name", "{fertilizer_name}", "ತಾಮ್ರ ಸಲ್ಫೇಟ್ (CuSO4)"),
+        dosage=Either("amount", "{amount} kg/ha (soil) or 0.2% foliar spray", "8 kg/ha (soil) or 0.2% foliar spray"),
+        dosage_kn=Either("amount", "{amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಮಣ್ಣು) ಅಥವಾ 0.2% ಎಲೆ ಸಿಂಪರಣೆ", "8 ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಮಣ್ಣು) ಅಥವಾ 0.2% ಎಲೆ ಸಿಂಪರಣೆ"),
+    ),
+}
+
+# Used instead of DEFICIENCY_TEMPLATES when a fertilizer amount was calculated
+CALCULATED_TEMPLATES = {
+    "nitrogen": RecommendationTemplate(
+        title="Nitrogen Deficiency Correction",
+        title_kn="ಸಾರಜನಕ ಕೊರತೆ ನಿವಾರಣೆ",
+        description="Available nitrogen is {value:.0f} kg/ha (target: {target}+ kg/ha). Deficiency: {deficiency:.0f} kg/ha. Apply {amount} kg/ha {fertilizer_name}. Method: {method}. Timing: {timing}. Mix well with soil and ensure adequate moisture for best results.",
+        description_kn="ಲಭ್ಯವಿರುವ ಸಾರಜನಕ {value:.0f} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಗುರಿ: {target}+ ಕೆಜಿ/ಹೆಕ್ಟೇರ್). ಕೊರತೆ: {deficiency:.0f} ಕೆಜಿ/ಹೆಕ್ಟೇರ್. {amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ {fertilizer_name} ಹಾಕಿ. ವಿಧಾನ: {method}. ಸಮಯ: {timing}. ಮಣ್ಣಿನೊಂದಿಗೆ ಚೆನ್ನಾಗಿ ಮಿಶ್ರಣ ಮಾಡಿ ಮತ್ತು ಉತ್ತಮ ಫಲಿತಾಂಶಗಳಿಗಾಗಿ ಸಾಕಷ್ಟು ತೇವಾಂಶವನ್ನು ಖಚಿತಪಡಿಸಿ.",
+        fertilizer="{fertilizer_name}",
+        fertilizer_kn="ಯೂರಿಯಾ",
+        dosage="{amount} kg/ha",
+        dosage_kn="{amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್",
+    ),
+    "phosphorus": RecommendationTemplate(
+        title="Phosphorus Deficiency Correction",
+        title_kn="ರಂಜಕ ಕೊರತೆ ನಿವಾರಣೆ",
+        description="Available phosphorus is {value:.0f} kg/ha (target: {target}+ kg/ha). Deficiency: {deficiency:.0f} kg/ha. Apply {amount} kg/ha {fertilizer_name}. Method: {method}. Timing: {timing}. Mix thoroughly with soil during land preparation and ensure good soil contact.",
+        description_kn="ಲಭ್ಯವಿರುವ ರಂಜಕ {value:.0f} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಗುರಿ: {target}+ ಕೆಜಿ/ಹೆಕ್ಟೇರ್). ಕೊರತೆ: {deficiency:.0f} ಕೆಜಿ/ಹೆಕ್ಟೇರ್. {amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ {fertilizer_name} ಹಾಕಿ. ವಿಧಾನ: {method}. ಸಮಯ: {timing}. ಭೂಮಿ ಸಿದ್ಧತೆಯ ಸಮಯದಲ್ಲಿ ಮಣ್ಣಿನೊಂದಿಗೆ ಚೆನ್ನಾಗಿ ಮಿಶ್ರಣ ಮಾಡಿ ಮತ್ತು ಉತ್ತಮ ಮಣ್ಣಿನ ಸಂಪರ್ಕವನ್ನು ಖಚಿತಪಡಿಸಿ.",
+        fertilizer="{fertilizer_name}",
+        fertilizer_kn="ಡಿಎಪಿ",
+        dosage="{amount} kg/ha",
+        dosage_kn="{amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್",
+    ),
+    "potassium": RecommendationTemplate(
+        title="Potassium Deficiency Correction",
+        title_kn="ಪೊಟ್ಯಾಸಿಯಂ ಕೊರತೆ ನಿವಾರಣೆ",
+        description="Available potassium is {value:.0f} kg/ha (target: {target}+ kg/ha). Deficiency: {deficiency:.0f} kg/ha. Apply {amount} kg/ha {fertilizer_name}. Method: {method}. Timing: {timing}. Apply in furrows or broadcast and mix with soil.",
+        description_kn="ಲಭ್ಯವಿರುವ ಪೊಟ್ಯಾಸಿಯಂ {value:.0f} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ (ಗುರಿ: {target}+ ಕೆಜಿ/ಹೆಕ್ಟೇರ್). ಕೊರತೆ: {deficiency:.0f} ಕೆಜಿ/ಹೆಕ್ಟೇರ್. {amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್ {fertilizer_name} ಹಾಕಿ. ವಿಧಾನ: {method}. ಸಮಯ: {timing}. ಕಂದರಗಳಲ್ಲಿ ಅಥವಾ ವ್ಯಾಪಕವಾಗಿ ಹಾಕಿ ಮತ್ತು ಮಣ್ಣಿನೊಂದಿಗೆ ಮಿಶ್ರಣ ಮಾಡಿ.",
+        fertilizer="{fertilizer_name}",
+        fertilizer_kn="ಎಂಒಪಿ",
+        dosage="{amount} kg/ha",
+        dosage_kn="{amount} ಕೆಜಿ/ಹೆಕ್ಟೇರ್",
+    ),
+}
+
+# Medium N/P/K. Context: nutrient, nutrient_kn, unit (from NutrientStatus), value
+MEDIUM_TEMPLATE = RecommendationTemplate(
+    title="{nutrient} Optimization",
+    title_kn="{nutrient_kn} ಅನುಕೂಲೀಕರಣ",
+    description="{nutrient} is at medium level ({value:.0f} {unit}). Consider moderate supplementation for optimal yield.",
+    description_kn="{nutrient_kn} ಮಧ್ಯಮ ಮಟ್ಟದಲ್ಲಿದೆ ({value:.0f} {unit}). ಸೂಕ್ತ ಇಳುವರಿಗಾಗಿ ಮಧ್ಯಮ ಪೂರಕವನ್ನು ಪರಿಗಣಿಸಿ.",
+    fertilizer="As per crop requirement",
+    fertilizer_kn="ಬೆಳೆಯ ಅವಶ್ಯಕತೆ ಪ್ರಕಾರ",
+    dosage="Moderate application recommended",
+    dosage_kn="ಮಧ್ಯಮ ಅನ್ವಯ ಶಿಫಾರಸು",
+)
+
+# pH corrections. Context: ph
+PH_TEMPLATES = {
+    "acidic": RecommendationTemplate(
+        title="Soil pH Correction (Acidic)",
+        title_kn="ಮಣ್ಣಿನ pH ತಿದ್ದುಪಡಿ (ಆಮ್ಲೀಯ)",
+        description="Your soil pH is {ph:.1f}, which is acidic. Apply lime to improve nutrient availability.",
+        description_kn="ನಿಮ್ಮ ಮಣ್ಣಿನ pH {ph:.1f} ಆಗಿದೆ, ಇದು ಆಮ್ಲೀಯವಾಗಿದೆ. ಪೋಷಕಾಂಶಗಳ ಲಭ್ಯತೆಯನ್ನು ಸುಧಾರಿಸಲು ಸುಣ್ಣ ಹಾಕಿ.",
+        fertilizer="Agricultural Lime",
+        fertilizer_kn="ಕೃಷಿ ಸುಣ್ಣ",
+        dosage="2-4 quintals/ha based on pH level",
+        dosage_kn="pH ಮಟ್ಟದ ಆಧಾರದ ಮೇಲೆ 2-4 ಕ್ವಿಂಟಾಲ್/ಹೆಕ್ಟೇರ್",
+    ),
+    "alkaline": RecommendationTemplate(
+        title="Soil pH Correction (Alkaline)",
+        title_kn="ಮಣ್ಣಿನ pH ತಿದ್ದುಪಡಿ (ಕ್ಷಾರೀಯ)",
+        description="Your soil pH is {ph:.1f}, which is alkaline. Apply gypsum to improve soil structure.",
+        description_kn="ನಿಮ್ಮ ಮಣ್ಣಿನ pH {ph:.1f} ಆಗಿದೆ, ಇದು ಕ್ಷಾರೀಯವಾಗಿದೆ. ಮಣ್ಣಿನ ರಚನೆಯನ್ನು ಸುಧಾರಿಸಲು ಜಿಪ್ಸಮ್ ಹಾಕಿ.",
+        fertilizer="Gypsum",
+        fertilizer_kn="ಜಿಪ್ಸಮ್",
+        dosage="2-5 quintals/ha based on pH level",
+        dosage_kn="pH ಮಟ್ಟದ ಆಧಾರದ ಮೇಲೆ 2-5 ಕ್ವಿಂಟಾಲ್/ಹೆಕ್ಟೇರ್",
+    ),
+}
+
+# Fallback when only SoilData is known (no nutrient status); no placeholders
+BASIC_TEMPLATES = {
+    "ph_acidic": RecommendationTemplate(
+        title="Soil pH Correction (Acidic)",
+        title_kn="ಮಣ್ಣಿನ pH ತಿದ್ದುಪಡಿ (ಆಮ್ಲೀಯ)",
+        description="Apply lime to correct acidic soil",
+        description_kn="ಆಮ್ಲೀಯ ಮಣ್ಣನ್ನು ಸರಿಪಡಿಸಲು ಸುಣ್ಣ ಹಾಕಿ",
+        fertilizer="Agricultural Lime",
+        fertilizer_kn="ಕೃಷಿ ಸುಣ್ಣ",
+        dosage="2-4 quintals/ha",
+        dosage_kn="2-4 ಕ್ವಿಂಟಾಲ್/ಹೆಕ್ಟೇರ್",
+    ),
+    "ph_alkaline": RecommendationTemplate(
+        title="Soil pH Correction (Alkaline)",
+        title_kn="ಮಣ್ಣಿನ pH ತಿದ್ದುಪಡಿ (ಕ್ಷಾರೀಯ)",
+        description="Apply gypsum to correct alkaline soil",
+        description_kn="ಕ್ಷಾರೀಯ ಮಣ್ಣನ್ನು ಸರಿಪಡಿಸಲು ಜಿಪ್ಸಮ್ ಹಾಕಿ",
+        fertilizer="Gypsum",
+        fertilizer_kn="ಜಿಪ್ಸಮ್",
+        dosage="2-5 quintals/ha",
+        dosage_kn="2-5 ಕ್ವಿಂಟಾಲ್/ಹೆಕ್ಟೇರ್",
+    ),
+    "nitrogen": RecommendationTemplate(
+        title="Nitrogen Deficiency Correction",
+        title_kn="ಸಾರಜನಕ ಕೊರತೆ ನಿವಾರಣೆ",
+        description="Soil is low in nitrogen. Increase nitrogen application.",
+        description_kn="ಮಣ್ಣಿನಲ್ಲಿ ಸಾರಜನಕ ಕಡಿಮೆ ಇದೆ. ಸಾರಜನಕ ಅನ್ವಯವನ್ನು ಹೆಚ್ಚಿಸಿ.",
+        fertilizer="Urea / Ammonium Sulphate",
+        fertilizer_kn="ಯೂರಿಯಾ / ಅಮೋನಿಯಂ ಸಲ್ಫೇಟ್",
+        dosage="Increase by 20-25%",
+        dosage_kn="20-25% ಹೆಚ್ಚಿಸಿ",
+    ),
+}
+
+
+def compile_templates(table: ThresholdTable) -> Tuple[Dict[str, RecommendationTemplate], Dict[str, RecommendationTemplate]]:
+    """Deficiency and calculated-dose templates with each nutrient's target filled in."""
+    deficiency = {param: template.bind(target=table.target(param)) for param, template in DEFICIENCY_TEMPLATES.items()}
+    calculated = {param: template.bind(target=table.target(param)) for param, template in CALCULATED_TEMPLATES.items()}
+    return deficiency, calculated
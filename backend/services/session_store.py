@@ -0,0 +1,208 @@
+"""Analysis session store linking /analyze-direct results to /recommendation calls."""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from models import SoilData
+
+# (soil_data, raw_values, status_info) as returned by AnalysisService.analyze_soil_card
+Session = Tuple[SoilData, Dict, Dict]
+
+
+def _serialize(soil_data: SoilData, raw_values: Dict, status_info: Dict) -> str:
+    return json.dumps({
+        "soil_data": soil_data.model_dump(),
+        "raw_values": raw_values,
+        "status_info": status_info,
+    }, ensure_ascii=False)
+
+
+def _deserialize(data: str) -> Session:
+    payload = json.loads(data)
+    # JSON turns the (source, color, status_kn) tuples into lists
+    status_info = {k: tuple(v) for k, v in payload["status_info"].items()}
+    return SoilData(**payload["soil_data"]), payload["raw_values"], status_info
+
+
+class MemorySessionStore:
+    """In-process store with TTL expiry and LRU eviction by count and size.
+
+    Only visible to the worker process that created the session.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # session_id -> (expires_at, serialized session)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def put(self, session_id: str, soil_data: SoilData, raw_values: Dict, status_info: Dict) -> None:
+        data = _serialize(soil_data, raw_values, status_info)
+        with self._lock:
+            self._remove(session_id)
+            self._entries[session_id] = (time.time() + self.ttl_seconds, data)
+            self._size += len(data.encode("utf-8"))
+            self._evict()
+
+    def get(self, session_id: str) -> Optional[Session]:
+        """Return the session without removing it, or None if missing/expired."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at < time.time():
+                self._remove(session_id)
+                return None
+            self._entries.move_to_end(session_id)
+        return _deserialize(data)
+
+    async def aput(self, session_id: str, soil_data: SoilData, raw_values: Dict, status_info: Dict) -> None:
+        self.put(session_id, soil_data, raw_values, status_info)
+
+    async def aget(self, session_id: str) -> Optional[Session]:
+        return self.get(session_id)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._remove(session_id)
+
+    def _remove(self, session_id: str) -> None:
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self._size -= len(entry[1].encode("utf-8"))
+
+    def _evict(self) -> None:
+        """Drop expired sessions, then least recently used ones over budget."""
+        now = time.time()
+        for session_id in [k for k, (expires_at, _) in self._entries.items() if expires_at < now]:
+            self._remove(session_id)
+        while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class SQLiteSessionStore:
+    """SQLite-backed store that several uvicorn workers on one host can share.
+
+    From the event loop use ``aput``/``aget``, which run the queries (disk
+    I/O and lock waits) on a thread.
+    """
+
+    def __init__(self, db_path: Path, ttl_seconds: float, max_entries: int, max_bytes: int):
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS analysis_sessions (
+                id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_sessions_last_access ON analysis_sessions(last_access)"
+        )
+
+    def put(self, session_id: str, soil_data: SoilData, raw_values: Dict, status_info: Dict) -> None:
+        data = _serialize(soil_data, raw_values, status_info)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_sessions (id, data, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (session_id, data, len(data.encode("utf-8")), now + self.ttl_seconds, now),
+            )
+            self._evict(now)
+
+    def get(self, session_id: str) -> Optional[Session]:
+        """Return the session without removing it, or None if missing/expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM analysis_sessions WHERE id = ? AND expires_at >= ?",
+                (session_id, now),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE analysis_sessions SET last_access = ? WHERE id = ?", (now, session_id)
+            )
+        return _deserialize(row[0])
+
+    async def aput(self, session_id: str, soil_data: SoilData, raw_values: Dict, status_info: Dict) -> None:
+        await asyncio.to_thread(self.put, session_id, soil_data, raw_values, status_info)
+
+    async def aget(self, session_id: str) -> Optional[Session]:
+        return await asyncio.to_thread(self.get, session_id)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM analysis_sessions WHERE id = ?", (session_id,))
+
+    def _evict(self, now: float) -> None:
+        """Drop expired sessions, then least recently used ones over budget."""
+        self._conn.execute("DELETE FROM analysis_sessions WHERE expires_at < ?", (now,))
+        count, size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_sessions"
+        ).fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM analysis_sessions WHERE id IN "
+                "(SELECT id FROM analysis_sessions ORDER BY last_access LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_sessions"
+            ).fetchone()
+        while size > self.max_bytes and count > 0:
+            oldest = self._conn.execute(
+                "SELECT id, size FROM analysis_sessions ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            self._conn.execute("DELETE FROM analysis_sessions WHERE id = ?", (oldest[0],))
+            size -= oldest[1]
+            count -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_sessions"
+            ).fetchone()
+        return {
+            "backend": "sqlite",
+            "entries": count,
+            "bytes": size,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
+
+
+def create_session_store(backend: str, ttl_seconds: float, max_entries: int, max_bytes: int, db_path: Path = None):
+    """Build the configured session store ("memory" or "sqlite")."""
+    if backend == "memory":
+        return MemorySessionStore(ttl_seconds, max_entries, max_bytes)
+    if backend == "sqlite":
+        return SQLiteSessionStore(db_path, ttl_seconds, max_entries, max_bytes)
+    raise ValueError(f"Unknown session store backend: {backend}")
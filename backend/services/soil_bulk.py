@@ -0,0 +1,304 @@
+"""Streaming input and output for the bulk soil data endpoints.
+
+Lab exports arrive as NDJSON (one SoilData object per line), CSV with a
+header row, or JSON of the form ``{"rows": [{...}, ...]}``. The body is
+spooled to a temporary file (kept in memory only while small, and
+written and read on a thread once on disk), then read back chunk by chunk
+and handed on in fixed-size groups of rows, so memory use depends on the
+group size rather than the upload size.
+"""
+
+import asyncio
+import codecs
+import csv
+import io
+import json
+import tempfile
+from typing import AsyncIterator, BinaryIO, Iterable, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from models import SoilData
+
+# (row index, parsed record or None, error or None)
+Record = Tuple[int, Optional[dict], Optional[str]]
+
+
+def input_format(content_type: Optional[str]) -> str:
+    """"csv", "json" or "ndjson" for a request Content-Type (NDJSON if unknown)."""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in ("text/csv", "application/csv"):
+        return "csv"
+    if media_type == "application/json":
+        return "json"
+    return "ndjson"
+
+
+class BodyTooLargeError(ValueError):
+    """The request body is larger than allowed."""
+
+
+async def spool_body(chunks: AsyncIterator[bytes], max_memory_bytes: int, max_bytes: int) -> BinaryIO:
+    """Copy a request body into a temporary file, rewound for reading.
+
+    The body must be read before the response starts streaming: the
+    streaming response also listens on the request channel for disconnects.
+
+    Raises:
+        BodyTooLargeError: the body is over ``max_bytes``
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory_bytes)
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise BodyTooLargeError(f"Body is larger than {max_bytes} bytes")
+            if size > max_memory_bytes:
+                # On disk from here (the first such write moves the buffer there)
+                await asyncio.to_thread(spool.write, chunk)
+            else:
+                spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+class RowsArrayParser:
+    """Split the ``rows`` array of a ``{"rows": [...]}`` body into elements as it streams in.
+
+    ``feed`` returns the raw text of every element completed so far,
+    whatever it holds, so that each element gets a result row - a bad one
+    included. Other keys of the object are skipped.
+
+    Raises:
+        ValueError: the body is not a JSON object, ``rows`` is not an
+            array, or (from ``close``) there is no ``rows`` array at all
+    """
+
+    def __init__(self):
+        self.rows_started = False
+        self._stack = []  # open containers, "{" or "["
+        self._in_string = False
+        self._escaped = False
+        self._expect_key = False  # at the top level, between "{"/"," and ":"
+        self._key = None  # chars of the top-level key being read
+        self._last_key = None
+        self._in_rows = False
+        self._item = None  # chars of the element being collected
+
+    def feed(self, text: str) -> List[str]:
+        items = []
+        for char in text:
+            collecting = self._item is not None
+            if self._in_string:
+                if collecting:
+                    self._item.append(char)
+                elif self._key is not None and not (char == '"' and not self._escaped):
+                    self._key.append(char)
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._key is not None:
+                        self._last_key, self._key = "".join(self._key), None
+                continue
+
+            if self._in_rows and len(self._stack) == 2:
+                # Between elements of the rows array, or at an element's own level
+                if char == "," or char == "]":
+                    if collecting:
+                        items.append("".join(self._item).strip())
+                        self._item = None
+                    if char == "]":
+                        self._stack.pop()
+                        self._in_rows = False
+                    continue
+                if char.isspace() and not collecting:
+                    continue
+                if not collecting:
+                    self._item = []
+                self._item.append(char)
+            elif collecting:
+                self._item.append(char)
+
+            if char.isspace():
+                continue
+            if not self._stack:
+                if char != "{":
+                    raise ValueError('Body must be a JSON object with a "rows" array')
+                self._stack.append(char)
+                self._expect_key = True
+            elif char == '"':
+                self._in_string = True
+                if self._stack == ["{"] and self._expect_key:
+                    self._key = []
+            elif len(self._stack) == 1 and char == ":":
+                self._expect_key = False
+            elif len(self._stack) == 1 and char == ",":
+                self._expect_key = True
+            elif char in "{[":
+                if len(self._stack) == 1 and self._last_key == "rows" and not self._expect_key:
+                    if char != "[":
+                        raise ValueError('"rows" must be an array')
+                    self._in_rows = self.rows_started = True
+                self._stack.append(char)
+            elif char in "}]" and self._stack[-1] == ("{" if char == "}" else "["):
+                # A stray closer inside a bad row is kept as row text only
+                self._stack.pop()
+        return items
+
+    def close(self) -> List[str]:
+        """Elements left open at the end of the body (invalid JSON)."""
+        if not self.rows_started:
+            raise ValueError('Body must be a JSON object with a "rows" array')
+        items = ["".join(self._item).strip()] if self._item else []
+        self._item = None
+        return items
+
+
+async def check_rows_body(spool: BinaryIO, chunk_size: int = 64 * 1024) -> None:
+    """Read a spooled JSON body up to the opening of its ``rows`` array, then rewind.
+
+    Raises:
+        ValueError: the body has no ``rows`` array (see RowsArrayParser)
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    parser = RowsArrayParser()
+    try:
+        while not parser.rows_started:
+            chunk = await asyncio.to_thread(spool.read, chunk_size)
+            if not chunk:
+                parser.close()
+                break
+            parser.feed(decoder.decode(chunk))
+    finally:
+        spool.seek(0)
+
+
+async def iter_file(spool: BinaryIO, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """Read a spooled body back in chunks, closing it at the end."""
+    try:
+        while True:
+            chunk = await asyncio.to_thread(spool.read, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        spool.close()
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decoded text lines from a byte stream, without reading it all."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending.strip():
+        yield pending.rstrip("\r")
+
+
+async def iter_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Record]:
+    """Raw row dicts from an NDJSON, CSV or JSON body, numbered from 0."""
+    index = 0
+    if fmt == "json":
+        decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        parser = RowsArrayParser()
+        async for chunk in chunks:
+            for text in parser.feed(decoder.decode(chunk)):
+                yield json_row(index, text)
+                index += 1
+        for text in parser.feed(decoder.decode(b"", final=True)) + parser.close():
+            yield json_row(index, text)
+            index += 1
+        return
+
+    if fmt == "csv":
+        header = None
+        async for fields in iter_csv_rows(iter_lines(chunks)):
+            if header is None:
+                header = [name.strip().lower() for name in fields]
+                continue
+            # Empty cells are missing values, not zeros
+            yield index, {name: value for name, value in zip(header, fields) if value.strip()}, None
+            index += 1
+        return
+
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield index, None, f"Invalid JSON: {e.msg}"
+        else:
+            if isinstance(record, dict):
+                yield index, record, None
+            else:
+                yield index, None, "Each line must be a JSON object"
+        index += 1
+
+
+async def iter_csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[List[str]]:
+    """CSV records from text lines; a quoted field may span lines."""
+    record, quotes = [], 0
+    async for line in lines:
+        if not record and not line.strip():
+            continue
+        record.append(line + "\n")
+        # Quotes pair up (doubled ones included) once the record is complete
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            yield next(csv.reader(record))
+            record, quotes = [], 0
+    if record:
+        yield next(csv.reader(record))  # quote left open at the end of the body
+
+
+def json_row(index: int, text: str) -> Record:
+    """Record for one JSON row, or the reason it can't be one."""
+    try:
+        record = json.loads(text)
+    except json.JSONDecodeError as e:
+        return index, None, f"Invalid JSON: {e.msg}"
+    if not isinstance(record, dict):
+        return index, None, "Each row must be a JSON object"
+    return index, record, None
+
+
+def to_soil_data(record: dict) -> Tuple[Optional[SoilData], Optional[str]]:
+    """Validate one row; unknown keys are ignored."""
+    try:
+        return SoilData.model_validate(record), None
+    except ValidationError as e:
+        first = e.errors()[0]
+        field = ".".join(str(part) for part in first["loc"])
+        return None, f"{field}: {first['msg']}"
+
+
+async def iter_groups(records: AsyncIterator[Record], size: int) -> AsyncIterator[List[Record]]:
+    """Records in lists of at most ``size``."""
+    group = []
+    async for record in records:
+        group.append(record)
+        if len(group) >= size:
+            yield group
+            group = []
+    if group:
+        yield group
+
+
+def csv_text(rows: Iterable[list]) -> str:
+    """CSV-encode some rows into one string."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows(rows)
+    return buffer.getvalue()
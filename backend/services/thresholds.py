@@ -0,0 +1,116 @@
+"""Nutrient rating table: value bands, colours, Kannada labels and targets.
+
+Loaded from data/nutrient_thresholds.json. Each parameter lists its bands
+low to high; a band ends ``below`` a value (exclusive) or ``upto`` a value
+(inclusive), and the last band is open-ended. ``classify`` rates one value;
+``classify_array``/``classify_samples`` rate whole NumPy arrays with one
+``np.searchsorted`` per parameter and give the same answers.
+"""
+
+import bisect
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import NUTRIENT_THRESHOLDS_PATH
+
+# Band index for missing (None/NaN) values and unknown parameters
+NOT_FOUND = -1
+
+
+class ThresholdTable:
+    """Rating bands per soil parameter."""
+
+    def __init__(self, data: dict):
+        colors = data.get("colors", {})
+        not_found = data["not_found"]
+        # (status_kn, color, status_en), as AnalysisService uses them
+        self.not_found = (not_found["label_kn"], colors.get(not_found["color"], not_found["color"]), not_found["label"])
+
+        self._edges: Dict[str, np.ndarray] = {}
+        self._edge_list: Dict[str, List[float]] = {}
+        self._bands: Dict[str, List[Tuple[str, str, str]]] = {}
+        self._params: Dict[str, dict] = {}
+        for param, spec in data["parameters"].items():
+            bands = spec["bands"]
+            edges = []
+            for band in bands[:-1]:
+                if "below" in band:
+                    edges.append(float(band["below"]))
+                elif "upto" in band:
+                    # value <= x is value < the next float after x
+                    edges.append(float(np.nextafter(float(band["upto"]), np.inf)))
+                else:
+                    raise ValueError(f"{param}: only the last band may be open-ended")
+            if edges != sorted(edges):
+                raise ValueError(f"{param}: bands must be listed low to high")
+            self._edges[param] = np.array(edges, dtype=np.float64)
+            self._edge_list[param] = edges
+            self._bands[param] = [
+                (band["label_kn"], colors.get(band["color"], band["color"]), band["label"]) for band in bands
+            ]
+            self._params[param] = spec
+
+    @classmethod
+    def load(cls, path: Path) -> "ThresholdTable":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @property
+    def params(self) -> List[str]:
+        return list(self._bands)
+
+    def bands(self, param: str) -> List[Tuple[str, str, str]]:
+        """(status_kn, color, status_en) per band, low to high."""
+        return self._bands.get(param, [])
+
+    def target(self, param: str) -> Optional[float]:
+        """Level fertilizer doses aim for, if the parameter has one."""
+        return self._params.get(param, {}).get("target")
+
+    def get(self, param: str, key: str, default=None):
+        """Any other per-parameter setting, e.g. ``get("ph", "lime_below")``."""
+        return self._params.get(param, {}).get(key, default)
+
+    def band_index(self, param: str, value: Optional[float]) -> int:
+        if value is None or param not in self._edge_list or value != value:
+            return NOT_FOUND
+        return bisect.bisect_right(self._edge_list[param], value)
+
+    def classify(self, param: str, value: Optional[float]) -> Tuple[str, str, str]:
+        """Rate one value: (status_kn, color, status_en)."""
+        index = self.band_index(param, value)
+        return self.not_found if index == NOT_FOUND else self._bands[param][index]
+
+    def classify_array(self, param: str, values) -> np.ndarray:
+        """Band index for every value (NOT_FOUND for NaN or an unknown parameter)."""
+        values = np.asarray(values, dtype=np.float64)
+        if param not in self._edges:
+            return np.full(values.shape, NOT_FOUND, dtype=np.int8)
+        indices = np.searchsorted(self._edges[param], values, side="right").astype(np.int8)
+        indices[np.isnan(values)] = NOT_FOUND
+        return indices
+
+    def classify_samples(self, samples, params: Sequence[str]) -> np.ndarray:
+        """Band indices for an (n_samples, len(params)) array, one column per parameter."""
+        samples = np.asarray(samples, dtype=np.float64)
+        indices = np.empty(samples.shape, dtype=np.int8)
+        for column, param in enumerate(params):
+            indices[:, column] = self.classify_array(param, samples[:, column])
+        return indices
+
+    def labels(self, param: str, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Turn band indices into (status_kn, color, status_en) arrays."""
+        # NOT_FOUND (-1) picks the last row, which is the not-found entry
+        table = np.array(self.bands(param) + [self.not_found], dtype=object)
+        rows = table[np.where(np.asarray(indices) == NOT_FOUND, len(table) - 1, indices)]
+        return rows[..., 0], rows[..., 1], rows[..., 2]
+
+
+@lru_cache(maxsize=1)
+def get_threshold_table() -> ThresholdTable:
+    """The table from NUTRIENT_THRESHOLDS_PATH, loaded once per process."""
+    return ThresholdTable.load(NUTRIENT_THRESHOLDS_PATH)
@@ -0,0 +1,118 @@
+"""Bounded worker pool for running blocking OCR work off the event loop."""
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Any, Optional
+
+
+class PoolSaturatedError(Exception):
+    """Raised when the pool already holds its maximum number of jobs."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Worker pool is saturated")
+        self.retry_after = retry_after
+
+
+class PoolTimeoutError(Exception):
+    """Raised when a job does not finish within the per-request timeout."""
+
+
+class WorkerPool:
+    """Thread or process pool with admission control.
+
+    At most ``max_workers`` jobs run at once and at most ``max_queue`` more
+    wait for a free worker. Anything beyond that is rejected immediately
+    with ``PoolSaturatedError`` so cheap endpoints never queue behind OCR.
+    A process pool runs ``initializer`` in every worker process before it
+    takes its first job.
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: int = 1,
+        max_queue: int = 8,
+        timeout: float = 60.0,
+        retry_after: int = 10,
+        initializer: Optional[Callable[[], Any]] = None,
+    ):
+        if kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=max_workers, initializer=initializer)
+        elif kind == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ocr-worker")
+        else:
+            raise ValueError(f"Unknown worker pool kind: {kind}")
+
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+        # Only touched from the event loop thread (run() and done callbacks)
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Jobs currently running or waiting for a worker."""
+        return self._pending
+
+    @property
+    def queued(self) -> int:
+        """Jobs waiting for a free worker."""
+        return max(0, self._pending - self.max_workers)
+
+    def _release(self) -> None:
+        self._pending -= 1
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: float = None) -> Any:
+        """Run ``fn(*args)`` on the pool and await its result.
+
+        Raises:
+            PoolSaturatedError: running + queued jobs already at capacity
+            PoolTimeoutError: the job did not finish within the timeout
+        """
+        if self._pending >= self.max_workers + self.max_queue:
+            raise PoolSaturatedError(self.retry_after)
+
+        loop = asyncio.get_running_loop()
+        if self.kind == "thread":
+            # Like asyncio.to_thread, so request-scoped state (the profiling
+            # capture) follows the job onto the worker thread
+            job = self._executor.submit(contextvars.copy_context().run, fn, *args)
+        else:
+            job = self._executor.submit(fn, *args)
+        self._pending += 1
+        # Release the slot when the work really ends, not when the caller gives
+        # up - a timed-out OCR pass still occupies its worker until it returns
+        job.add_done_callback(lambda _: _call_soon(loop, self._release))
+
+        timeout = timeout or self.timeout
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job)), timeout)
+        except asyncio.TimeoutError:
+            # Only succeeds if the job is still waiting in the queue
+            job.cancel()
+            raise PoolTimeoutError(f"Job did not finish within {timeout}s")
+
+    def stats(self) -> dict:
+        """Snapshot of pool occupancy."""
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "queued": self.queued,
+        }
+
+    def shutdown(self) -> None:
+        """Stop accepting work and cancel anything still queued."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _call_soon(loop: asyncio.AbstractEventLoop, callback: Callable[[], None]) -> None:
+    """Schedule ``callback`` on ``loop`` from a worker thread, ignoring a closed loop."""
+    try:
+        loop.call_soon_threadsafe(callback)
+    except RuntimeError:
+        pass
@@ -0,0 +1,70 @@
+"""Test the queued JSON logger and the sampled request log middleware."""
+
+import io
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.app_logging import RequestLogMiddleware, configure_logging, get_logger, logging_stats, shutdown_logging
+
+
+def read_records(path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_records_are_written_as_json_lines(tmp_path):
+    log_file = tmp_path / "app.log"
+    console = io.StringIO()
+    configure_logging(level="INFO", log_file=str(log_file), console=True, console_stream=console)
+    try:
+        logger = get_logger("test")
+        logger.debug("not written")
+        logger.info("Parsed card: %d/12 parameters found", 9, extra={"fields": {"found": 9, "kn": "ರಸಸಾರ"}})
+        try:
+            raise ValueError("bad card")
+        except ValueError:
+            logger.exception("Analysis failed")
+    finally:
+        shutdown_logging()
+
+    parsed, failed = read_records(log_file)
+    assert parsed["msg"] == "Parsed card: 9/12 parameters found"
+    assert (parsed["level"], parsed["logger"], parsed["found"], parsed["kn"]) == ("INFO", "soiltrack.test", 9, "ರಸಸಾರ")
+    assert failed["level"] == "ERROR" and "ValueError: bad card" in failed["exc"]
+    assert "Parsed card: 9/12" in console.getvalue()
+    assert "not written" not in console.getvalue()
+    configure_logging()
+
+
+def test_full_queue_drops_records(tmp_path):
+    configure_logging(level="INFO", log_file=str(tmp_path / "app.log"), console=False, queue_size=0)
+    try:
+        get_logger("test").info("dropped")
+        assert logging_stats()["dropped"] == 1
+    finally:
+        shutdown_logging()
+    configure_logging()
+
+
+def test_request_sampling_keeps_server_errors(tmp_path):
+    log_file = tmp_path / "requests.log"
+    configure_logging(level="INFO", log_file=str(log_file), console=False)
+    app = FastAPI()
+    app.add_api_route("/ok", lambda: {"ok": True})
+    app.add_api_route("/broken", lambda: 1 / 0)
+    app.add_middleware(RequestLogMiddleware, logger=get_logger("http"), sample_rate=0.0)
+    try:
+        client = TestClient(app, raise_server_exceptions=False)
+        for _ in range(5):
+            assert client.get("/ok").status_code == 200
+        assert client.get("/broken").status_code == 500
+    finally:
+        shutdown_logging()
+
+    # The exception passes through the middleware on its way to the 500 handler
+    (record,) = read_records(log_file)
+    assert (record["level"], record["method"], record["path"]) == ("ERROR", "GET", "/broken")
+    assert "ZeroDivisionError" in record["msg"]
+    configure_logging()
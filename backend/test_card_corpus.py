@@ -0,0 +1,47 @@
+"""Test the benchmark card corpus and its replayed OCR through the real pipeline."""
+
+from benchmarks.card_corpus import install_replay_reader, load_corpus, synthetic_corpus, write_corpus
+from services import ocr_service
+from services.analysis_service import AnalysisService
+
+
+def test_corpus_round_trip(tmp_path):
+    cards = synthetic_corpus(3, seed=7)
+    assert [card.image for card in synthetic_corpus(3, seed=7)] == [card.image for card in cards]
+
+    write_corpus(cards, tmp_path)
+    loaded = load_corpus(tmp_path)
+    assert [card.name for card in loaded] == [card.name for card in cards]
+    assert [card.expected for card in loaded] == [card.expected for card in cards]
+    assert [card.detections for card in loaded] == [card.detections for card in cards]
+
+
+def test_replayed_cards_parse_to_expected(monkeypatch):
+    cards = synthetic_corpus(4, seed=11, noise_rate=0.0)
+    monkeypatch.setattr(ocr_service, "reader", None)
+    reader = install_replay_reader(cards)
+    ocr, analysis = ocr_service.OCRService(), AnalysisService()
+
+    for card in cards:
+        soil_data, _, _ = analysis.analyze_soil_card(ocr.extract_text(card.image))
+        parsed = soil_data.model_dump()
+        for param, expected in card.expected.items():
+            if expected is None:
+                continue
+            assert abs(parsed[param] - expected) <= 0.01, (card.name, param)
+    assert reader.calls >= len(cards)
+
+
+def test_oxide_label_digits_are_not_read_as_values():
+    analysis = AnalysisService()
+    rows = {
+        "ಲಭ್ಯ ರಂಜಕ (P2O5) | kg/ha | 8 | ಕಡಿಮೆ": ("phosphorus", 8.0),
+        "ಲಭ್ಯ ಪೊಟ್ಯಾಶ್ (K2O) | kg/ha | 7 | ಕಡಿಮೆ": ("potassium", 7.0),
+        "ಲಭ್ಯ ರಂಜಕ (P205) | kg/ha | 66 | ಹೆಚ್ಚು": ("phosphorus", 66.0),
+        "ಲಭ್ಯ ಪೊಟ್ಯಾಶ್ (K20) | kg/ha | 9 | ಕಡಿಮೆ": ("potassium", 9.0),
+        "ಲಭ್ಯ ರಂಜಕ (P2O5) | kg/ha | | ಕಡಿಮೆ": ("phosphorus", None),
+        "ರಸಸಾರ (pH) | | 5.0-5.5 | ಆಮ್ಲೀಯ": ("ph", 5.25),
+    }
+    for row, (param, expected) in rows.items():
+        soil_data, _, _ = analysis.analyze_soil_card(row)
+        assert getattr(soil_data, param) == expected, row
@@ -0,0 +1,56 @@
+"""Test FastJSONResponse serialization and Accept-Encoding negotiation."""
+
+import json
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from models import RecommendationResponse
+from services.fast_json import FastJSONResponse, choose_encoding, dumps, supported_encodings
+from services.recommendation_service import RecommendationService
+
+
+def recommendation_response() -> RecommendationResponse:
+    recommendations = RecommendationService().get_rule_based_recommendations("rice", None, None)
+    return RecommendationResponse(success=True, crop_id="rice", recommendations=recommendations, source="rules")
+
+
+def test_dumps_matches_fastapi_encoding():
+    response = recommendation_response()
+    assert json.loads(dumps(response)) == jsonable_encoder(response)
+    # Kannada stays UTF-8 instead of \u escapes
+    assert "\\u0c" not in dumps(response).decode("utf-8").lower()
+    assert json.loads(dumps({"stats": [response.recommendations[0], 1.5, None]}))["stats"][1:] == [1.5, None]
+
+
+def test_choose_encoding():
+    best = supported_encodings()[0]
+    assert choose_encoding(None) is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip") == "gzip"
+    assert choose_encoding("gzip, deflate, br") == best
+    assert choose_encoding("br;q=0.5, gzip") == "gzip"
+    assert choose_encoding("gzip;q=0") is None
+    assert choose_encoding("*") == best
+
+
+def test_large_bodies_are_compressed_when_accepted():
+    response = recommendation_response()
+    app = FastAPI()
+    app.add_api_route("/rec", lambda: FastJSONResponse(response), response_model=RecommendationResponse)
+    app.add_api_route("/small", lambda: FastJSONResponse({"ok": True}))
+    client = TestClient(app)
+
+    plain = client.get("/rec", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["vary"] == "Accept-Encoding"
+
+    compressed = client.get("/rec", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert int(compressed.headers["content-length"]) < len(plain.content) // 2
+    assert compressed.json() == plain.json() == jsonable_encoder(response)
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.json() == {"ok": True}
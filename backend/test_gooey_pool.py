@@ -0,0 +1,228 @@
+"""Test the Gooey AI client's pooling, coalescing, streaming and retries (runs offline against a local stub)."""
+
+import asyncio
+
+import httpx
+
+from benchmarks.gooey_stub import start_stub
+from services.gooey_ai_service import GooeyAIService
+from services.json_stream import ArrayItemStreamParser
+from services.circuit_breaker import CircuitBreaker, OPEN
+
+
+def run_calls(service: GooeyAIService, count: int, concurrent: bool, same_prompt: bool = True):
+    async def call(i):
+        # A different crop name gives a different prompt
+        crop_name = "Rice" if same_prompt else f"Rice {i}"
+        return await service.get_recommendations("rice", crop_name, "ಭತ್ತ")
+
+    async def main():
+        service.open()
+        try:
+            if concurrent:
+                return await asyncio.gather(*(call(i) for i in range(count)))
+            return [await call(i) for i in range(count)]
+        finally:
+            await service.aclose()
+
+    return asyncio.run(main())
+
+
+def test_sequential_calls_share_one_connection():
+    stub = start_stub()
+    try:
+        service = GooeyAIService(api_key="test-key", base_url=stub.url, http2=False)
+        results = run_calls(service, 5, concurrent=False)
+        assert all(len(recs) == 2 and recs[0].title == "Apply Zinc Sulphate" for recs in results)
+        assert stub.requests == 5
+        assert stub.connections == 1
+    finally:
+        stub.shutdown()
+        stub.server_close()
+
+
+def test_concurrency_limit():
+    stub = start_stub(delay=0.1)
+    try:
+        service = GooeyAIService(api_key="test-key", base_url=stub.url, max_concurrency=2, http2=False)
+        results = run_calls(service, 8, concurrent=True, same_prompt=False)
+        assert len(results) == 8
+        assert stub.requests == 8
+        assert stub.peak_in_flight <= 2
+        # Queued callers pick up the kept-alive connections instead of opening new ones
+        assert stub.connections <= 2
+    finally:
+        stub.shutdown()
+        stub.server_close()
+
+
+def test_identical_concurrent_calls_are_coalesced():
+    stub = start_stub(delay=0.2)
+    try:
+        service = GooeyAIService(api_key="test-key", base_url=stub.url, http2=False)
+        results = run_calls(service, 5, concurrent=True)
+        assert stub.requests == 1
+        assert service.stats()["single_flight"]["coalesced"] == 4
+        assert all(len(recs) == 2 for recs in results)
+        # Every caller gets its own objects
+        assert results[0][0] is not results[1][0]
+    finally:
+        stub.shutdown()
+        stub.server_close()
+
+
+def test_stream_parser_yields_items_as_they_complete():
+    parser = ArrayItemStreamParser()
+    assert parser.feed('Sure! {"recommendations": [{"title": "A {x}", "dosage": "1\\"') == []
+    assert parser.feed('"}, {"title"') == [{"title": "A {x}", "dosage": '1"'}]
+    assert parser.feed(': "B"}]}') == [{"title": "B"}]
+
+
+def test_stream_recommendations():
+    stub = start_stub()
+    try:
+        service = GooeyAIService(api_key="test-key", base_url=stub.url, http2=False)
+        service.stream_path = "/video-bots/stream"
+
+        async def main():
+            try:
+                return [rec async for rec in service.stream_recommendations("Rice", "ಭತ್ತ")]
+            finally:
+                await service.aclose()
+
+        recommendations = asyncio.run(main())
+        assert [rec.title for rec in recommendations] == ["Apply Zinc Sulphate", "Split Nitrogen"]
+    finally:
+        stub.shutdown()
+        stub.server_close()
+
+
+def test_retries_on_503():
+    stub = start_stub(fail_next=2)
+    try:
+        service = GooeyAIService(api_key="test-key", base_url=stub.url, http2=False)
+        results = run_calls(service, 1, concurrent=False)
+        assert len(results[0]) == 2
+        assert stub.requests == 3
+        assert service.stats()["retries"] == 2
+    finally:
+        stub.shutdown()
+        stub.server_close()
+
+
+def test_stub_error_rate_is_retried():
+    stub = start_stub(error_rate=0.5, seed=1)
+    try:
+        service = GooeyAIService(api_key="test-key", base_url=stub.url, http2=False)
+        service.breaker = CircuitBreaker(min_calls=100)
+        run_calls(service, 6, concurrent=False, same_prompt=False)
+        assert stub.failed > 0
+        assert stub.requests == 6 + service.stats()["retries"]
+    finally:
+        stub.shutdown()
+        stub.server_close()
+
+
+def test_abandoned_stream_is_not_recorded():
+    stub = start_stub(delay=0.2)
+    try:
+        service = GooeyAIService(api_key="test-key", base_url=stub.url, http2=False)
+        service.stream_path = "/video-bots/stream"
+
+        async def main():
+            try:
+                stream = service.stream_recommendations("Rice", "ಭತ್ತ")
+                await stream.__anext__()
+                await stream.aclose()  # the client disconnected
+            finally:
+                await service.aclose()
+
+        asyncio.run(main())
+        assert service.breaker.stats()["window_calls"] == 0
+    finally:
+        stub.shutdown()
+        stub.server_close()
+
+
+def test_missing_stream_endpoint_does_not_open_circuit():
+    stub = start_stub()
+    try:
+        service = GooeyAIService(api_key="test-key", base_url=stub.url, http2=False)
+        service.stream_path = "/video-bots/no-such-stream"
+        service.breaker = CircuitBreaker(min_calls=3, error_rate_threshold=0.5, open_seconds=60)
+
+        async def main():
+            try:
+                for _ in range(5):
+                    try:
+                        [rec async for rec in service.stream_recommendations("Rice", "ಭತ್ತ")]
+                    except httpx.HTTPStatusError as e:
+                        assert e.response.status_code == 404
+                return await service.get_recommendations("rice", "Rice", "ಭತ್ತ")
+            finally:
+                await service.aclose()
+
+        assert len(asyncio.run(main())) == 2
+        assert service.breaker.state != OPEN
+    finally:
+        stub.shutdown()
+        stub.server_close()
+
+
+def test_cancelled_probe_frees_half_open_slot():
+    stub = start_stub(delay=1.0)
+    try:
+        service = GooeyAIService(api_key="test-key", base_url=stub.url, http2=False)
+        service.breaker = CircuitBreaker(min_calls=1, open_seconds=0)
+        service.breaker.record(False, 0.0)  # open; half-open on the next check
+
+        async def main():
+            try:
+                probe = asyncio.create_task(service._post_with_retry(f"{stub.url}/video-bots", {"input_prompt": "x"}))
+                await asyncio.sleep(0.2)
+                probe.cancel()  # the client went away mid-POST
+                try:
+                    await probe
+                except asyncio.CancelledError:
+                    pass
+            finally:
+                await service.aclose()
+
+        asyncio.run(main())
+        assert service.breaker.allow()
+    finally:
+        stub.shutdown()
+        stub.server_close()
+
+
+def test_circuit_opens_and_skips_upstream():
+    stub = start_stub(fail_next=1000)
+    try:
+        service = GooeyAIService(api_key="test-key", base_url=stub.url, http2=False)
+        service.breaker = CircuitBreaker(min_calls=3, error_rate_threshold=0.5, open_seconds=60)
+        results = run_calls(service, 4, concurrent=False, same_prompt=False)
+        assert service.breaker.state == OPEN
+        requests_when_opened = stub.requests
+        assert requests_when_opened == 3
+        # Once open, calls return None (use local recommendations) without going upstream
+        assert results[-1] is None
+        run_calls(service, 3, concurrent=False, same_prompt=False)
+        assert stub.requests == requests_when_opened
+    finally:
+        stub.shutdown()
+        stub.server_close()
+
+
+if __name__ == "__main__":
+    test_sequential_calls_share_one_connection()
+    test_concurrency_limit()
+    test_identical_concurrent_calls_are_coalesced()
+    test_stream_parser_yields_items_as_they_complete()
+    test_stream_recommendations()
+    test_abandoned_stream_is_not_recorded()
+    test_missing_stream_endpoint_does_not_open_circuit()
+    test_retries_on_503()
+    test_stub_error_rate_is_retried()
+    test_cancelled_probe_frees_half_open_slot()
+    test_circuit_opens_and_skips_upstream()
+    print("Gooey AI client tests OK")
@@ -0,0 +1,113 @@
+"""Test analysis job callbacks: only public or allow-listed hosts are called."""
+
+import asyncio
+
+import pytest
+
+from benchmarks.gooey_stub import start_stub
+from services.job_queue import DONE, JobRunner, JobStore, check_callback_url
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1:8000/hook",
+    "http://localhost/hook",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://10.0.0.5/hook",
+    "http://192.168.1.10/hook",
+    "http://[::1]/hook",
+    "http://0.0.0.0/hook",
+    "ftp://93.184.216.34/hook",
+    "http:///hook",
+])
+def test_internal_callback_urls_are_refused(url):
+    with pytest.raises(ValueError):
+        asyncio.run(check_callback_url(url))
+
+
+def test_public_and_allow_listed_callback_urls():
+    asyncio.run(check_callback_url("https://93.184.216.34/hook"))
+    asyncio.run(check_callback_url("http://127.0.0.1:9000/hook", allowed_hosts=["127.0.0.1"]))
+    with pytest.raises(ValueError):
+        asyncio.run(check_callback_url("https://93.184.216.34/hook", allowed_hosts=["hooks.example.org"]))
+
+
+def test_notify_checks_the_callback_again(tmp_path):
+    stub = start_stub()
+    try:
+        store = JobStore(tmp_path / "jobs.db", tmp_path / "jobs")
+        for job_id in ("refused", "allowed"):
+            store.create(job_id, b"card", f"{stub.url}/video-bots")
+            store.set_status(job_id, DONE, result={"ok": True})
+
+        asyncio.run(JobRunner(store, handler=None)._notify("refused"))
+        assert stub.requests == 0
+        asyncio.run(JobRunner(store, handler=None, callback_allowed_hosts=["127.0.0.1"])._notify("allowed"))
+        assert stub.requests == 1
+    finally:
+        stub.shutdown()
+        stub.server_close()
+
+
+def test_runner_runs_jobs_and_purges_old_ones(tmp_path):
+    store = JobStore(tmp_path / "jobs.db", tmp_path / "jobs")
+
+    async def handler(job_id, image_bytes):
+        return {"size": len(image_bytes)}
+
+    async def main():
+        runner = JobRunner(store, handler, workers=1, max_queued=1, retention_seconds=0, purge_interval=0.05)
+        runner.start()
+        try:
+            assert await runner.submit("a", b"card")
+            assert not await runner.submit("b", b"card")  # queue full
+            await runner._queue.join()
+            assert store.get("a")["result"] == {"size": 4}
+            await asyncio.sleep(0.2)
+            assert store.get("a") is None
+        finally:
+            await runner.stop()
+
+    asyncio.run(main())
+
+
+def test_runners_sharing_a_table_run_each_job_once(tmp_path):
+    runs = []
+
+    async def handler(job_id, image_bytes):
+        runs.append(job_id)
+        await asyncio.sleep(0.05)
+        return {}
+
+    async def main():
+        # Two worker processes restarted over the same leftover jobs
+        store = JobStore(tmp_path / "jobs.db", tmp_path / "jobs")
+        for job_id in ("a", "b", "c"):
+            store.create(job_id, b"card", None)
+        runners = [JobRunner(JobStore(tmp_path / "jobs.db", tmp_path / "jobs"), handler) for _ in range(2)]
+        for runner in runners:
+            runner.start()
+        try:
+            for runner in runners:
+                await runner._queue.join()
+        finally:
+            for runner in runners:
+                await runner.stop()
+        return store
+
+    store = asyncio.run(main())
+    assert sorted(runs) == ["a", "b", "c"]
+    assert all(store.get(job_id)["status"] == DONE for job_id in ("a", "b", "c"))
+
+
+def test_only_expired_leases_are_taken_over(tmp_path):
+    store = JobStore(tmp_path / "jobs.db", tmp_path / "jobs")
+    for job_id in ("live", "dead"):
+        store.create(job_id, b"card", None)
+    assert store.claim("live", "sibling", lease_seconds=60)
+    assert store.claim("dead", "crashed", lease_seconds=-1)
+    assert not store.claim("live", "restarted", lease_seconds=60)
+    assert store.unfinished() == ["dead"]
+    assert store.claim("dead", "restarted", lease_seconds=60)
+    # The old owner can no longer finish it
+    assert not store.set_status("dead", DONE, result={}, owner="crashed")
+    assert store.set_status("dead", DONE, result={}, owner="restarted")
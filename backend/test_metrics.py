@@ -0,0 +1,58 @@
+"""Test the metrics registry, exposition format and request middleware."""
+
+from fastapi import FastAPI
+from fastapi.responses import Response
+from fastapi.testclient import TestClient
+
+from services import metrics
+from services.analysis_service import AnalysisService
+
+
+def test_histogram_exposition():
+    registry = metrics.Registry()
+    histogram = registry.register(metrics.Histogram("test_seconds", "Test latency.", ["stage"], buckets=(0.1, 1)))
+    counter = registry.register(metrics.Counter("test_total", "Test count.", ["status"]))
+    registry.register(metrics.Callback("test_depth", "Test depth.", lambda: 3))
+    for value in (0.05, 0.1, 0.5, 2):
+        histogram.observe(value, stage='de"code')
+    counter.inc(status=200)
+    counter.inc(2, status=200)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE test_seconds histogram" in lines
+    assert 'test_seconds_bucket{stage="de\\"code",le="0.1"} 2' in lines
+    assert 'test_seconds_bucket{stage="de\\"code",le="1"} 3' in lines
+    assert 'test_seconds_bucket{stage="de\\"code",le="+Inf"} 4' in lines
+    assert 'test_seconds_sum{stage="de\\"code"} 2.65' in lines
+    assert 'test_seconds_count{stage="de\\"code"} 4' in lines
+    assert 'test_total{status="200"} 3' in lines
+    assert "test_depth 3" in lines
+
+
+def test_card_params_found():
+    before = metrics.CARD_PARAMS_FOUND.snapshot() or {"buckets": {}, "count": 0}
+    AnalysisService().analyze_soil_card("1 ರಸಸಾರ (pH) 5.2 ಆಮ್ಲೀಯ\n3 ಸಾವಯವ ಇಂಗಾಲ (OC) 0.42 ಕಡಿಮೆ")
+    after = metrics.CARD_PARAMS_FOUND.snapshot()
+    assert after["count"] == before["count"] + 1
+    assert after["buckets"][2.0] - before["buckets"].get(2.0, 0) == 1
+    assert after["buckets"][1.0] == before["buckets"].get(1.0, 0)
+    assert metrics.CARD_PARAM_FOUND.value(param="ph") >= 1
+    assert metrics.STAGE_SECONDS.snapshot(stage="analyze_soil_card")["count"] >= 1
+
+
+def test_requests_are_labelled_by_route_template():
+    app = FastAPI()
+    app.add_api_route("/jobs/{job_id}", lambda job_id: {"id": job_id})
+    app.add_api_route("/metrics", lambda: Response(metrics.render(), media_type=metrics.CONTENT_TYPE))
+    app.add_middleware(metrics.MetricsMiddleware)
+    client = TestClient(app)
+
+    for job_id in ("a", "b", "c"):
+        assert client.get(f"/jobs/{job_id}").status_code == 200
+    assert client.get("/missing").status_code == 404
+
+    scrape = client.get("/metrics")
+    assert scrape.headers["content-type"] == metrics.CONTENT_TYPE
+    assert 'soiltrack_http_request_duration_seconds_count{method="GET",route="/jobs/{job_id}",status="200"} 3' in scrape.text
+    assert 'route="unmatched",status="404"' in scrape.text
+    assert "soiltrack_http_requests_in_flight 0" in scrape.text
@@ -0,0 +1,24 @@
+"""Test the OCR result cache's on-disk budget."""
+
+from services.ocr_cache import OCRResultCache
+
+
+def test_disk_is_pruned_only_over_budget(tmp_path):
+    cache = OCRResultCache(max_bytes=0, disk_dir=tmp_path, disk_max_bytes=1000)
+    scans = []
+    prune = cache._prune_disk
+    cache._prune_disk = lambda: (scans.append(1), prune())
+
+    for i in range(9):
+        cache.put(f"key{i}", "x" * 100)
+    cache.put("key0", "y" * 100)  # rewriting an entry doesn't grow the total
+    assert scans == []
+
+    cache.put("key9", "x" * 200)
+    assert len(scans) == 1
+    assert sum(path.stat().st_size for path in tmp_path.glob("*.txt")) <= 900
+    assert not (tmp_path / "key1.txt").exists()
+    assert cache._read_disk("key9") == "x" * 200
+
+    # A new instance starts from what is on disk
+    assert OCRResultCache(max_bytes=0, disk_dir=tmp_path, disk_max_bytes=1000)._disk_bytes == cache._disk_bytes
@@ -0,0 +1,81 @@
+"""Test the opt-in request profiler and its on-disk ring buffer."""
+
+import hashlib
+import pstats
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from services.profiling import ProfileStore, ProfilingMiddleware, profiled
+from services.worker_pool import WorkerPool
+
+TOKEN = "s3cret"
+
+
+class CardReader:
+    @profiled("extract_text", hash_input=True)
+    def extract_text(self, image_bytes: bytes) -> str:
+        return str(sum(image_bytes))
+
+    @profiled("recommend")
+    async def recommend(self, text: str) -> str:
+        return text[::-1]
+
+
+def build_app(store: ProfileStore, sample_rate: float = 0.0) -> FastAPI:
+    reader = CardReader()
+    pool = WorkerPool(kind="thread", max_workers=1)
+    app = FastAPI()
+
+    @app.post("/analyze")
+    async def analyze(request: Request):
+        # Through the OCR pool, as /analyze-direct does
+        text = await pool.run(reader.extract_text, await request.body())
+        return {"text": await reader.recommend(text)}
+
+    @app.get("/crops")
+    async def crops():
+        return []
+
+    app.add_middleware(ProfilingMiddleware, store=store, admin_token=TOKEN, sample_rate=sample_rate)
+    return app
+
+
+def test_header_triggers_a_capture(tmp_path):
+    store = ProfileStore(tmp_path, max_entries=10)
+    client = TestClient(build_app(store))
+
+    assert "x-profile-id" not in client.post("/analyze", content=b"card").headers
+    assert "x-profile-id" not in client.post("/analyze", content=b"card", headers={"X-Profile-Token": "wrong"}).headers
+    assert store.list() == []
+
+    response = client.post("/analyze", content=b"card", headers={"X-Profile-Token": TOKEN})
+    (capture,) = store.list()
+    assert response.headers["x-profile-id"] == capture["id"]
+    assert (capture["trigger"], capture["path"], capture["status"]) == ("header", "/analyze", 200)
+    assert capture["image_sha256"] == hashlib.sha256(b"card").hexdigest()
+    assert capture["timings"]["extract_text"]["calls"] == 1
+    assert capture["timings"]["recommend"]["unprofiled_calls"] == 0
+
+    stats = pstats.Stats(str(store.profile_path(capture["id"])))
+    assert any(func[2] == "extract_text" for func in stats.stats)
+    assert "extract_text" in store.render_text(capture["id"])
+
+    # Nothing wrapped ran, so nothing is kept
+    client.get("/crops", headers={"X-Profile-Token": TOKEN})
+    assert len(store.list()) == 1
+
+
+def test_ring_buffer_keeps_newest(tmp_path):
+    store = ProfileStore(tmp_path, max_entries=2)
+    client = TestClient(build_app(store, sample_rate=1.0))
+    ids = []
+    for i in range(4):
+        client.post("/analyze", content=bytes([i]))
+        ids.append(store.list()[0]["id"])
+
+    assert [entry["id"] for entry in store.list()] == [ids[3], ids[2]]
+    assert [entry["trigger"] for entry in store.list()] == ["sampled", "sampled"]
+    assert store.profile_path(ids[0]) is None
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(f"{i}{s}" for i in ids[2:] for s in (".json", ".prof"))
+    assert store.profile_path("../../etc/passwd") is None
@@ -0,0 +1,34 @@
+"""Test the persistent recommendation cache's event-loop accessors."""
+
+import asyncio
+
+from models import Recommendation
+from services.recommendation_cache import RecommendationCache
+
+
+def recs(title):
+    return [Recommendation(title=title, title_kn=title, description="d", description_kn="d")]
+
+
+def test_persisted_entries_survive_a_restart(tmp_path):
+    async def main():
+        cache = RecommendationCache(60, 60, 10, db_path=tmp_path / "rec.db")
+        await cache.aput("k", recs("urea"))
+        restarted = RecommendationCache(60, 60, 10, db_path=tmp_path / "rec.db")
+        return await restarted.aget("k"), await restarted.aget("missing")
+
+    (found, stale), missing = asyncio.run(main())
+    assert [rec.title for rec in found] == ["urea"] and not stale
+    assert missing is None
+
+
+def test_memory_hits_do_not_wait_for_sqlite(tmp_path):
+    cache = RecommendationCache(60, 60, 10, db_path=tmp_path / "rec.db")
+    cache.put("k", recs("urea"))
+
+    async def main():
+        with cache._db_lock:  # a slow write on another thread
+            return await asyncio.wait_for(cache.aget("k"), timeout=1)
+
+    found, _ = asyncio.run(main())
+    assert found[0].title == "urea"
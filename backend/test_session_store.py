@@ -0,0 +1,23 @@
+"""Test the analysis session stores' async accessors used from the event loop."""
+
+import asyncio
+
+import pytest
+
+from models import SoilData
+from services.session_store import create_session_store
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_async_put_and_get_round_trip(tmp_path, backend):
+    store = create_session_store(backend, ttl_seconds=60, max_entries=10, max_bytes=1 << 20, db_path=tmp_path / "sessions.db")
+
+    async def main():
+        await store.aput("card", SoilData(ph=6.2), {"ph": "6.2"}, {"ph": ("ocr", "#10B981", "Neutral")})
+        return await store.aget("card"), await store.aget("missing")
+
+    (soil_data, raw_values, status_info), missing = asyncio.run(main())
+    assert soil_data.ph == 6.2
+    assert raw_values == {"ph": "6.2"}
+    assert status_info == {"ph": ("ocr", "#10B981", "Neutral")}
+    assert missing is None
@@ -0,0 +1,85 @@
+"""Test the bulk soil data endpoints with NDJSON, CSV and JSON lab exports."""
+
+import csv
+import io
+import json
+
+from fastapi.testclient import TestClient
+
+import main
+
+client = TestClient(main.app)
+
+
+def ndjson(response) -> list:
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_json_rows_keep_their_index():
+    body = '{"rows": [{"ph": 5.2, "nitrogen": 200}, {bad}, 3, {"ph": "acid"}, {"ph": 7.9}]}'
+    items = ndjson(client.post("/soil/classify-bulk", content=body, headers={"Content-Type": "application/json"}))
+
+    assert [item["index"] for item in items] == [0, 1, 2, 3, 4]
+    assert [item["success"] for item in items] == [True, False, False, False, True]
+    assert items[1]["error"].startswith("Invalid JSON")
+    assert items[2]["error"] == "Each row must be a JSON object"
+    assert items[3]["error"].startswith("ph:")
+    assert items[4]["soil_data"]["ph"] == 7.9
+
+
+def test_json_body_without_rows_array_is_rejected():
+    for body in ('[{"ph": 5.2}]', '{"data": []}', '{"rows": {"ph": 5.2}}', ""):
+        response = client.post("/soil/classify-bulk", content=body, headers={"Content-Type": "application/json"})
+        assert response.status_code == 400, body
+
+
+def test_ndjson_reports_bad_lines():
+    body = '{"ph": 5.2}\n\nnot json\n[1]\n{"ph": 8.6, "zinc": 0.4}\n'
+    items = ndjson(client.post("/soil/classify-bulk", content=body))
+
+    assert [(item["index"], item["success"]) for item in items] == [(0, True), (1, False), (2, False), (3, True)]
+    assert items[1]["error"].startswith("Invalid JSON")
+    assert items[2]["error"] == "Each line must be a JSON object"
+    assert items[3]["soil_data"]["zinc"] == 0.4
+
+
+def test_csv_quoted_field_across_lines():
+    body = 'sample,ph,nitrogen\r\n"plot 1\nnorth field",5.2,200\r\nplot 2,,x\r\nplot 3,7.9,\r\n'
+    items = ndjson(client.post("/soil/classify-bulk", content=body, headers={"Content-Type": "text/csv"}))
+
+    assert [(item["index"], item["success"]) for item in items] == [(0, True), (1, False), (2, True)]
+    assert items[0]["soil_data"]["nitrogen"] == 200
+    assert items[1]["error"].startswith("nitrogen:")
+    assert items[2]["soil_data"]["ph"] == 7.9
+
+
+def test_csv_output(monkeypatch):
+    # Small spool: the body goes through the on-disk path
+    monkeypatch.setattr(main, "SOIL_BULK_SPOOL_BYTES", 16)
+    body = '{"ph": 5.2}\n{"ph": "acid"}\n'
+    response = client.post("/soil/classify-bulk", params={"format": "csv"}, content=body)
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == main.bulk_csv_header(None)
+    assert rows[1][:3] == ["0", "", "5.2"]
+    assert rows[2][0] == "1" and rows[2][1].startswith("ph:")
+
+    response = client.post("/soil/recommend-bulk", params={"crop_id": "rice", "format": "csv"}, content=body)
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == main.bulk_csv_header("rice")
+    assert len(rows) > 3 and {row[0] for row in rows[1:-1]} == {"0"}
+    assert rows[-1][0] == "1"
+
+
+def test_upload_size_limit(monkeypatch):
+    monkeypatch.setattr(main, "SOIL_BULK_MAX_BYTES", 64)
+    body = '{"ph": 5.2}\n' * 10
+    assert client.post("/soil/classify-bulk", content=body).status_code == 413
+
+    def chunks():
+        yield body.encode()
+
+    # No Content-Length: the limit is enforced while spooling
+    assert client.post("/soil/classify-bulk", content=chunks()).status_code == 413
+    assert client.post("/soil/classify-bulk", content=body[:48]).status_code == 200
@@ -0,0 +1,118 @@
+"""Test the nutrient threshold table and its vectorized classifier."""
+
+import numpy as np
+import pytest
+
+from models import SoilData
+from services.analysis_service import AnalysisService
+from services.thresholds import NOT_FOUND, get_threshold_table
+
+
+def test_band_edges_match_the_gkvk_ratings():
+    table = get_threshold_table()
+    assert table.classify("ph", 5.49)[2] == "Acidic"
+    assert table.classify("ph", 5.5)[2] == "Slightly Acidic"
+    assert table.classify("ph", 6.5)[2] == "Slightly Acidic"
+    assert table.classify("ph", 8.5)[2] == "Slightly Alkaline"
+    assert table.classify("ph", 8.51)[2] == "Alkaline"
+    assert table.classify("nitrogen", 280) == ("ಮಧ್ಯಮ", "#F59E0B", "Medium")
+    assert table.classify("nitrogen", 280.01) == ("ಹೆಚ್ಚು", "#10B981", "High")
+    assert table.classify("zinc", 0.6)[2] == "Sufficient"
+    assert table.classify("zinc", None) == table.not_found
+    assert table.classify("unknown", 1.0) == table.not_found
+
+
+RED, YELLOW, GREEN = "#EF4444", "#F59E0B", "#10B981"
+
+
+# (param, value, status_en, color) at and around every edge of the former
+# hand-written if-chain in AnalysisService._get_status_from_value.
+@pytest.mark.parametrize("param, value, status_en, color", [
+    ("ph", 5.49, "Acidic", RED),
+    ("ph", 5.5, "Slightly Acidic", YELLOW),
+    ("ph", 6.5, "Slightly Acidic", YELLOW),
+    ("ph", 6.51, "Neutral", GREEN),
+    ("ph", 7.5, "Neutral", GREEN),
+    ("ph", 7.51, "Slightly Alkaline", YELLOW),
+    ("ph", 8.5, "Slightly Alkaline", YELLOW),
+    ("ph", 8.51, "Alkaline", RED),
+    ("ec", 0.99, "Normal", GREEN),
+    ("ec", 1.0, "Slightly Saline", YELLOW),
+    ("ec", 2.0, "Slightly Saline", YELLOW),
+    ("ec", 2.01, "Saline", RED),
+    ("organic_carbon", 0.49, "Low", RED),
+    ("organic_carbon", 0.5, "Medium", YELLOW),
+    ("organic_carbon", 0.75, "Medium", YELLOW),
+    ("organic_carbon", 0.76, "High", GREEN),
+    ("nitrogen", 139.9, "Low", RED),
+    ("nitrogen", 140, "Medium", YELLOW),
+    ("nitrogen", 280, "Medium", YELLOW),
+    ("nitrogen", 280.01, "High", GREEN),
+    ("phosphorus", 22.9, "Low", RED),
+    ("phosphorus", 23, "Medium", YELLOW),
+    ("phosphorus", 57, "Medium", YELLOW),
+    ("phosphorus", 57.01, "High", GREEN),
+    ("potassium", 144.9, "Low", RED),
+    ("potassium", 145, "Medium", YELLOW),
+    ("potassium", 337, "Medium", YELLOW),
+    ("potassium", 337.01, "High", GREEN),
+    ("sulphur", 9.9, "Low", RED),
+    ("sulphur", 10, "Medium", YELLOW),
+    ("sulphur", 20, "Medium", YELLOW),
+    ("sulphur", 20.01, "High", GREEN),
+    ("zinc", 0.59, "Deficient", RED),
+    ("zinc", 0.6, "Sufficient", GREEN),
+    ("boron", 0.49, "Deficient", RED),
+    ("boron", 0.5, "Medium", YELLOW),
+    ("boron", 1.0, "Medium", YELLOW),
+    ("boron", 1.01, "Sufficient", GREEN),
+    ("iron", 4.49, "Deficient", RED),
+    ("iron", 4.5, "Sufficient", GREEN),
+    ("manganese", 0.99, "Deficient", RED),
+    ("manganese", 1.0, "Sufficient", GREEN),
+    ("copper", 0.19, "Deficient", RED),
+    ("copper", 0.2, "Sufficient", GREEN),
+])
+def test_boundaries_match_the_former_if_chain(param, value, status_en, color):
+    table = get_threshold_table()
+    _, got_color, got_en = table.classify(param, value)
+    assert (got_en, got_color) == (status_en, color)
+    indices = table.classify_samples(np.array([[value]]), [param])
+    _, colors, names = table.labels(param, indices[:, 0])
+    assert (names[0], colors[0]) == (status_en, color)
+
+
+def test_array_classifier_agrees_with_scalar_path():
+    table = get_threshold_table()
+    analysis = AnalysisService()
+    rng = np.random.default_rng(0)
+    params = table.params
+    samples = rng.uniform(0, 400, size=(500, len(params)))
+    samples[::7, 0] = np.nan
+    indices = table.classify_samples(samples, params)
+    for column, param in enumerate(params):
+        kn, color, en = table.labels(param, indices[:, column])
+        for row, value in enumerate(samples[:, column]):
+            expected = analysis._get_status_from_value(param, None if np.isnan(value) else float(value))
+            assert (kn[row], color[row], en[row]) == expected
+    assert (indices[::7, 0] == NOT_FOUND).all()
+
+
+def test_recommendation_targets_come_from_the_table():
+    table = get_threshold_table()
+    assert table.target("nitrogen") == 280
+    assert table.target("phosphorus") == 57
+    assert table.target("potassium") == 337
+    assert table.target("ec") is None
+    assert table.get("ph", "lime_below") == 6.0
+
+
+def test_rate_soil_batch_matches_per_value_rating():
+    analysis = AnalysisService()
+    rows = [SoilData(ph=5.0, nitrogen=120, zinc=0.3), SoilData(), SoilData(ph=7.0, potassium=400)]
+    for row, statuses in zip(rows, analysis.rate_soil_batch(rows)):
+        assert [s.nutrient for s in statuses] == [p.replace("_", " ").title() for p in analysis.PARAM_ORDER]
+        for param, status in zip(analysis.PARAM_ORDER, statuses):
+            status_kn, color, status_en = analysis._get_status_from_value(param, getattr(row, param))
+            assert (status.status_kn, status.color, status.status) == (status_kn, color, status_en)
+    assert analysis.rate_soil_batch([]) == []